@@ -89,6 +89,15 @@ const char dirToCheck = 'D'; // Which directions should be checked after the con
 // And that's why it can be duplicated.
 
 const char bounds = 'B'; // A bounds struct packet
+const char wireFormat = 'W'; // Choose the format written to serial: 'W 1' binary frames, 'W 0' text lines
+
+/**
+ * Binary frames written to serial: sync, length, version, packet id, payload, crc8.
+ * Length counts the bytes from version to the end of the payload.
+ * Component value payload: node id, component type, component id, value (4 byte float)
+ */
+const uint8_t frameSync = 0xA5;
+const uint8_t frameVersion = 1;
 
 
 /**
@@ -12,7 +12,7 @@
 #include <WebUSB.h>
 
 #define ADS_ADDRESS 0x48
-#define SERIAL_SIZE 30 //Buffer for receiving data from serial. Shouldn't exceed this limit
+#define SERIAL_SIZE 64 //Buffer for receiving a command from serial, without the id and the newline. Longer commands are ignored
 #define webusbSerial WebUSBSerial
 
 //Could be simplified: use less memory
@@ -28,6 +28,7 @@ ADS1115 ADS(ADS_ADDRESS); //Only call begin method if pot is connected
 NodeType nt;           // This nodes nodetype. One can set a nodetype from serial with command 'F {nodetype}'
 bool hasType = false;  // Does the node have a valid (not empty) nodetype
 bool isMaster = false; // Is the node the master. The node which receives the start command from Serial will be declared as the Master
+bool binaryFrames = false; // Write binary frames to serial instead of text lines. Set from serial with command 'W {0|1}'
 
 // All of these are currently limited by the schematic/pin count. The code supports having multiple of each
 const uint8_t maxPots = 1;    // The maximum count of potentiometers a node can have.
@@ -397,8 +398,7 @@ void checkPots()
       if (isMaster)
       {
         data.nodeId = masterId;
-        String dataS = dataToString(data);
-        toSerialWithCRC(dataS);
+        toSerialWithCRC(data);
       }
       else
         sendData(data);
@@ -433,8 +433,7 @@ void checkRots()
       if (isMaster)
       {
         data.nodeId = masterId;
-        String dataS = dataToString(data);
-        toSerialWithCRC(dataS);
+        toSerialWithCRC(data);
       }
       else
         sendData(data);
@@ -468,8 +467,7 @@ void checkButtons()
       if (isMaster)
       {
         data.nodeId = masterId;
-        String dataS = dataToString(data);
-        toSerialWithCRC(dataS);
+        toSerialWithCRC(data);
       }
       else
         sendData(data);
@@ -605,6 +603,11 @@ void loop()
     save();
   }
 
+  if (serial == wireFormat)
+  {
+    binaryFrames = ((whichSerial == -1) ? Serial.parseInt() : webusbSerial.parseInt()) == 1;
+  }
+
   if (!interfaceReady)
   {
     if (serial == start)
@@ -711,6 +714,7 @@ void handleQuitSerial()
   stackTop = 0;
   nextId = 1;
   whichSerial = 0;
+  binaryFrames = false;
 }
 
 /*
@@ -722,22 +726,45 @@ void handleBoundsSerial()
 {
   BoundsData b;
   char input[SERIAL_SIZE + 1];
-  byte size = (whichSerial == -1) ? Serial.readBytes(input, SERIAL_SIZE) : webusbSerial.readBytes(input, SERIAL_SIZE);
+  // Read up to the newline so commands sent back to back aren't merged
+  byte size = (whichSerial == -1) ? Serial.readBytesUntil('\n', input, SERIAL_SIZE) : webusbSerial.readBytesUntil('\n', input, SERIAL_SIZE);
   // Add the final 0 to end the C string
   input[size] = 0;
 
-  // Read each value
+  if (size == SERIAL_SIZE)
+  { // The newline wasn't read yet. Skip to it so the rest isn't read as commands, a longer command is ignored
+    bool tooLong = false;
+    char c = 0;
+    while (((whichSerial == -1) ? Serial.readBytes(&c, 1) : webusbSerial.readBytes(&c, 1)) == 1 && c != '\n')
+      tooLong = true;
+    if (tooLong)
+      return;
+  }
+
+  // Read each value, a missing one ignores the command
   char *val = strtok(input, ":");
+  if (val == 0)
+    return;
   uint8_t nodeId = atoi(val);
   val = strtok(0, ":");
+  if (val == 0)
+    return;
   b.componentType = val[0];
   val = strtok(0, ":");
+  if (val == 0)
+    return;
   b.componentId = atoi(val);
   val = strtok(0, ":");
+  if (val == 0)
+    return;
   b.minValue = atof(val);
   val = strtok(0, ":");
+  if (val == 0)
+    return;
   b.maxValue = atof(val);
   val = strtok(0, ":");
+  if (val == 0)
+    return;
   b.stepSize = atof(val);
 
   if (nodeId == masterId || nodeId == 0)
@@ -817,6 +844,11 @@ void receiver_function_master(uint8_t *payload, uint16_t length, const PJON_Pack
  */
 void handleNodeConnection()
 {
+  if (binaryFrames)
+  {
+    toSerialBinary(nodeConnected, NULL, 0);
+    return;
+  }
   Serial.println(nodeConnected);
   webusbSerial.println(nodeConnected);
   webusbSerial.flush();
@@ -843,8 +875,7 @@ void handleDataPacket(uint8_t *payload)
 {
   Data data;
   memcpy(&data, payload, sizeof(data));
-  String dataS = dataToString(data);
-  toSerialWithCRC(dataS);
+  toSerialWithCRC(data);
 }
 
 /*
@@ -898,7 +929,9 @@ void runConfiguration()
   dp.setPinsInput();
 
   //Configuration done
-  if (whichSerial == 1)
+  if (binaryFrames)
+    toSerialBinary(csCompleted, NULL, 0);
+  else if (whichSerial == 1)
   {
     webusbSerial.println(csCompleted);
     webusbSerial.flush();
@@ -1057,6 +1090,12 @@ void toSerialWithCRC(String s)
 {
   uint8_t data[s.length() + 1];
   s.getBytes(data, s.length() + 1);
+  if (binaryFrames)
+  { // "ID dataString" -> packet id and dataString as the payload
+    uint8_t n = s.length() > 2 ? s.length() - 2 : 0;
+    toSerialBinary(data[0], &data[2], n);
+    return;
+  }
   uint8_t crc8 = crc.getCRC8(data, s.length());
   if (whichSerial == 1)
   {
@@ -1072,3 +1111,56 @@ void toSerialWithCRC(String s)
     Serial.println(crc8);
   }
 }
+
+/*
+ * Function: toSerialWithCRC
+ * --------------------
+ * Writes a component value to serial. As a binary frame if binary frames are in use,
+ * otherwise as a string with the crc checksum.
+ * 
+ * data: The component value
+ */
+void toSerialWithCRC(Data data)
+{
+  if (!binaryFrames)
+  {
+    toSerialWithCRC(dataToString(data));
+    return;
+  }
+  uint8_t payload[7];
+  payload[0] = data.nodeId;
+  payload[1] = data.type;
+  payload[2] = data.id;
+  float value = data.value; // double is a 4 byte float on avr, but make sure
+  memcpy(&payload[3], &value, sizeof(value));
+  toSerialBinary(componentValue, payload, sizeof(payload));
+}
+
+/*
+ * Function: toSerialBinary
+ * --------------------
+ * Writes a binary frame to serial: sync, length, version, packet id, payload and the crc checksum.
+ * The checksum is calculated from length to the end of the payload.
+ * 
+ * command: The packet id
+ * payload: The payload
+ * n: Size of the payload
+ */
+void toSerialBinary(char command, uint8_t *payload, uint8_t n)
+{
+  uint8_t frame[n + 5];
+  frame[0] = frameSync;
+  frame[1] = n + 2;
+  frame[2] = frameVersion;
+  frame[3] = command;
+  if (n > 0)
+    memcpy(&frame[4], payload, n);
+  frame[n + 4] = crc.getCRC8(&frame[1], n + 3);
+  if (whichSerial == 1)
+  {
+    webusbSerial.write(frame, n + 5);
+    webusbSerial.flush();
+  }
+  else if (whichSerial == -1)
+    Serial.write(frame, n + 5);
+}
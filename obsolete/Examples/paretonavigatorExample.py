@@ -1,4 +1,9 @@
 from desdeo_mcdm import interactive
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 import numpy as np
 import pandas as pd
 from desdeo_problem import Constraint
@@ -11,11 +16,17 @@ from desdeo_tools.solver.ScalarSolver import (
     DiscreteMinimizer,
 )
 from desdeo_mcdm.interactive.ReferencePointMethod import validate_reference_point
-from typing import Dict, Optional, Tuple, Union
+from typing import Callable, Dict, Optional, Tuple, Union
 from desdeo_mcdm.interactive.InteractiveMethod import InteractiveMethod
 from desdeo_tools.interaction.request import BaseRequest
 from scipy.spatial import ConvexHull
-from scipy.optimize import linprog
+from scipy.optimize import differential_evolution, linprog
+from scipy.sparse import csr_matrix
+
+try:
+    import highspy  # Optional, keeps the LP and its basis between navigation ticks
+except ImportError:
+    highspy = None
 
 # TODO
 # Verify Discrete case
@@ -332,6 +343,609 @@ class ParetoNavigatorStopRequest(BaseRequest):
         super().__init__("print", "no_interaction", content=content)
 
 
+class IncrementalHull:
+    """
+    Convex hull of a growing set of points as the inequalities Az <= b, one row per facet.
+    A new point replaces only the facets it sees with facets from their horizon to the point
+    (beneath-beyond), the other rows stay where they are. A point inside the hull changes nothing.
+
+    Args:
+        points (np.ndarray): The initial points, they must span the objective space
+        tol (float): Relative distance from a facet under which a point counts as being on it
+    """
+
+    def __init__(self, points: np.ndarray, tol: float = 1e-9):
+        points = np.asarray(points, dtype=float)
+        hull = ConvexHull(points)  # facet: Az + b = 0 so inside: Az <= -b
+        n, k = points.shape
+        f = len(hull.simplices)
+        self.k = k
+        self.n = n  # Count of points
+        self.count = f  # Count of facets
+        self.tol = tol * max(1.0, np.abs(points).max())
+        self.interior = points[hull.vertices].mean(axis=0)  # Stays inside as the hull only grows
+        self._points = np.zeros((max(2 * n, 16), k))
+        self._points[:n] = points
+        self._A = np.zeros((max(2 * f, 16), k))
+        self._A[:f] = hull.equations[:, 0:-1]
+        self._b = np.zeros(len(self._A))
+        self._b[:f] = -hull.equations[:, -1]
+        self._facets = np.zeros((len(self._A), k), dtype=int)  # Indices of the points of each facet
+        self._facets[:f] = hull.simplices
+
+    @property
+    def points(self) -> np.ndarray:
+        return self._points[:self.n]
+
+    @property
+    def A(self) -> np.ndarray:
+        return self._A[:self.count]
+
+    @property
+    def b(self) -> np.ndarray:
+        return self._b[:self.count]
+
+    @property
+    def vertices(self) -> np.ndarray:
+        """
+        Indices of the points on the hull
+        """
+        return np.unique(self._facets[:self.count])
+
+    def add_point(self, point: np.ndarray) -> np.ndarray:
+        """
+        Add a point and update the facets it sees
+
+        Args:
+            point (np.ndarray): The new point
+
+        Returns:
+            np.ndarray: Indices of the rows of A and b that changed, rows from count on were removed
+        """
+        point = np.asarray(point, dtype=float).ravel()
+        if self.n == len(self._points):
+            self._points = self._grow(self._points)
+        p = self.n
+        self._points[p] = point
+        self.n += 1
+
+        visible = np.flatnonzero(self.A @ point - self.b > self.tol)
+        if len(visible) == 0:
+            return visible
+
+        # Ridges of the visible facets, the ones only one visible facet has are on the horizon
+        facets = np.sort(self._facets[visible], axis=1)
+        ridges = np.concatenate([np.delete(facets, i, axis=1) for i in range(self.k)])
+        ridges, counts = np.unique(ridges, axis=0, return_counts=True)
+        horizon = ridges[counts == 1]
+
+        # The new facets through the horizon ridges and the point
+        new = np.hstack((horizon, np.full((len(horizon), 1), p)))
+        normals = np.linalg.svd(self._points[horizon] - point)[2][:, -1]
+        offsets = normals @ point
+        outward = np.where(normals @ self.interior > offsets, -1.0, 1.0)
+        normals *= outward[:, None]
+        offsets *= outward
+
+        # Write the new facets over the visible ones, append the rest or fill the holes with the last rows
+        m = len(new)
+        rows = changed = visible[:m]  # visible is sorted so the rows kept are below the new count
+        if m > len(visible):
+            while self.count + m - len(visible) > len(self._A):
+                self._A, self._b, self._facets = self._grow(self._A), self._grow(self._b), self._grow(self._facets)
+            rows = changed = np.concatenate((visible, np.arange(self.count, self.count + m - len(visible))))
+            self.count += m - len(visible)
+        elif m < len(visible):
+            count = self.count - (len(visible) - m)
+            holes = visible[m:]
+            holes = holes[holes < count]
+            tail = np.setdiff1d(np.arange(count, self.count), visible[m:], assume_unique=True)
+            self._A[holes], self._b[holes], self._facets[holes] = self._A[tail], self._b[tail], self._facets[tail]
+            self.count = count
+            changed = np.union1d(rows, holes)
+        self._A[rows], self._b[rows], self._facets[rows] = normals, offsets, new
+        return changed
+
+    @staticmethod
+    def _grow(array: np.ndarray) -> np.ndarray:
+        grown = np.zeros((2 * len(array),) + array.shape[1:], dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+
+class ParametricLP:
+    """
+    Problem (3) kept between solves, only the moved reference point in the first k rows of b'
+    changes. The constraint matrix A' is kept as CSR.
+
+    A solve first tries the previous optimal basis: the rows with nonzero duals are solved as
+    equalities for the new reference point, and if the result is feasible the previous duals still
+    prove it optimal. Otherwise, with highspy installed, the model kept in HiGHS gets the new bounds
+    of the k rows and HiGHS starts from the previous basis. Without it, or if HiGHS fails, the
+    problem is solved cold with linprog.
+
+    Args:
+        ideal (np.ndarray): Ideal vector
+        nadir (np.ndarray): Nadir vector
+        A (np.ndarray): Matrix A' of problem (3), see construct_lppp_A
+        b (np.ndarray): Vector b from Az <= b
+        warm (bool): Start from the previous basis
+        tol (float): Slacks and duals under this are counted as zero
+    """
+
+    def __init__(
+        self,
+        ideal: np.ndarray,
+        nadir: np.ndarray,
+        A: np.ndarray,
+        b: np.ndarray,
+        warm: bool = True,
+        tol: float = 1e-7,
+    ):
+        k = len(ideal)
+        self.k = k
+        self.ideal = ideal
+        self.nadir = nadir
+        self.b = b
+        self.c = np.array([1.0] + k * [0.0])
+        self.A = csr_matrix(A)
+        self.b_ub = np.append(np.zeros(k), b)  # The first k values are the moved reference point
+        self.bounds = [(None, None)] + [(x, y) for x, y in np.stack((ideal, nadir)).T]
+        self.warm = warm
+        self.tol = tol
+        self.solves = 0  # Count of solves
+        self.basis_solves = 0  # Count of solves the previous basis answered
+        self.warm_solves = 0  # Count of solves HiGHS started from the previous basis
+        self._basis = None  # Active rows and bounds, their pseudo inverse, x and duals of the latest optimum
+        self._highs = self._model() if warm and highspy is not None else None
+
+    def _model(self):
+        lp = highspy.HighsLp()
+        lp.num_col_, lp.num_row_ = self.A.shape[1], self.A.shape[0]
+        lp.col_cost_ = self.c
+        lp.col_lower_ = np.append(-highspy.kHighsInf, self.ideal).astype(float)
+        lp.col_upper_ = np.append(highspy.kHighsInf, self.nadir).astype(float)
+        lp.row_lower_ = np.full(lp.num_row_, -highspy.kHighsInf)
+        lp.row_upper_ = self.b_ub
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.start_ = self.A.indptr
+        lp.a_matrix_.index_ = self.A.indices
+        lp.a_matrix_.value_ = self.A.data
+        h = highspy.Highs()
+        h.setOptionValue("output_flag", False)
+        h.passModel(lp)
+        self._rows = np.arange(self.k, dtype=np.int32)
+        self._no_lower = np.full(self.k, -highspy.kHighsInf)
+        return h
+
+    def solve(self, ref_point: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Solve problem (3) for a moved reference point
+
+        Args:
+            ref_point (np.ndarray): The moved reference point, current_sol + a * direction
+
+        Returns:
+            (np.ndarray, np.ndarray, np.ndarray): The optimal vector (zeta, z), the duals of the rows of A'
+            and the reduced costs of the variables, positive at a lower bound and negative at an upper bound
+        """
+        self.solves += 1
+        self.b_ub[:self.k] = ref_point
+        if self._basis is not None:
+            solution = self._basis_solution()
+            if solution is not None:
+                self.basis_solves += 1
+                return solution
+        solution = None
+        if self._highs is not None:
+            self._highs.changeRowsBounds(self.k, self._rows, self._no_lower, self.b_ub[:self.k])
+            self._highs.run()
+            if self._highs.getModelStatus() == highspy.HighsModelStatus.kOptimal:
+                self.warm_solves += 1
+                sol = self._highs.getSolution()
+                solution = np.array(sol.col_value), np.array(sol.row_dual), np.array(sol.col_dual)
+        if solution is None:
+            sol = linprog(c=self.c, A_ub=self.A, b_ub=self.b_ub, bounds=self.bounds, method="highs")
+            if not sol["success"]:
+                raise ParetoNavigatorException("Couldn't calculate a new solution")
+            solution = sol["x"], sol.ineqlin.marginals, sol.lower.marginals + sol.upper.marginals
+        if self.warm:
+            self._keep_basis(*solution)
+        return solution
+
+    def _keep_basis(self, x: np.ndarray, row_duals: np.ndarray, reduced_costs: np.ndarray):
+        rows = np.flatnonzero(np.abs(row_duals) > self.tol)
+        bounds = np.flatnonzero(np.abs(reduced_costs) > self.tol)
+        # The active rows and bounds as equalities, a bound row is a unit vector
+        G = np.vstack((self.A[rows].toarray(), np.eye(len(x))[bounds]))
+        lower = np.append(-np.inf, self.ideal)[bounds]
+        upper = np.append(np.inf, self.nadir)[bounds]
+        bound_values = np.where(reduced_costs[bounds] > 0, lower, upper)
+        h = np.concatenate((self.b_ub[rows], bound_values))
+        self._basis = (rows, bound_values, G, np.linalg.pinv(G), x, h, row_duals, reduced_costs)
+
+    def _basis_solution(self) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        rows, bound_values, G, inverse, x, h, row_duals, reduced_costs = self._basis
+        h_new = np.concatenate((self.b_ub[rows], bound_values))
+        x = x + inverse @ (h_new - h)  # The smallest move that keeps the active rows tight
+        scale = self.tol * (1 + np.abs(h_new).max(initial=0))
+        if np.abs(G @ x - h_new).max(initial=0) > scale:  # The rows can't stay tight
+            return None
+        if np.any(self.A @ x > self.b_ub + scale):
+            return None
+        if np.any(x[1:] < self.ideal - scale) or np.any(x[1:] > self.nadir + scale):
+            return None
+        return x, row_duals, reduced_costs
+
+
+class ParametricPath:
+    """
+    Solutions of the linear parametric programming problem (3) as a function of alpha for one
+    starting point and direction. Only the right hand side moves and it moves linearly in alpha,
+    so between the alphas where the optimal basis changes the solution moves along a line.
+    A segment of the path is computed from one LP solution: the constraints with nonzero duals
+    stay tight, which gives the line, and a ratio test gives how far it stays feasible. The
+    segments are kept sorted by alpha, so inside a computed segment a solution costs a binary
+    search and O(k). The next segment is solved when alpha leaves them.
+
+    Args:
+        current_sol (np.ndarray): The solution where the direction was chosen, alpha 0
+        direction (np.ndarray): Navigation direction
+        lp (ParametricLP): Problem (3) on the current approximation
+        tol (float): Slacks and duals under this are counted as zero
+    """
+
+    def __init__(
+        self,
+        current_sol: np.ndarray,
+        direction: np.ndarray,
+        lp: ParametricLP,
+        tol: float = 1e-7,
+    ):
+        k = len(current_sol)
+        self.lp = lp
+        self.current_sol = current_sol
+        self.direction = direction
+        # The bounds of z as rows too: G x <= h0 + alpha * h1
+        bound_rows = np.hstack((np.zeros((k, 1)), np.eye(k)))
+        self.G = np.vstack((lp.A.toarray(), -bound_rows, bound_rows))
+        self.h0 = np.concatenate((current_sol, lp.b, -lp.ideal, lp.nadir))
+        self.h1 = np.concatenate((direction, np.zeros(len(lp.b) + 2 * k)))
+        self.tol = tol
+        self.segments = []  # (lowest alpha, highest alpha, alpha of x, x, dx / dalpha) sorted by alpha, not overlapping
+        self._los = []  # Lowest alpha of each segment for bisect
+        self.solves = 0  # Count of LP solves
+
+    def __call__(self, a: float, sign: float = 1.0) -> np.ndarray:
+        """
+        The solution at alpha
+
+        Args:
+            a (float): Alpha in problem (3)
+            sign (float): Whether alpha grows (positive) or shrinks, a new segment is computed in that direction
+
+        Returns:
+            np.ndarray: Optimal vector z of problem (3)
+        """
+        i = bisect.bisect_right(self._los, a) - 1  # The segment starting last at or before a
+        if i >= 0:
+            lo, hi, a0, x, dx = self.segments[i]
+            if a <= hi:
+                return (x + (a - a0) * dx)[1:]
+        lo, hi, a0, x, dx = self.segment(a, sign)
+        # Clip to the neighbours so the segments stay disjoint, a itself isn't in them
+        lo = max(lo, self.segments[i][1]) if i >= 0 else lo
+        hi = min(hi, self._los[i + 1]) if i + 1 < len(self._los) else hi
+        if lo < hi:  # A degenerate or zero width segment isn't kept, it would only grow the list
+            self.segments.insert(i + 1, (lo, hi, a0, x, dx))
+            self._los.insert(i + 1, lo)
+        return x[1:]
+
+    def segment(self, a: float, sign: float = 1.0) -> tuple:
+        """
+        The segment of the path through alpha, see segments
+
+        Args:
+            a (float): Alpha in problem (3)
+            sign (float): The segment reaches from a at least in this direction
+
+        Returns:
+            tuple: (lowest alpha, highest alpha, a, x at a, dx / dalpha)
+        """
+        self.solves += 1
+        x, row_duals, reduced_costs = self.lp.solve(self.current_sol + a * self.direction)
+        duals = np.concatenate((row_duals, np.maximum(reduced_costs[1:], 0), np.minimum(reduced_costs[1:], 0)))
+        slack = self.h0 + a * self.h1 - self.G @ x
+        tight = slack <= self.tol * (1 + np.abs(self.h0 + a * self.h1))
+        active = np.abs(duals) > self.tol
+        for _ in range(len(x) + 1):
+            # While the rows with nonzero duals stay tight and all rows feasible the duals prove x optimal
+            dx = np.linalg.lstsq(self.G[active], self.h1[active], rcond=None)[0]
+            if not np.allclose(self.G[active] @ dx, self.h1[active], atol=self.tol):
+                return (a, a, a, x, np.zeros(len(x)))  # Degenerate, solve again at the next alpha
+            rate = sign * (self.h1 - self.G @ dx)  # Change of the slacks in the direction of the movement
+            blocking = tight & ~active & (rate < -self.tol)
+            if not blocking.any():
+                break
+            active |= blocking  # Tight rows must stay tight
+        else:
+            return (a, a, a, x, np.zeros(len(x)))
+
+        free = ~active
+        ahead = free & (rate < -self.tol)
+        behind = free & (rate > self.tol)
+        reach = np.min(slack[ahead] / -rate[ahead], initial=np.inf)
+        back = np.min(slack[behind] / rate[behind], initial=np.inf)
+        lo, hi = sorted((a - sign * back, a + sign * reach))
+        return (lo, hi, a, x, dx)
+
+
+class ASFSolveCancelled(ParetoNavigatorException):
+    """Raised inside a speculative ASF solve that a new navigation tick made useless."""
+
+    pass
+
+
+class SpeculativeASF:
+    """
+    Solves the ASF of the current navigation point in a background thread once the navigation
+    has paused, so showing the solution doesn't wait for the minimizer. Every tick schedules a new
+    job and cancels the previous one: a job that is still waiting for the pause is dropped and a
+    running one stops at its next evaluation of the problem. A thread is used as the problem
+    functions often can't be pickled for a process. The threads are daemons so an abandoned
+    navigation doesn't keep the interpreter alive until a solve finishes.
+
+    Args:
+        solve (Callable[[np.ndarray, threading.Event], np.ndarray]): Solves the ASF for a point,
+            raises ASFSolveCancelled once the event is set
+        pause (float): Seconds without ticks before the solve starts
+    """
+
+    def __init__(self, solve: Callable[[np.ndarray, threading.Event], np.ndarray], pause: float = 0.5):
+        self.solve = solve
+        self.pause = pause
+        self.requests = 0  # Count of requests for a solution
+        self.hits = 0  # Requests answered by a finished job
+        self.joins = 0  # Requests that waited for the running job
+        self.misses = 0  # Requests solved from scratch
+        self.saved = 0.0  # Seconds of solving the jobs had done before the requests
+        self._solving = threading.Lock()  # One solve at a time, a cancelled one may still be finishing
+        self._job = None  # The point, cancel and wake events, future and the start and end of the solve
+
+    def schedule(self, point: np.ndarray) -> None:
+        """
+        A navigation tick moved to a new point, solve it after the pause
+        """
+        self.cancel()
+        job = {
+            "point": np.array(point),
+            "cancel": threading.Event(),
+            "wake": threading.Event(),  # Set by a cancel or by a request that can't wait for the pause
+            "started": None,
+            "finished": None,
+            "future": Future(),
+        }
+
+        def run():
+            job["wake"].wait(self.pause)
+            if not job["future"].set_running_or_notify_cancel():  # The navigation went on
+                return
+            try:
+                with self._solving:
+                    if job["cancel"].is_set():
+                        raise ASFSolveCancelled()
+                    job["started"] = time.perf_counter()
+                    result = self.solve(job["point"], job["cancel"])
+                    job["finished"] = time.perf_counter()
+            except Exception as e:
+                job["future"].set_exception(e)
+            else:
+                job["future"].set_result(result)
+
+        threading.Thread(target=run, daemon=True).start()
+        self._job = job
+
+    def cancel(self) -> None:
+        if self._job is None:
+            return
+        self._job["cancel"].set()
+        self._job["future"].cancel()
+        self._job["wake"].set()
+        self._job = None
+
+    def result(self, point: np.ndarray) -> np.ndarray:
+        """
+        The solution of the ASF for a point: the finished job, the running job or a new solve
+
+        Args:
+            point (np.ndarray): The current navigation point
+
+        Returns:
+            np.ndarray: The decision vector solving the ASF
+        """
+        self.requests += 1
+        job = self._job
+        if job is not None and np.array_equal(job["point"], point):
+            try:
+                if job["future"].done():
+                    result = job["future"].result()
+                    self.hits += 1
+                    self.saved += job["finished"] - job["started"]
+                else:
+                    requested = time.perf_counter()
+                    job["wake"].set()  # Start now if the job still waits for the pause
+                    result = job["future"].result()
+                    self.joins += 1
+                    self.saved += max(requested - job["started"], 0.0)
+                return result
+            except ParetoNavigatorException:  # The job failed, solve again here
+                pass
+        self.cancel()
+        self.misses += 1
+        job = {"point": np.array(point), "cancel": threading.Event(), "wake": threading.Event(), "future": Future()}
+        with self._solving:
+            job["started"] = time.perf_counter()
+            result = self.solve(job["point"], job["cancel"])
+            job["finished"] = time.perf_counter()
+        job["future"].set_result(result)
+        self._job = job  # Asking again before the next tick is a hit
+        return result
+
+    def stats(self) -> dict:
+        """
+        Counts of the requests, hits, joins and misses, the rate of hits and the seconds saved
+        """
+        return {
+            "requests": self.requests,
+            "hits": self.hits,
+            "joins": self.joins,
+            "misses": self.misses,
+            "hit_rate": self.hits / self.requests if self.requests else 0.0,
+            "saved_s": self.saved,
+        }
+
+    def close(self) -> None:
+        """
+        Cancel the job, a running solve stops at its next evaluation
+        """
+        self.cancel()
+
+
+class ASFCache:
+    """
+    Decision vectors that solved the ASF, by reference point. The reference points are normalized
+    with the ideal and nadir and rounded to a grid, points in the same cell share an entry. The
+    entries live in arrays of a fixed size and the least recently used entry is replaced when they
+    are full. A reference point without an entry can start the minimizer from the decision vector
+    of the nearest cached reference point.
+
+    Args:
+        ideal (np.ndarray): Ideal vector
+        nadir (np.ndarray): Nadir vector
+        resolution (float): Width of a grid cell in the normalized objective space
+        size (int): Most entries kept
+    """
+
+    def __init__(self, ideal: np.ndarray, nadir: np.ndarray, resolution: float = 1e-3, size: int = 256):
+        self.ideal = ideal
+        self.scale = nadir - ideal
+        self.resolution = resolution
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.warm_starts = 0  # Misses that got a nearby decision vector
+        self._slots = OrderedDict()  # key: slot, the least recently used first
+        self._points = np.zeros((size, len(ideal)))  # Normalized reference point of each slot
+        self._xs = None  # Decision vector of each slot, allocated on the first put
+        self._lock = threading.Lock()  # The speculative solves use the cache too
+
+    def key(self, ref_point: np.ndarray) -> tuple:
+        """
+        The grid cell of a reference point
+        """
+        return tuple(np.round(self.normalize(ref_point) / self.resolution).astype(int))
+
+    def normalize(self, ref_point: np.ndarray) -> np.ndarray:
+        return (np.asarray(ref_point, dtype=float).ravel() - self.ideal) / self.scale
+
+    def get(self, ref_point: np.ndarray) -> Optional[np.ndarray]:
+        """
+        The cached decision vector of a reference point or None
+        """
+        key = self.key(ref_point)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                self.misses += 1
+                return None
+            self._slots.move_to_end(key)
+            self.hits += 1
+            return self._xs[slot].copy()
+
+    def nearest(self, ref_point: np.ndarray) -> Optional[np.ndarray]:
+        """
+        The decision vector of the cached reference point nearest to a reference point, None if the cache is empty
+        """
+        with self._lock:
+            if not self._slots:
+                return None
+            slots = np.fromiter(self._slots.values(), dtype=int, count=len(self._slots))
+            distances = np.linalg.norm(self._points[slots] - self.normalize(ref_point), axis=1)
+            self.warm_starts += 1
+            return self._xs[slots[np.argmin(distances)]].copy()
+
+    def put(self, ref_point: np.ndarray, x: np.ndarray) -> None:
+        """
+        Save the decision vector solving the ASF of a reference point
+        """
+        key = self.key(ref_point)
+        x = np.asarray(x, dtype=float).ravel()
+        with self._lock:
+            if self._xs is None:
+                self._xs = np.zeros((self.size, len(x)))
+            slot = self._slots.pop(key, None)
+            if slot is None:
+                if len(self._slots) < self.size:
+                    slot = len(self._slots)
+                else:
+                    _, slot = self._slots.popitem(last=False)
+            self._slots[key] = slot
+            self._points[slot] = self.normalize(ref_point)
+            self._xs[slot] = x
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes of the arrays of the entries, fixed by size
+        """
+        return self._points.nbytes + (0 if self._xs is None else self._xs.nbytes)
+
+    def stats(self) -> dict:
+        """
+        Counts of the entries, hits, misses and warm started misses
+        """
+        return {"entries": len(self._slots), "hits": self.hits, "misses": self.misses, "warm_starts": self.warm_starts}
+
+
+def seeded_differential_evolution(
+    fun: Callable,
+    x0: np.ndarray,
+    bounds: np.ndarray,
+    constraints=(),
+    share: float = 0.8,
+    spread: float = 0.05,
+    popsize: int = 15,
+    **kwargs,
+) -> dict:
+    """
+    scipy's differential evolution with a share of the initial population around x0, for ScalarMethod.
+    The "scipy_de" preset of ScalarMinimizer drops x0, so a warm start would do nothing with it
+
+    Args:
+        fun (Callable): The function to minimize
+        x0 (np.ndarray): The initial guess, a member of the population
+        bounds (np.ndarray): Lower bounds on the first column, upper bounds on the second
+        constraints: Constraints for differential_evolution
+        share (float): Share of the population around x0, the rest is spread over the bounds. 0 doesn't seed
+        spread (float): Width of the box around x0 as a share of the bounds
+        popsize (int): Population size per variable, see differential_evolution
+
+    Returns:
+        dict: The result of differential_evolution
+    """
+    bounds = np.asarray(bounds, dtype=float)
+    if share <= 0:
+        return differential_evolution(fun, bounds, constraints=constraints, popsize=popsize, **kwargs)
+    lower, upper = bounds[:, 0], bounds[:, 1]
+    rng = np.random.default_rng(kwargs.get("seed"))
+    n = len(lower)
+    init = rng.uniform(lower, upper, (max(popsize * n, 5), n))
+    near = max(int(share * len(init)), 1)
+    init[:near] = np.clip(x0 + rng.uniform(-spread, spread, (near, n)) * (upper - lower), lower, upper)
+    init[0] = np.clip(x0, lower, upper)
+    return differential_evolution(fun, bounds, constraints=constraints, init=init, **kwargs)
+
+
 class ParetoNavigator(InteractiveMethod):
     """
     Paretonavigator as described in 'Pareto navigator for interactive nonlinear
@@ -341,6 +955,11 @@ class ParetoNavigator(InteractiveMethod):
     Args:
         problem (MOProblem): The problem to be solved.
         pareto_optimal_solutions (np.ndarray): Some pareto optimal solutions to construct the polyhedral set
+        scalar_method (Optional[ScalarMethod]): The method solving the achievement scalarizing function
+        solution_path (bool): Keep the direction from where it was chosen and move the ticks along its
+            solution path, see ParametricPath. Faster, but doesn't turn towards the reference point as the
+            solution moves, and stops where the path reaches the reference point. By default the direction
+            is aimed from the current solution on every tick
 
     """
 
@@ -349,8 +968,10 @@ class ParetoNavigator(InteractiveMethod):
         problem: Union[MOProblem, DiscreteDataProblem],
         pareto_optimal_solutions: np.ndarray = None,  # Initial pareto optimal solutions
         scalar_method: Optional[ScalarMethod] = None,
+        solution_path: bool = False,
     ):
         self._scalar_method = scalar_method  # CHECK
+        self._solution_path = solution_path
 
         if np.any(np.isinf(problem.nadir)) or np.any(np.isinf(problem.ideal)):
             # Get the ideal and nadir from the provided po solutions
@@ -369,16 +990,16 @@ class ParetoNavigator(InteractiveMethod):
         self._ideal = ideal
         self._nadir = nadir
 
-        A, self.b = self.polyhedral_set_eq(
-            pareto_optimal_solutions
-        ) 
+        self._hull = IncrementalHull(pareto_optimal_solutions)  # Az <= b, grows as solutions are added
+        self.b = self._hull.b
         self._weights = self.calculate_weights(self._ideal, self._nadir)
 
-        self.lppp_A = self.construct_lppp_A(
-            self._weights, A
-        )  # Used in (3). Only changes if new solutions added
+        self._lppp = self.construct_lppp_A(
+            self._weights, self._hull.A
+        )  # Used in (3). Only the rows of the changed facets change when solutions are added
+        self.lppp_A = self._lppp
 
-        self._pareto_optimal_solutions = pareto_optimal_solutions
+        self._pareto_optimal_solutions = self._hull.points
 
         self._allowed_speeds = [1, 2, 3, 4, 5]
 
@@ -389,6 +1010,16 @@ class ParetoNavigator(InteractiveMethod):
         self._reference_point = None
         self._current_solution = None
         self._direction = None
+        self._lp = None  # Problem (3) kept between the solves, see lp_context
+        self._path = None  # Solutions of (3) along the direction, see ParametricPath
+        self._asf_cache = ASFCache(self._ideal, self._nadir)  # Solutions of the ASF by reference point
+        self.asf_evaluations = 0  # Count of problem evaluations of the ASF solves
+        self._evaluations_lock = threading.Lock()  # The speculative solves count too
+        self._speculation = SpeculativeASF(
+            lambda point, cancel: self.solve_asf(self._problem, point, self._scalar_method, cancel)
+        )  # Solves the ASF of the current solution while the DM pauses
+        self._path_origin = None  # The solution where the direction was chosen
+        self._alpha = 0.0  # Alpha of the current solution on the path
 
     def start(self):
         """
@@ -457,6 +1088,7 @@ class ParetoNavigator(InteractiveMethod):
 
         self._current_solution = starting_point
         self._current_speed = request.response["speed"] / np.max(self._allowed_speeds)
+        self._speculation.schedule(self._current_solution)
 
         return ParetoNavigatorRequest.init_with_method(self)
 
@@ -482,10 +1114,7 @@ class ParetoNavigator(InteractiveMethod):
             resp = {}
 
         if "show_solution" in resp and resp["show_solution"]:
-            self._po_solution = self.solve_asf(
-                self._problem,
-                self._current_solution,
-            )
+            self._po_solution = self._speculation.result(self._current_solution)
             if isinstance(self._problem, MOProblem):
                 self._po_objectives = self._problem.evaluate(
                     self._po_solution
@@ -507,8 +1136,10 @@ class ParetoNavigator(InteractiveMethod):
         else:  # Make sure speed is positive
             self._current_speed = np.abs(self._current_speed)
 
+        new_direction = self._direction is None
         if "reference_point" in resp:
             self._reference_point = resp["reference_point"]
+            new_direction = True
         elif "classification" in resp:
             ref_point = self.classification_to_ref_point(
                 resp["classification"],
@@ -517,21 +1148,35 @@ class ParetoNavigator(InteractiveMethod):
                 self._current_solution,
             )
             self._reference_point = ref_point
+            new_direction = True
+
+        if not self._solution_path:  # Aimed from the current solution on every tick
+            self._direction = self.calculate_direction(self._current_solution, self._reference_point)
+            moved_ref_point = self._current_solution + self._current_speed * self._direction
+            self._current_solution = self.lp_context().solve(moved_ref_point)[0][1:]
+            self._speculation.schedule(self._current_solution)
+            return ParetoNavigatorRequest.init_with_method(self)
+
+        if new_direction:  # The path starts from the current solution
+            self._direction = self.calculate_direction(
+                self._current_solution, self._reference_point
+            )
+            self._path_origin = self._current_solution
+            self._alpha = 0.0
+            self._path = None
+
+        if self._path is None:
+            self._path = ParametricPath(
+                self._path_origin,
+                self._direction,
+                self.lp_context(),
+            )
 
-        self._direction = self.calculate_direction(
-            self._current_solution, self._reference_point
-        )
-
-        # Get the new solution by solving the linear parametric problem
-        self._current_solution = self.solve_linear_parametric_problem(
-            self._current_solution,
-            self._ideal,
-            self._nadir,
-            self._direction,
-            self._current_speed,
-            self.lppp_A,
-            self.b,
-        )
+        # Get the new solution from the solution path of the linear parametric problem, alpha 1 reaches
+        # the reference point so the path stops there instead of going past it
+        self._alpha = min(self._alpha + self._current_speed, 1.0)
+        self._current_solution = self._path(self._alpha, np.sign(self._current_speed))
+        self._speculation.schedule(self._current_solution)
 
         return ParetoNavigatorRequest.init_with_method(self)
 
@@ -556,23 +1201,30 @@ class ParetoNavigator(InteractiveMethod):
                 stop_request = ParetoNavigatorStopRequest(
                     self._current_solution, final_solution, self._po_objectives
                 )
+                self.close()
                 return stop_request
 
         # No response or not satisfied
 
         # Add solution to approximation
-        self._pareto_optimal_solutions = np.vstack(
-            (self._pareto_optimal_solutions, self._po_objectives)
-        )
-        A, self.b = self.polyhedral_set_eq(self._pareto_optimal_solutions)
+        changed = self._hull.add_point(self._po_objectives)
+        self._pareto_optimal_solutions = self._hull.points
         # Update ideal and nadir, then also weights...
         # self._weights = self.calculate_weights(self._ideal, self._nadir)
 
         # update lppp A
-        self.lppp_A = self.construct_lppp_A(self._weights, A)
+        self.lppp_A, self.b = self.update_lppp_A(changed)
+        self._lp = None
+        self._path = None  # Same direction and alpha on the new approximation
 
         return ParetoNavigatorRequest.init_with_method(self)
 
+    def close(self) -> None:
+        """
+        Stop the speculative solve, done when the DM is satisfied. Call when the navigation is abandoned
+        """
+        self._speculation.close()
+
     def calculate_weights(self, ideal: np.ndarray, nadir: np.ndarray):
         """
         Calculate the scaling coefficients w from ideal and nadir.
@@ -629,6 +1281,36 @@ class ParetoNavigator(InteractiveMethod):
         lppp_A = np.concatenate((upper_A, filled_A))
         return lppp_A
 
+    def update_lppp_A(self, changed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Copy the changed facets of the hull to their rows in the matrix A'
+
+        Args:
+            changed (np.ndarray): Indices of the changed facets, see IncrementalHull.add_point
+
+        Returns:
+            (np.ndarray, np.ndarray): The matrix A' and the vector b of the hull
+        """
+        k = len(self._weights)
+        rows = k + self._hull.count
+        if rows > len(self._lppp):  # Spare rows, their first column is 0 like in construct_lppp_A
+            lppp = np.zeros((2 * rows, k + 1))
+            lppp[:len(self._lppp)] = self._lppp
+            self._lppp = lppp
+        self._lppp[k + changed, 1:] = self._hull.A[changed]
+        return self._lppp[:rows], self._hull.b
+
+    def lp_context(self) -> ParametricLP:
+        """
+        Problem (3) on the current approximation, kept until a solution is added
+
+        Returns:
+            ParametricLP: The problem
+        """
+        if self._lp is None:
+            self._lp = ParametricLP(self._ideal, self._nadir, self.lppp_A, self.b)
+        return self._lp
+
     def calculate_direction(self, current_solution: np.ndarray, ref_point: np.ndarray):
         """
         Calculate a new direction from current solution and a given reference point
@@ -695,27 +1377,20 @@ class ParetoNavigator(InteractiveMethod):
         Returns:
             np.ndarray: Optimal vector from the linear parametric programming problem.
             This is the new solution to be used in the navigation.
-        """
-        k = len(current_sol)
-        c = np.array([1] + k * [0])
 
+        Note:
+            Solved cold, the navigation solves the current approximation in lp_context instead
+        """
+        lp = ParametricLP(ideal, nadir, A, b, warm=False)
         moved_ref_point = current_sol + (a * direction)
-        moved_ref_point = np.reshape(moved_ref_point, ((k, 1)))
-        b_new = np.append(moved_ref_point, b)
-
-        obj_bounds = np.stack((ideal, nadir))
-        bounds = [(None, None)] + [(x, y) for x, y in obj_bounds.T]
-        sol = linprog(c=c, A_ub=A, b_ub=b_new, bounds=bounds)
-        if sol["success"]:
-            return sol["x"][1:]  # zeta in index 0.
-        else:
-            raise ParetoNavigatorException("Couldn't calculate a new solution")
+        return lp.solve(moved_ref_point)[0][1:]  # zeta in index 0.
 
     def solve_asf(
         self, 
         problem: Union[MOProblem, DiscreteDataProblem],
         ref_point: np.ndarray,
         method: ScalarMethod = None,
+        cancel: Optional[threading.Event] = None,
     ):
         """
         Solve achievement scalarizing function with simpleasf
@@ -723,15 +1398,30 @@ class ParetoNavigator(InteractiveMethod):
         Args:
             problem (MOProblem): The problem
             ref_point: A reference point
-            method (ScalarMethod): A method provided to the scalar minimizer
+            method (ScalarMethod): A method provided to the scalar minimizer, None for the local minimize of
+                ScalarMinimizer. It starts from the solution of the nearest cached reference point, for
+                "scipy_de" a share of the differential evolution population is put around it
+            cancel (Optional[threading.Event]): Stop with ASFSolveCancelled at the next evaluation once this is set
 
         Returns:
             np.ndarray: The decision vector which solves the achievement scalarizing function
         """
         asf = SimpleASF(np.ones(ref_point.shape))
+        cache = self._asf_cache if problem is self._problem else None
         if isinstance(problem, MOProblem):
+            cached = cache.get(ref_point) if cache is not None else None
+            if cached is not None:
+                return cached
+
+            def evaluate(x):
+                if cancel is not None and cancel.is_set():
+                    raise ASFSolveCancelled()
+                with self._evaluations_lock:
+                    self.asf_evaluations += len(np.atleast_2d(x))
+                return problem.evaluate(x).objectives
+
             scalarizer = Scalarizer(
-                lambda x: problem.evaluate(x).objectives,
+                evaluate,
                 asf,
                 scalarizer_args={"reference_point": np.atleast_2d(ref_point)},
             )
@@ -741,14 +1431,25 @@ class ParetoNavigator(InteractiveMethod):
             else:
                 _con_eval = None
 
+            x0 = cache.nearest(ref_point) if cache is not None else None  # A solution of a nearby reference point
+            if method == "scipy_de":  # The preset drops x0, seed the population from the nearby solution instead
+                method = ScalarMethod(
+                    seeded_differential_evolution,
+                    method_args={"polish": True, "share": 0.0 if x0 is None else 0.8},
+                    use_scipy=True,
+                )
+            if x0 is None:
+                x0 = problem.get_variable_upper_bounds() / 2
+
             solver = ScalarMinimizer(
                 scalarizer,
                 problem.get_variable_bounds(),
                 constraint_evaluator=_con_eval,
                 method= method,
             )
-
-            res = solver.minimize(problem.get_variable_upper_bounds() / 2)
+            res = solver.minimize(x0)
+            if res["success"] and cache is not None:
+                cache.put(ref_point, res["x"])
         else:  # Discrete case
             scalarizer = DiscreteScalarizer(
                 asf, scalarizer_args={"reference_point": np.atleast_2d(ref_point)}
@@ -768,6 +1469,286 @@ import os, sys
 p = os.path.abspath('.')
 sys.path.insert(1, p)
 from desdeo_interface.physical_interfaces.ParetoNavigatorInterface import ParetoInterface
+
+# Cost of adding a solution as the approximation grows, incremental vs. rebuilding the hull and A'
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    import time
+    from types import SimpleNamespace
+
+    rng = np.random.default_rng(0)
+    directions = rng.random((5000, 3))
+    front = 1 - directions / np.linalg.norm(directions, axis=1, keepdims=True)  # Convex, every point is on the hull
+    method = ParetoNavigator(SimpleNamespace(ideal=np.zeros(3), nadir=np.ones(3)), front[:10])
+    checkpoints = {10, 100, 1000, 5000}
+    incremental, changed_rows = [], []
+    for n in range(11, len(front) + 1):
+        start = time.perf_counter()
+        changed = method._hull.add_point(front[n - 1])
+        method.lppp_A, method.b = method.update_lppp_A(changed)
+        incremental.append(time.perf_counter() - start)
+        changed_rows.append(len(changed))
+        if n in checkpoints or n == 11:
+            start = time.perf_counter()
+            for _ in range(3):
+                A, b = method.polyhedral_set_eq(front[:n])
+                method.construct_lppp_A(method._weights, A)
+            rebuild = (time.perf_counter() - start) / 3
+            recent = incremental[-100:]
+            print(f"{n:>5} points, {method._hull.count:>5} facets: incremental {np.mean(recent) * 1e3:.3f} ms "
+                  f"({np.mean(changed_rows[-100:]):.1f} rows changed), rebuild {rebuild * 1e3:.3f} ms")
+    hull = ConvexHull(front)
+    inside = np.all(method.lppp_A[3:, 1:] @ front.T <= method.b[:, None] + 1e-9)
+    print(f"same vertices as a rebuilt hull: {np.array_equal(method._hull.vertices, np.sort(hull.vertices))}, "
+          f"all points inside: {inside}, {method._hull.count} facets vs {len(hull.simplices)}")
+    sys.exit()
+
+# Navigation ticks from the solution path vs. solving (3) with linprog on every tick
+if __name__ == "__main__" and "--path" in sys.argv:
+    import time
+    from types import SimpleNamespace
+
+    rng = np.random.default_rng(0)
+    directions = rng.random((1000, 3))
+    front = 1 - directions / np.linalg.norm(directions, axis=1, keepdims=True)
+    method = ParetoNavigator(SimpleNamespace(ideal=np.zeros(3), nadir=np.ones(3)), front)
+    asf = lambda z, q: np.max(method._weights * (z - q))  # zeta of (3)
+    ticks, path_time, linprog_time, max_zeta_error, max_z_error, solves, segments = 0, 0.0, 0.0, 0.0, 0.0, 0, 0
+    for _ in range(20):  # Directions from a solution towards random reference points
+        origin = front[rng.integers(len(front))]
+        direction = method.calculate_direction(origin, rng.random(3))
+        path = ParametricPath(origin, direction, method.lp_context())
+        cold = ParametricLP(method._ideal, method._nadir, method.lppp_A, method.b, warm=False)
+        alphas = np.concatenate((np.arange(1, 301), np.arange(299, 150, -1))) * 0.005  # Forward, then step back
+        for i, a in enumerate(alphas):
+            sign = 1.0 if i < 300 else -1.0
+            start = time.perf_counter()
+            z = path(a, sign)
+            path_time += time.perf_counter() - start
+            start = time.perf_counter()
+            expected = cold.solve(origin + a * direction)[0][1:]
+            linprog_time += time.perf_counter() - start
+            q = origin + a * direction
+            max_zeta_error = max(max_zeta_error, abs(asf(z, q) - asf(expected, q)))
+            max_z_error = max(max_z_error, np.max(np.abs(z - expected)))
+            ticks += 1
+        solves += path.solves
+        segments += len(path.segments)
+    print(f"{ticks} ticks on {method._hull.count} facets: path {ticks / path_time:.0f} ticks/s "
+          f"({solves} LP solves, {segments} segments), linprog {ticks / linprog_time:.0f} ticks/s")
+    print(f"largest difference to linprog: zeta {max_zeta_error:.2e}, z {max_z_error:.2e}")
+    sys.exit()
+
+# Navigation along the solution path of a kept direction vs. aiming the direction again on every tick
+if __name__ == "__main__" and "--navigate" in sys.argv:
+    from types import SimpleNamespace
+
+    rng = np.random.default_rng(0)
+    directions = rng.random((1000, 3))
+    front = 1 - directions / np.linalg.norm(directions, axis=1, keepdims=True)
+
+    def navigate(solution_path, reference_point, ticks=40):
+        method = ParetoNavigator(SimpleNamespace(ideal=np.zeros(3), nadir=np.ones(3)), front, solution_path=solution_path)
+        method.close()  # Only the approximation is compared
+        method._speculation.schedule = lambda point: None
+        request = method.start()
+        request.response = {"preferred_solution": 0, "speed": 1}
+        request = method.iterate(request)
+        request.response = {"reference_point": reference_point}
+        trajectory = []
+        for _ in range(ticks):
+            request = method.iterate(request)
+            trajectory.append(request.content["current_solution"])
+            request.response = {}
+        return np.array(trajectory), method
+
+    asf = lambda method, z, q: np.max(method._weights * (z - q))
+    for reference_point in rng.random((5, 3)):
+        kept, method = navigate(True, reference_point)
+        reaimed, _ = navigate(False, reference_point)
+        difference = np.max(np.abs(kept - reaimed), axis=1)
+        print(f"q {np.round(reference_point, 2)}: largest difference {difference.max():.3f} (tick {difference.argmax() + 1}), "
+              f"end kept {np.round(kept[-1], 3)} zeta {asf(method, kept[-1], reference_point):.3f}, "
+              f"end re-aimed {np.round(reaimed[-1], 3)} zeta {asf(method, reaimed[-1], reference_point):.3f}")
+    sys.exit()
+
+# Tick latency of solving (3) in the kept LP context vs. building the problem for linprog on every tick
+if __name__ == "__main__" and "--lp" in sys.argv:
+    import time
+
+    rng = np.random.default_rng(0)
+    facets = 3000
+    print(f"LP context misses solved with {'warm started highspy' if highspy is not None else 'linprog, highspy is not installed'}")
+    for k in (3, 5, 10):
+        # Tangent planes of a sphere around the ones vector, an approximation with 3000 facets
+        normals = rng.random((facets, k))
+        normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+        ideal, nadir = np.zeros(k), np.ones(k)
+        weights = 1 / (nadir - ideal)
+        A = ParetoNavigator.construct_lppp_A(None, weights, -normals)
+        b = 1 - normals.sum(axis=1)
+        lp = ParametricLP(ideal, nadir, A, b)
+        origin = 1 - normals[0]
+        direction = rng.random(k) - origin
+        bounds = [(None, None)] + [(x, y) for x, y in np.stack((ideal, nadir)).T]
+        cold, warm = [], []
+        for a in np.arange(1, 301) * 0.003:
+            moved_ref_point = origin + a * direction
+            start = time.perf_counter()
+            c = np.array([1] + k * [0])  # Everything solve_linear_parametric_problem built on every tick
+            expected = linprog(c=c, A_ub=A, b_ub=np.append(moved_ref_point, b), bounds=bounds)["x"]
+            cold.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            x = lp.solve(moved_ref_point)[0]
+            warm.append(time.perf_counter() - start)
+            assert abs(x[0] - expected[0]) < 1e-6
+        cold, warm = np.array(cold) * 1e3, np.array(warm) * 1e3
+        print(f"k={k:>2}, {facets} facets: cold p50 {np.percentile(cold, 50):.2f} ms p99 {np.percentile(cold, 99):.2f} ms, "
+              f"context p50 {np.percentile(warm, 50):.2f} ms p99 {np.percentile(warm, 99):.2f} ms "
+              f"({lp.basis_solves} of {lp.solves} from the previous basis)")
+    sys.exit()
+
+# The duals of the kept HiGHS model vs. linprog, _keep_basis and ParametricPath.segment rely on their signs
+if __name__ == "__main__" and "--duals" in sys.argv:
+    if highspy is None:
+        print("highspy is not installed, the LP context solves with linprog only")
+        sys.exit()
+    rng = np.random.default_rng(0)
+    k, facets = 5, 1000
+    normals = rng.random((facets, k))
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    ideal, nadir = np.zeros(k), np.ones(k)
+    A = ParetoNavigator.construct_lppp_A(None, 1 / (nadir - ideal), -normals)
+    b = 1 - normals.sum(axis=1)
+    lp = ParametricLP(ideal, nadir, A, b, warm=False)
+    highs = lp._model()
+    lower, upper = np.append(-np.inf, ideal), np.append(np.inf, nadir)
+
+    def violations(x, row_duals, reduced_costs):
+        # c = A'^T y + r with y <= 0 on the rows and r >= 0 at a lower bound, r <= 0 at an upper bound
+        scale = lp.tol * 10
+        return (
+            np.abs(lp.c - A.T @ row_duals - reduced_costs).max(),
+            np.sum(row_duals > scale),
+            np.sum((reduced_costs > scale) & (x > lower + scale)) + np.sum((reduced_costs < -scale) & (x < upper - scale)),
+        )
+
+    origin = 1 - normals[0]
+    direction = rng.random(k) - origin
+    worst = {"highspy": [0.0, 0, 0], "linprog": [0.0, 0, 0]}
+    max_zeta_difference = 0.0
+    for a in np.arange(1, 101) * 0.01:
+        lp.b_ub[:k] = origin + a * direction
+        highs.changeRowsBounds(k, lp._rows, lp._no_lower, lp.b_ub[:k])
+        highs.run()
+        sol = highs.getSolution()
+        solutions = {
+            "highspy": (np.array(sol.col_value), np.array(sol.row_dual), np.array(sol.col_dual)),
+            "linprog": lp.solve(lp.b_ub[:k].copy()),
+        }
+        for name, solution in solutions.items():
+            residual, rows, bounds = violations(*solution)
+            worst[name] = [max(worst[name][0], residual), worst[name][1] + rows, worst[name][2] + bounds]
+        max_zeta_difference = max(max_zeta_difference, abs(solutions["highspy"][0][0] - solutions["linprog"][0][0]))
+    for name, (residual, rows, bounds) in worst.items():
+        print(f"{name}: largest stationarity residual {residual:.2e}, positive row duals {rows}, reduced costs of the wrong sign {bounds}")
+    print(f"largest difference of zeta {max_zeta_difference:.2e}")
+    sys.exit()
+
+# A simulated DM navigating in bursts and asking for the solution after a pause, with a speculative ASF
+if __name__ == "__main__" and "--speculate" in sys.argv:
+    from scipy.optimize import differential_evolution
+
+    def objectives(x):  # The example problem of the article
+        return np.array([
+            -x[0] - x[1] + 5,
+            (x[0] ** 2 - 10 * x[0] + x[1] ** 2 - 4 * x[1] + 11) / 5,
+            (5 - x[0]) * (x[1] - 11),
+        ])
+
+    def solve(point, cancel):
+        def asf(x):
+            if cancel.is_set():
+                raise ASFSolveCancelled()
+            return np.max(objectives(x) - point)
+        return differential_evolution(asf, [(0, 4), (0, 6)], popsize=100, seed=0, tol=1e-8, polish=False).x
+
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for point in rng.normal([0, 0, -30], 1, (3, 3)):
+        solve(point, threading.Event())
+    solve_time = (time.perf_counter() - start) / 3
+    speculation = SpeculativeASF(solve, pause=0.3)
+    point = np.array([0.0, 0.0, -30.0])
+    latencies = []
+    for _ in range(30):
+        for _ in range(rng.integers(3, 15)):  # Ticks of the wheel at 10 Hz
+            point = point + rng.normal(0, 0.2, 3)
+            speculation.schedule(point)
+            time.sleep(0.1)
+        time.sleep(rng.uniform(0.1, 2 * solve_time + 0.3))  # The DM looks at the point before asking
+        start = time.perf_counter()
+        speculation.result(point)
+        latencies.append(time.perf_counter() - start)
+    speculation.close()
+    stats = speculation.stats()
+    print(f"synchronous solve {solve_time:.2f} s, show solution with speculation: mean {np.mean(latencies):.2f} s, "
+          f"median {np.median(latencies):.3f} s")
+    print(f"{stats['requests']} requests: {stats['hits']} hits ({stats['hit_rate']:.0%}), {stats['joins']} joins, "
+          f"{stats['misses']} misses, {stats['saved_s']:.1f} s of solving saved")
+    sys.exit()
+
+# Problem evaluations of the ASF solves of a session that returns to earlier regions, with and without the cache
+if __name__ == "__main__" and "--cache" in sys.argv:
+    from desdeo_problem.Objective import _ScalarObjective
+    from desdeo_problem import variable_builder
+
+    objectives = [  # The example problem of the article
+        _ScalarObjective("obj1", lambda xs: -np.atleast_2d(xs)[:, 0] - np.atleast_2d(xs)[:, 1] + 5),
+        _ScalarObjective("obj2", lambda xs: (np.atleast_2d(xs)[:, 0] ** 2 - 10 * np.atleast_2d(xs)[:, 0]
+                                             + np.atleast_2d(xs)[:, 1] ** 2 - 4 * np.atleast_2d(xs)[:, 1] + 11) / 5),
+        _ScalarObjective("obj3", lambda xs: (5 - np.atleast_2d(xs)[:, 0]) * (np.atleast_2d(xs)[:, 1] - 11)),
+    ]
+    problem = MOProblem(objectives=objectives, variables=variable_builder(["x1", "x2"], [2, 3], [0, 0], [4, 6]))
+    po_sols = np.array([
+        [-2, 0, -18], [-1, 4.6, -25], [0, -3.1, -14.25], [1.38, 0.62, -35.33],
+        [1.73, 1.72, -38.64], [2.48, 1.45, -42.41], [5.00, 2.20, -55.00],
+    ])
+
+    def solve_session(session, cached, scalar_method=None):
+        # The solves of the show solution requests, with or without the cache and its warm starts
+        method = ParetoNavigator(problem, po_sols)
+        method.close()
+        if not cached:
+            method._asf_cache = None
+        xs, evaluations = [], []
+        for point in session:
+            before = method.asf_evaluations
+            xs.append(method.solve_asf(problem, point, scalar_method))
+            evaluations.append(method.asf_evaluations - before)
+        return np.array(xs), np.array(evaluations), method
+
+    # The DM navigates around three regions and keeps coming back to them
+    rng = np.random.default_rng(0)
+    ideal, nadir = po_sols.min(axis=0), po_sols.max(axis=0)
+    regions = rng.uniform(ideal, nadir, (3, 3))
+    session = [regions[i % 3] + rng.normal(0, 0.02, 3) * (nadir - ideal) for i in range(100)]
+    session = [point if rng.random() > 0.3 else session[rng.integers(i + 1)] for i, point in enumerate(session)]
+    asf = lambda x, q: np.max(problem.evaluate(x).objectives - q)
+    for scalar_method, name in ((None, "the default local minimize"), ("scipy_de", "scipy_de")):
+        cold_xs, cold, _ = solve_session(session, False, scalar_method)
+        again_xs, _, _ = solve_session(session, False, scalar_method)
+        xs, evaluations, method = solve_session(session, True, scalar_method)
+        worse = max(asf(x, q) - asf(x_cold, q) for x, x_cold, q in zip(xs, cold_xs, session))
+        noise = max(asf(x, q) - asf(x_cold, q) for x, x_cold, q in zip(again_xs, cold_xs, session))
+        warm = np.array([e > 0 for e in evaluations])  # The first solve and the warm started misses
+        cold_misses = cold[warm]
+        print(f"{len(session)} ParetoNavigator.solve_asf calls with {name}: {cold.sum()} evaluations without the cache, "
+              f"{evaluations.sum()} with it ({100 * (1 - evaluations.sum() / cold.sum()):.0f} % fewer)")
+        print(f"solves that ran: {evaluations[warm].mean():.0f} evaluations each vs {cold_misses.mean():.0f} cold")
+        print(f"{method._asf_cache.stats()}, ASF values at most {worse:.1e} above the cold solves, "
+              f"a second cold run at most {noise:.1e}")
+    sys.exit()
+
 # Testing
 if __name__ == "__main__":
     from desdeo_problem.Objective import _ScalarObjective
@@ -902,7 +1883,7 @@ if __name__ == "__main__":
         else: break # stop request
         request = method.iterate(request)
         
-
+    method.close()
 
     print(request.content["message"])
     obj_values = request.content["objective_values"]
@@ -8,7 +8,10 @@ from pyfirmata import Arduino, util
 from desdeo_interface.components.Component import Component
 from desdeo_interface.components.Button import Button
 from desdeo_interface.components.RotaryEncoder import RotaryEncoder
-from typing import List
+from desdeo_interface.components.ChangeNotifier import ChangeNotifier
+from desdeo_interface.components.SerialReader import master_key
+from desdeo_interface.components.EdgeQueue import ButtonEdge, EdgeQueue
+from typing import Hashable, List, Optional, Sequence
 
 """
 Master component of the physical interface.
@@ -25,6 +28,8 @@ class Master:
     confirm_button: Button
     decline_button: Button
     wheel: RotaryEncoder
+    notifier: ChangeNotifier # Tells when the components change, if None the master polls them
+    edges: Optional[EdgeQueue] # Presses and releases of the buttons, if None the buttons are polled
     #_board: Arduino
     #_it: util.Iterator
     #components: dict # Dictionary (or maybe a list) of all the components/microcontrollers connected to the master
@@ -34,6 +39,8 @@ class Master:
         confirm_button = None,
         decline_button = None,
         wheel = None,
+        notifier: ChangeNotifier = None,
+        edges: EdgeQueue = None,
         #port: str = None,
         #confirm_button_pin: int = 3,
         #decline_button_pin: int = 2,
@@ -46,11 +53,85 @@ class Master:
         self.confirm_button = Button() # confirm_button #Button(self._board, confirm_button_pin)
         self.decline_button = Button() #decline_button #Button(self._board, decline_button_pin)
         self.wheel = RotaryEncoder() #wheel #RotaryEncoder(self._board, wheel_pins)
+        self.notifier = notifier
+        self.edges = edges
+        self._edge_cursor = 0 # Edges before this are handled
+        self.last_press: Optional[ButtonEdge] = None # The latest press taken by next_press
+
+    def wait(self, version: int, keys = None, timeout: float = 0.5) -> int:
+        """
+        Wait for the components to change, see ChangeNotifier.wait
+        Args:
+            version (int): The version already seen
+            keys: The components to wait for, defaults to the buttons
+        Returns:
+            int: The current version
+        """
+        if self.notifier is None: return version
+        if keys is None: keys = self.button_keys
+        return self.notifier.wait(version, keys, timeout)
+
+    @property
+    def version(self) -> int:
+        return 0 if self.notifier is None else self.notifier.version
+
+    @property
+    def button_keys(self):
+        return (master_key("Accept"), master_key("Decline"))
+
+    @property
+    def wheel_keys(self):
+        return (master_key("Rotary"),)
         
+    def next_press(self, buttons: Sequence[Hashable]) -> Optional[Hashable]:
+        """
+        Take the next press of any of the buttons from the edges, other edges before it are skipped.
+        A press is never missed even if it was released before this is called
+        Args:
+            buttons (Sequence[Hashable]): Keys of the buttons, see button_keys
+        Returns:
+            Optional[Hashable]: The key of the pressed button or None if none of them has been pressed
+        """
+        if self.edges is None:
+            for key, button in zip(self.button_keys, (self.confirm_button, self.decline_button)):
+                if key in buttons and button.click(): return key
+            return None
+        while True:
+            self._edge_cursor, edges = self.edges.read(self._edge_cursor, 1, consumer="master")
+            if not edges: return None
+            if edges[0].pressed and edges[0].button in buttons:
+                self.last_press = edges[0]
+                return edges[0].button
+
+    def flush(self) -> None:
+        """
+        Forget the presses made so far, a primitive calls this when it starts so a press meant for
+        the previous one (i.e. a double press or a press while the solver ran) doesn't answer it
+        """
+        if self.edges is not None: self._edge_cursor = self.edges.head
+        self.last_press = None
+
+    def confirmed(self) -> bool:
+        """
+        Has the confirm button been pressed since the last press was taken
+        """
+        return self.next_press((master_key("Accept"),)) is not None
+
+    def answer(self) -> Optional[bool]:
+        """
+        Returns:
+            Optional[bool]: True if the confirm button was pressed next, False if the decline button, None if neither
+        """
+        button = self.next_press(self.button_keys)
+        if button is None: return None
+        return button == master_key("Accept")
+
     def confirm(self):
+        version = self.version
         while True:
-            if self.confirm_button.click(): return True
-            if self.decline_button.click(): return False
+            answer = self.answer()
+            if answer is not None: return answer
+            version = self.wait(version) # Sleep until a button changes
     
     def select(self, min, max):
         return self.wheel.get_value(min, max, integer_values=True)
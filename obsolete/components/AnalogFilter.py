@@ -0,0 +1,172 @@
+import numpy as np
+from typing import Tuple
+
+
+class AnalogFilterBank:
+    """
+    Filters the noise out of many analog channels at once, the state of every channel is kept in arrays.
+    Each new raw value goes through three stages, a stage with its default parameters passes the value through:
+        1. median of the last window values
+        2. exponential moving average (EMA) with the factor alpha
+        3. hysteresis deadband, the output moves to the input only when the input is more than deadband away
+           from it or reaches the rails, so the output can always reach the ends of the range
+    A change is reported only when the filtered value crosses a quantization step, so jitter
+    inside one step never wakes up the consumers.
+
+    Channels are indexed by integers, i.e. the slots of a ComponentStore.
+    Args:
+        capacity (int): Initial count of channels, grows when needed
+        max_window (int): Longest median window
+    """
+
+    def __init__(self, capacity: int = 32, max_window: int = 15):
+        self.max_window = max_window
+        self._enabled = np.zeros(capacity, dtype=bool)
+        self._alpha = np.ones(capacity)
+        self._window = np.ones(capacity, dtype=np.intp)
+        self._deadband = np.zeros(capacity)
+        self._step = np.ones(capacity)
+        self._low = np.full(capacity, -np.inf) # Rails of the deadband, the output always follows the input to them
+        self._high = np.full(capacity, np.inf)
+        self._history = np.full((capacity, max_window), np.nan) # Latest raw values for the median
+        self._position = np.zeros(capacity, dtype=np.intp) # Count of values written to the history
+        self._ema = np.zeros(capacity)
+        self._output = np.zeros(capacity)
+        self._level = np.zeros(capacity, dtype=np.int64) # Quantization step of the latest reported value
+        self._primed = np.zeros(capacity, dtype=bool) # Has the channel got any values
+
+    def configure(
+        self, channel: int, alpha: float = 1.0, window: int = 1, deadband: float = 0.0, step: float = 1.0,
+        low: float = -np.inf, high: float = np.inf,
+    ) -> None:
+        """
+        Enable filtering on a channel, the state of the channel is reset
+        Args:
+            channel (int): The channel
+            alpha (float): EMA factor in (0, 1], smaller is smoother, 1 disables the EMA
+            window (int): Median of this many latest values, 1 disables the median
+            deadband (float): Width of the hysteresis band in raw units, 0 disables it
+            step (float): Quantization step in raw units, a change is reported when the filtered value crosses one
+            low (float): Lowest raw value, i.e. 0 for a 10-bit ADC. Values at it pass the deadband
+            high (float): Highest raw value, i.e. 1023 for a 10-bit ADC. Values at it pass the deadband
+        Raises:
+            Exception: A parameter is out of range
+        """
+        if not 0 < alpha <= 1: raise Exception("alpha must be in (0, 1]")
+        if not 1 <= window <= self.max_window: raise Exception(f"window must be between 1 and {self.max_window}")
+        if deadband < 0: raise Exception("deadband can't be negative")
+        if step <= 0: raise Exception("step must be positive")
+        while channel >= len(self._enabled):
+            self._grow()
+        self._enabled[channel] = True
+        self._alpha[channel] = alpha
+        self._window[channel] = window
+        self._deadband[channel] = deadband
+        self._step[channel] = step
+        self._low[channel] = low
+        self._high[channel] = high
+        self.reset(channel)
+
+    def set_step(self, channels: np.ndarray, steps: np.ndarray) -> None:
+        """
+        Change the quantization step of channels without resetting them, see configure
+        Args:
+            channels (np.ndarray): The channels, configured with configure
+            steps (np.ndarray): New step of each channel in raw units
+        """
+        channels = np.asarray(channels, dtype=np.intp)
+        steps = np.broadcast_to(np.asarray(steps, dtype=float), channels.shape)
+        if np.any(steps <= 0): raise Exception("step must be positive")
+        self._step[channels] = steps
+        self._level[channels] = np.floor(self._output[channels] / steps + 0.5).astype(np.int64)
+
+    def disable(self, channel: int) -> None:
+        """
+        Stop filtering a channel, its values are passed through as they are
+        """
+        if channel < len(self._enabled):
+            self._enabled[channel] = False
+
+    def reset(self, channel: int) -> None:
+        """
+        Forget the earlier values of a channel, the next value is taken as it is
+        """
+        self._history[channel] = np.nan
+        self._position[channel] = 0
+        self._primed[channel] = False
+
+    def _grow(self):
+        capacity = 2 * len(self._enabled)
+        for name in ("_enabled", "_alpha", "_window", "_deadband", "_step", "_low", "_high", "_history", "_position", "_ema", "_output", "_level", "_primed"):
+            old = getattr(self, name)
+            new = np.resize(old, (capacity,) + old.shape[1:])
+            new[len(old):] = {"_alpha": 1, "_window": 1, "_step": 1, "_low": -np.inf, "_high": np.inf, "_history": np.nan}.get(name, 0)
+            setattr(self, name, new)
+
+    def is_filtered(self, channels: np.ndarray) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: Boolean mask of the channels that have filtering enabled
+        """
+        channels = np.asarray(channels)
+        mask = channels < len(self._enabled)
+        mask[mask] = self._enabled[channels[mask]]
+        return mask
+
+    def apply(self, channels: np.ndarray, raw: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Filter new values, each channel can appear only once
+        Args:
+            channels (np.ndarray): The channels, configured with configure
+            raw (np.ndarray): New raw value of each channel
+        Returns:
+            (np.ndarray, np.ndarray): The filtered values and a boolean mask of the values that crossed a quantization step
+        """
+        channels = np.asarray(channels, dtype=np.intp)
+        raw = np.asarray(raw, dtype=float)
+        primed = self._primed[channels]
+
+        # Median over the ring buffer, the unused columns stay nan
+        window = self._window[channels]
+        self._history[channels, self._position[channels] % window] = raw
+        self._position[channels] += 1
+        ordered = np.sort(self._history[channels], axis=1) # nan sorts last
+        count = np.minimum(self._position[channels], window)
+        rows = np.arange(len(channels))
+        value = (ordered[rows, count // 2] + ordered[rows, (count - 1) // 2]) / 2
+
+        ema = self._ema[channels]
+        value = np.where(primed, ema + self._alpha[channels] * (value - ema), value)
+        self._ema[channels] = value
+
+        output = self._output[channels]
+        deadband = self._deadband[channels]
+        moved = (np.abs(value - output) > deadband) | (value <= self._low[channels]) | (value >= self._high[channels])
+        value = np.where(primed & ~moved, output, value)
+        self._output[channels] = value
+
+        level = np.floor(value / self._step[channels] + 0.5).astype(np.int64)
+        crossed = ~primed | (level != self._level[channels])
+        self._level[channels] = level
+        self._primed[channels] = True
+        return value, crossed
+
+
+# Jitter suppression on simulated noisy potentiometers
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    n, samples = 64, 2000
+    bank = AnalogFilterBank(n)
+    for channel in range(n):
+        bank.configure(channel, alpha=0.5, window=3, deadband=2, step=4)
+    position = np.full(n, 512.0)
+    changes = 0
+    start = time.perf_counter()
+    for _ in range(samples):
+        raw = np.round(position + rng.normal(0, 1.5, n)) # The dm is not touching anything, only noise
+        _, crossed = bank.apply(np.arange(n), raw)
+        changes += crossed.sum()
+    elapsed = time.perf_counter() - start
+    print(f"{changes - n} changes from {n * samples} noisy values, {elapsed / samples * 1e6:.1f} us per update of {n} channels")
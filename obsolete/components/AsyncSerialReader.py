@@ -0,0 +1,78 @@
+import os, sys
+p = os.path.abspath('.')
+sys.path.insert(1, p)
+
+import asyncio
+from typing import Callable, Hashable, Optional, Set
+
+from desdeo_interface.components.SerialReader import SerialReader
+
+
+class AsyncSerialReader:
+    """
+    Reads a SerialReader from an asyncio event loop. The port file descriptor is registered
+    with loop.add_reader so the data is handled as soon as it arrives without any threads.
+    On platforms where serial ports don't have file descriptors (windows) the blocking
+    SerialReader.update is run in the default executor instead.
+
+    Args:
+        serial_reader (SerialReader): An open serial reader
+        on_change (Callable[[Set[Hashable]], None]): Called in the event loop with the keys of changed components
+        loop (Optional[asyncio.AbstractEventLoop]): The event loop, defaults to the running loop
+    """
+
+    def __init__(
+        self,
+        serial_reader: SerialReader,
+        on_change: Callable[[Set[Hashable]], None],
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ):
+        self.serial_reader = serial_reader
+        self._on_change = on_change
+        self._loop = loop if loop is not None else asyncio.get_running_loop()
+        self._fd = None
+        self._task = None
+        self._add_reader = True # False if the loop can't watch file descriptors
+
+    def start(self):
+        """
+        Start reading the port
+        """
+        fd = self.serial_reader.fileno()
+        try:
+            if fd is not None and self._add_reader:
+                self._loop.add_reader(fd, self._read)
+                self._fd = fd
+                return
+        except NotImplementedError: # i.e. the proactor event loop
+            self._add_reader = False
+        self._task = self._loop.create_task(self._poll())
+
+    def stop(self):
+        """
+        Stop reading the port. The port is left open
+        """
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            self._fd = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _read(self):
+        changed = self.serial_reader.update()
+        if self.serial_reader.fileno() != self._fd: # The port was lost, poll it while it is reopened
+            self.stop()
+            self.start()
+        if changed:
+            self._on_change(changed)
+
+    async def _poll(self):
+        while True:
+            changed = await self._loop.run_in_executor(None, self.serial_reader.update, 0.1)
+            if changed:
+                self._on_change(changed)
+            if self._add_reader and self.serial_reader.fileno() is not None: # Reopened, read it with the loop again
+                self._task = None
+                self.start()
+                return
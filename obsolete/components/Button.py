@@ -13,6 +13,7 @@ class Action(Enum):
     DOUBLE_CLICK = 2
     HOLD = 3
     NO_ACTION = 4
+    RELEASE = 5
 
 # Maybe if the button just had an Action method which would wait for any action and return it
 # So it would return None | Click | D_click | Hold
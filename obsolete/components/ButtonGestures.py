@@ -0,0 +1,220 @@
+import os, sys
+p = os.path.abspath('.')
+sys.path.insert(1, p)
+
+from desdeo_interface.components.Button import Action
+
+import queue
+import time
+from typing import Dict, Hashable, NamedTuple, Optional
+
+
+class ButtonEvent(NamedTuple):
+    button: Hashable # Key of the button
+    action: Action
+    timestamp: float # time.monotonic() when the gesture was recognized
+
+
+class _ButtonState:
+    __slots__ = ("pressed", "pressed_at", "released_at", "held", "clicks")
+
+    def __init__(self):
+        self.pressed = False
+        self.pressed_at = 0.0
+        self.released_at = 0.0
+        self.held = False # HOLD already emitted for the current press
+        self.clicks = 0 # 1 when a click waits for a possible second press, 2 during the second press
+
+
+class GestureRecognizer:
+    """
+    Recognizes clicks, double clicks and holds of many buttons from the timestamps of their
+    presses and releases without ever blocking. The update thread feeds the edges with feed
+    and calls poll to fire the timers, the events are put to the events queue:
+        CLICK: released and not pressed again within double_click_ms
+        DOUBLE_CLICK: pressed again within double_click_ms of the previous release
+        HOLD: kept pressed for hold_ms, no click is emitted for that press
+        RELEASE: every release
+    Args:
+        hold_ms (float): How long a button has to be pressed for a hold
+        double_click_ms (float): Maximum time between a release and the next press for a double click,
+            0 emits the clicks right on release
+        max_events (int): Most events kept in the queue, the oldest is dropped when nobody takes them
+    """
+
+    def __init__(self, hold_ms: float = 1000, double_click_ms: float = 250, max_events: int = 256):
+        self.hold_s = hold_ms / 1000
+        self.double_click_s = double_click_ms / 1000
+        self.events = queue.Queue(max_events)
+        self.dropped = 0 # Count of events dropped from a full queue
+        self._buttons: Dict[Hashable, _ButtonState] = {}
+
+    def add(self, button: Hashable) -> None:
+        """
+        Start recognizing the gestures of a button
+        Args:
+            button (Hashable): Key of the button, i.e. a component key
+        """
+        self._buttons.setdefault(button, _ButtonState())
+
+    def __contains__(self, button: Hashable) -> bool:
+        return button in self._buttons
+
+    def feed(self, button: Hashable, pressed: bool, timestamp: Optional[float] = None) -> None:
+        """
+        Give a new state of a button, repeated states are ignored
+        Args:
+            button (Hashable): Key of the button
+            pressed (bool): Is the button down
+            timestamp (Optional[float]): When the state changed, defaults to now
+        """
+        state = self._buttons[button]
+        if pressed == state.pressed: return
+        now = time.monotonic() if timestamp is None else timestamp
+        self.poll(now) # Fire the timers that expired before this edge
+        state.pressed = pressed
+        if pressed:
+            state.pressed_at = now
+            state.held = False
+            if state.clicks == 1: # Second press in time
+                state.clicks = 2
+                self._emit(button, Action.DOUBLE_CLICK, now)
+            return
+        self._emit(button, Action.RELEASE, now)
+        state.released_at = now
+        if state.held or state.clicks == 2:
+            state.clicks = 0
+        elif self.double_click_s <= 0:
+            self._emit(button, Action.CLICK, now)
+        else:
+            state.clicks = 1
+
+    def poll(self, timestamp: Optional[float] = None) -> None:
+        """
+        Emit the holds and clicks whose time has come
+        Args:
+            timestamp (Optional[float]): The current time, defaults to now
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        for button, state in self._buttons.items():
+            if state.pressed:
+                if not state.held and state.clicks != 2 and now - state.pressed_at >= self.hold_s:
+                    state.held = True
+                    state.clicks = 0
+                    self._emit(button, Action.HOLD, state.pressed_at + self.hold_s)
+            elif state.clicks == 1 and now - state.released_at >= self.double_click_s:
+                state.clicks = 0
+                self._emit(button, Action.CLICK, state.released_at + self.double_click_s)
+
+    def next_deadline(self) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: The earliest time poll may emit something or None if nothing is pending
+        """
+        deadlines = []
+        for state in self._buttons.values():
+            if state.pressed and not state.held and state.clicks != 2:
+                deadlines.append(state.pressed_at + self.hold_s)
+            elif not state.pressed and state.clicks == 1:
+                deadlines.append(state.released_at + self.double_click_s)
+        return min(deadlines, default=None)
+
+    def timeout(self, limit: float) -> float:
+        """
+        How long the update thread can block without delaying a gesture
+        Args:
+            limit (float): The longest allowed timeout
+        Returns:
+            float: Seconds until the next deadline, at most limit
+        """
+        deadline = self.next_deadline()
+        if deadline is None: return limit
+        return min(limit, max(0.0, deadline - time.monotonic()))
+
+    def get(self, timeout: Optional[float] = None) -> Optional[ButtonEvent]:
+        """
+        Take the next event from the queue
+        Args:
+            timeout (Optional[float]): How long to wait for an event, 0 to not wait, None to wait forever
+        Returns:
+            Optional[ButtonEvent]: The event or None if there was no event in time
+        """
+        try:
+            return self.events.get(timeout != 0, timeout or None)
+        except queue.Empty:
+            return None
+
+    def _emit(self, button: Hashable, action: Action, timestamp: float):
+        event = ButtonEvent(button, action, timestamp)
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full: # Nobody takes the events, drop the oldest
+                try:
+                    self.events.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+# Replays synthetic edge timings and measures how long after the release a gesture is emitted
+if __name__ == "__main__":
+    import threading
+
+    def replay(edges, end, **kwargs):
+        # edges: (time in ms, button, pressed)
+        recognizer = GestureRecognizer(**kwargs)
+        for _, button, _ in edges:
+            recognizer.add(button)
+        for t, button, pressed in edges:
+            recognizer.feed(button, pressed, t / 1000)
+        recognizer.poll(end / 1000)
+        events = []
+        while not recognizer.events.empty():
+            event = recognizer.events.get()
+            events.append((round(event.timestamp * 1000), event.button, event.action.name))
+        return events
+
+    assert replay([(0, "a", True), (80, "a", False)], 1000) == [(80, "a", "RELEASE"), (330, "a", "CLICK")]
+    assert replay([(0, "a", True), (80, "a", False), (200, "a", True), (260, "a", False)], 1000) == [
+        (80, "a", "RELEASE"), (200, "a", "DOUBLE_CLICK"), (260, "a", "RELEASE")]
+    assert replay([(0, "a", True), (80, "a", False), (400, "a", True), (460, "a", False)], 1000) == [
+        (80, "a", "RELEASE"), (330, "a", "CLICK"), (460, "a", "RELEASE"), (710, "a", "CLICK")]
+    assert replay([(0, "a", True), (1500, "a", False)], 2000) == [(1000, "a", "HOLD"), (1500, "a", "RELEASE")]
+    assert replay([(0, "a", True), (50, "b", True), (100, "a", False), (1200, "b", False)], 2000) == [
+        (100, "a", "RELEASE"), (350, "a", "CLICK"), (1050, "b", "HOLD"), (1200, "b", "RELEASE")]
+    assert replay([(0, "a", True), (0, "a", True), (80, "a", False)], 1000, double_click_ms=0) == [
+        (80, "a", "RELEASE"), (80, "a", "CLICK")]
+    assert replay([(t, "a", t % 200 == 0) for t in range(0, 1000, 100)], 2000, double_click_ms=0, max_events=4) == [
+        (700, "a", "RELEASE"), (700, "a", "CLICK"), (900, "a", "RELEASE"), (900, "a", "CLICK")]
+    print("Synthetic replays match")
+
+    # Latency from a release to the click event, with a thread polling like the update thread
+    # which wakes up when data arrives or the next deadline passes
+    recognizer = GestureRecognizer()
+    recognizer.add("a")
+    lock = threading.Lock()
+    arrived = threading.Event()
+    running = True
+    def updater():
+        while running:
+            arrived.wait(recognizer.timeout(0.5))
+            arrived.clear()
+            with lock: recognizer.poll()
+    threading.Thread(target=updater, daemon=True).start()
+    latencies = []
+    for _ in range(20):
+        with lock:
+            recognizer.feed("a", True)
+            released = time.monotonic()
+            recognizer.feed("a", False, released)
+        arrived.set()
+        while True:
+            event = recognizer.get()
+            if event.action == Action.CLICK: break
+        latencies.append((time.monotonic() - released) * 1000)
+    running = False
+    latencies.sort()
+    print(f"Click emitted {latencies[len(latencies) // 2]:.1f} ms after release (median, {recognizer.double_click_s * 1000:.0f} ms double click window), "
+          f"worst {latencies[-1]:.1f} ms")
@@ -0,0 +1,200 @@
+"""
+8-bit cyclic redundancy check (CRC-8) for validating the data from serial.
+Gives the same checksums as ArduinoFiles/CRC8 with the same key.
+
+The lookup table for the default key is computed once when the module is imported.
+Single frames are checked with the table, many frames at once with crc8_batch which
+runs the table lookups over a padded 2-D uint8 array, one column at a time.
+"""
+
+import os, sys
+p = os.path.abspath('.')
+sys.path.insert(1, p)
+
+import numpy as np
+from typing import Sequence, Union
+
+CRC_KEY = 7  # This key has to be same on both sides
+
+
+def create_lookup_table(key: int = CRC_KEY) -> np.ndarray:
+    """
+    Calculates the checksum of every single byte
+
+    Args:
+        key (int): The crc key (divisor)
+
+    Returns:
+        np.ndarray: 256 checksums as uint8
+    """
+    table = np.arange(256, dtype=np.uint8)
+    key = np.uint8(key)
+    for _ in range(8):
+        high_bit = (table & 0x80) != 0
+        table = table << 1  # Stays uint8, overflowing bits are dropped
+        table[high_bit] ^= key
+    return table
+
+
+LOOKUP_TABLE = create_lookup_table(CRC_KEY)
+_tables = {CRC_KEY: (LOOKUP_TABLE, LOOKUP_TABLE.tobytes())}
+
+
+def get_lookup_table(key: int = CRC_KEY) -> np.ndarray:
+    """
+    Get the lookup table for a key, tables are only calculated once per key
+
+    Args:
+        key (int): The crc key
+
+    Returns:
+        np.ndarray: The lookup table as uint8
+    """
+    if key not in _tables:
+        table = create_lookup_table(key)
+        _tables[key] = (table, table.tobytes())
+    return _tables[key][0]
+
+
+def crc8(data: bytes, key: int = CRC_KEY) -> int:
+    """
+    Calculates the crc8 checksum of one frame
+
+    Args:
+        data (bytes): The data of which the checksum is calculated
+        key (int): The crc key
+
+    Returns:
+        int: The crc8 checksum
+    """
+    if key not in _tables:
+        get_lookup_table(key)
+    table = _tables[key][1]  # Indexing bytes is faster than indexing an array
+    crc = 0
+    for byte in data:
+        crc = table[crc ^ byte]
+    return crc
+
+
+def crc_check(data: bytes, crc: int, key: int = CRC_KEY) -> bool:
+    """
+    Validate data against its checksum
+
+    Args:
+        data (bytes): The data
+        crc (int): The received checksum
+
+    Returns:
+        bool: Does the checksum match
+    """
+    return crc8(data, key) == crc
+
+
+def pad_frames(frames: Sequence[bytes]) -> np.ndarray:
+    """
+    Pack frames into a 2-D uint8 array, one frame per row aligned to the right.
+    The checksum starts from zero so the leading zeros don't change it.
+
+    Args:
+        frames (Sequence[bytes]): The frames
+
+    Returns:
+        np.ndarray: Array of shape (len(frames), longest frame)
+    """
+    n = len(frames)
+    lengths = np.fromiter(map(len, frames), dtype=np.intp, count=n)
+    width = int(lengths.max()) if n > 0 else 0
+    padded = np.zeros((n, width), dtype=np.uint8)
+    flat = np.frombuffer(b"".join(frames), dtype=np.uint8)
+    if flat.size == 0:
+        return padded
+    rows = np.repeat(np.arange(n), lengths)
+    starts = np.repeat(width - lengths - (np.cumsum(lengths) - lengths), lengths)
+    padded[rows, starts + np.arange(flat.size)] = flat
+    return padded
+
+
+def crc8_batch(frames: Union[Sequence[bytes], np.ndarray], key: int = CRC_KEY) -> np.ndarray:
+    """
+    Calculates the crc8 checksums of many frames at once
+
+    Args:
+        frames (Union[Sequence[bytes], np.ndarray]): The frames or an array from pad_frames
+        key (int): The crc key
+
+    Returns:
+        np.ndarray: The checksum of each frame as uint8
+    """
+    table = get_lookup_table(key)
+    padded = frames if isinstance(frames, np.ndarray) else pad_frames(frames)
+    crc = np.zeros(len(padded), dtype=np.uint8)
+    for column in padded.T:
+        crc = table[crc ^ column]
+    return crc
+
+
+def crc_check_batch(
+    frames: Union[Sequence[bytes], np.ndarray], crcs: Sequence[int], key: int = CRC_KEY
+) -> np.ndarray:
+    """
+    Validate many frames against their checksums at once
+
+    Args:
+        frames (Union[Sequence[bytes], np.ndarray]): The frames or an array from pad_frames
+        crcs (Sequence[int]): The received checksums
+
+    Returns:
+        np.ndarray: Boolean mask of the valid frames
+    """
+    return crc8_batch(frames, key) == np.asarray(crcs, dtype=np.uint8)
+
+
+# Microbenchmarks and a check against the arduino implementation
+if __name__ == "__main__":
+    import time
+
+    def crc8_arduino(data: bytes, key: int = CRC_KEY) -> int:
+        # CRC8::getCRC8 line by line
+        crc = 0
+        for byte in data:
+            crc ^= byte
+            for _ in range(8):
+                crc = ((crc << 1) ^ key) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        return crc
+
+    def crc_check_old(table, data: str, crc: int) -> bool:
+        # The previous SerialReader.crc_check
+        remainder = 0
+        for d in [ord(s) for s in data] + [crc]:
+            remainder = table[d ^ remainder]
+        return remainder == 0
+
+    assert crc8(b"123456789") == 0xF4  # Check value of CRC-8, see crccalc.com
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, rng.integers(1, 40), dtype=np.uint8).tobytes() for _ in range(10000)]
+    expected = [crc8_arduino(f) for f in frames]
+    assert [crc8(f) for f in frames] == expected
+    assert list(crc8_batch(frames)) == expected
+    for key in (0x1D, 0x31, 0x9B):
+        assert [crc8(f, key) for f in frames[:100]] == [crc8_arduino(f, key) for f in frames[:100]]
+    print("Checksums match ArduinoFiles/CRC8")
+
+    def bench(name, f, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            f()
+        print(f"{name:>32}: {(time.perf_counter() - start) / repeat * 1e6:10.1f} us")
+
+    frame = "V 254:R:0:12.50000"
+    crc = crc8(frame.encode("ascii"))
+    old_table = list(LOOKUP_TABLE)  # numpy scalars like the old table
+    bench("single frame, old crc_check", lambda: crc_check_old(old_table, frame, crc), 20000)
+    bench("single frame, crc_check", lambda: crc_check(frame.encode("ascii"), crc), 20000)
+
+    text_frames = [f"V {i % 8}:P:0:{i % 1024}.00000".encode("ascii") for i in range(10000)]
+    crcs = [crc8(f) for f in text_frames]
+    padded = pad_frames(text_frames)
+    bench("10k frames, old crc_check", lambda: [crc_check_old(old_table, f.decode(), c) for f, c in zip(text_frames, crcs)], 3)
+    bench("10k frames, crc_check", lambda: [crc_check(f, c) for f, c in zip(text_frames, crcs)], 3)
+    bench("10k frames, crc_check_batch", lambda: crc_check_batch(text_frames, crcs), 20)
+    bench("10k frames, padded batch", lambda: crc_check_batch(padded, crcs), 20)
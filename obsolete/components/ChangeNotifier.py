@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from typing import Hashable, Iterable, Optional
+
+
+class ChangeNotifier:
+    """
+    Lets the update thread tell waiting consumers that component values have changed.
+    Each published change increments a version number and every component key remembers the
+    version it last changed in, so a consumer only wakes up when a component it cares about changes.
+
+    Example:
+        version = notifier.version
+        while not done():
+            ...
+            version = notifier.wait(version, keys, timeout=1)
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._version = 0
+        self._key_versions = {}
+
+    @property
+    def version(self) -> int:
+        """
+        The version of the latest change
+        """
+        return self._version
+
+    def publish(self, keys: Iterable[Hashable]) -> None:
+        """
+        Publish changed components and wake up the consumers
+
+        Args:
+            keys (Iterable[Hashable]): Keys of the changed components
+        """
+        with self._condition:
+            self._version += 1
+            for key in keys:
+                self._key_versions[key] = self._version
+            self._condition.notify_all()
+
+    def changed_since(self, version: int, keys: Optional[Iterable[Hashable]] = None) -> bool:
+        """
+        Has any of the components changed after the given version
+
+        Args:
+            version (int): A version from version or wait
+            keys (Optional[Iterable[Hashable]]): Keys of the components, None for any component
+
+        Returns:
+            bool: Whether or not there are changes
+        """
+        if keys is None:
+            return self._version > version
+        return any(self._key_versions.get(key, 0) > version for key in keys)
+
+    def wait(self, version: int, keys: Optional[Iterable[Hashable]] = None, timeout: Optional[float] = None) -> int:
+        """
+        Block until any of the components changes after the given version or until timeout
+
+        Args:
+            version (int): The version the caller has already seen
+            keys (Optional[Iterable[Hashable]]): Keys of the components, None for any component
+            timeout (Optional[float]): Maximum time to wait in seconds, None for no limit
+
+        Returns:
+            int: The current version, give this to the next call
+        """
+        if keys is not None:
+            keys = tuple(keys)
+        with self._condition:
+            self._condition.wait_for(lambda: self.changed_since(version, keys), timeout)
+            return self._version
+
+
+class AsyncChangeNotifier(ChangeNotifier):
+    """
+    ChangeNotifier for asyncio. publish has to be called from the event loop,
+    consumers wait for changes with await instead of blocking a thread.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._waiters = []
+
+    def publish(self, keys: Iterable[Hashable]) -> None:
+        self._version += 1
+        for key in keys:
+            self._key_versions[key] = self._version
+        # Wake every waiter, each checks if the change concerns it
+        for future in self._waiters:
+            if not future.done():
+                future.set_result(None)
+
+    async def wait(self, version: int, keys: Optional[Iterable[Hashable]] = None, timeout: Optional[float] = None) -> int:
+        """
+        Wait until any of the components changes after the given version or until timeout.
+        Cancelling the waiting task is safe.
+
+        Args:
+            version (int): The version the caller has already seen
+            keys (Optional[Iterable[Hashable]]): Keys of the components, None for any component
+            timeout (Optional[float]): Maximum time to wait in seconds, None for no limit
+
+        Returns:
+            int: The current version, give this to the next call
+        """
+        if keys is not None:
+            keys = tuple(keys)
+        try:
+            await asyncio.wait_for(self._wait(version, keys), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._version
+
+    async def _wait(self, version: int, keys: Optional[tuple]) -> None:
+        loop = asyncio.get_running_loop()
+        while not self.changed_since(version, keys):
+            future = loop.create_future()
+            self._waiters.append(future)
+            try:
+                await future
+            finally:
+                self._waiters.remove(future)
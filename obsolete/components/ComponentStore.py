@@ -0,0 +1,87 @@
+import numpy as np
+import time
+from typing import Hashable, List, Optional, Tuple
+
+
+class ComponentStore:
+    """
+    Keeps the values of the components in preallocated arrays. Each component key,
+    (node_id, component_type, component_id) or ('master', role), is routed to a slot once
+    when the component is added, after that an update is a single write to the arrays.
+    Args:
+        capacity (int): Initial count of slots, the arrays grow if more components are added
+    """
+
+    def __init__(self, capacity: int = 32):
+        self._values = np.zeros(capacity)
+        self._timestamps = np.zeros(capacity) # time.monotonic() of the latest change
+        self._change_counts = np.zeros(capacity, dtype=np.int64)
+        self._routes = {} # component key: slot
+        self.keys: List[Hashable] = [] # component key of each slot
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: Hashable) -> int:
+        """
+        Route a component to a slot
+
+        Args:
+            key (Hashable): The component key
+
+        Returns:
+            int: The slot of the component
+        """
+        if key in self._routes:
+            return self._routes[key]
+        slot = len(self.keys)
+        if slot == len(self._values):
+            self._grow()
+        self._routes[key] = slot
+        self.keys.append(key)
+        return slot
+
+    def _grow(self):
+        capacity = 2 * len(self._values)
+        for name in ("_values", "_timestamps", "_change_counts"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def slot(self, key: Hashable) -> Optional[int]:
+        """
+        Returns:
+            Optional[int]: The slot of a component or None if it hasn't been added
+        """
+        return self._routes.get(key)
+
+    def write(self, slot: int, value: float, timestamp: float = None) -> None:
+        """
+        Save a new value to a slot
+
+        Args:
+            slot (int): The slot from add or slot
+            value (float): The new value
+            timestamp (float): When the value changed, defaults to now
+        """
+        self._values[slot] = value
+        self._timestamps[slot] = time.monotonic() if timestamp is None else timestamp
+        self._change_counts[slot] += 1
+
+    def value(self, key: Hashable) -> float:
+        return self._values[self._routes[key]]
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Read only views to the arrays, no data is copied. The views are only valid until
+        new components are added and show the values as they are updated.
+
+        Returns:
+            (np.ndarray, np.ndarray, np.ndarray): values, timestamps and change counts indexed by slot
+        """
+        n = len(self.keys)
+        views = (self._values[:n], self._timestamps[:n], self._change_counts[:n])
+        for view in views:
+            view.flags.writeable = False
+        return views
@@ -0,0 +1,90 @@
+import time
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+
+class ButtonEdge(NamedTuple):
+    button: Hashable # Key of the button
+    pressed: bool # True for a press, False for a release
+    timestamp: float # time.monotonic() when the edge was decoded
+
+
+class EdgeQueue:
+    """
+    Every press and release of the buttons in the order they were decoded. One thread puts the
+    edges to a ring buffer without locking, any number of consumers read them with their own cursor
+    so each consumer sees every edge however slowly it reads:
+
+        cursor = queue.head # Or 0 for all the kept edges
+        cursor, edges = queue.read(cursor, consumer="master")
+
+    Only a consumer that falls more than capacity edges behind loses the oldest ones, they are counted
+    in overruns by the consumer so an edge missed by two consumers is not counted as two lost edges.
+    Args:
+        capacity (int): How many of the latest edges are kept
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self._ring: List[Optional[ButtonEdge]] = [None] * capacity
+        self.head = 0 # Count of the edges put, the cursor after the latest edge
+        self.overruns: Dict[Hashable, int] = {} # Count of edges each consumer lost by falling behind
+
+    def __len__(self) -> int:
+        return min(self.head, self.capacity)
+
+    def put(self, button: Hashable, pressed: bool, timestamp: Optional[float] = None) -> None:
+        """
+        Add an edge, only one thread may put
+        Args:
+            button (Hashable): Key of the button
+            pressed (bool): Was the button pressed or released
+            timestamp (Optional[float]): When the edge was decoded, defaults to now
+        """
+        head = self.head
+        self._ring[head % self.capacity] = ButtonEdge(button, pressed, time.monotonic() if timestamp is None else timestamp)
+        self.head = head + 1 # Published only after the slot is written
+
+    def read(self, cursor: int, count: Optional[int] = None, consumer: Hashable = None) -> Tuple[int, List[ButtonEdge]]:
+        """
+        The edges after a cursor, oldest first
+        Args:
+            cursor (int): The cursor from the previous read
+            count (Optional[int]): Read at most this many edges, None for all
+            consumer (Hashable): Key of the reader the lost edges are counted for in overruns
+        Returns:
+            (int, List[ButtonEdge]): The cursor after the returned edges and the edges
+        """
+        head = self.head
+        start = max(cursor, head - self.capacity)
+        end = head if count is None else min(head, start + count)
+        edges = [self._ring[i % self.capacity] for i in range(start, end)]
+        first = max(start, self.head - self.capacity) # The writer may have lapped the slots during the copy
+        edges = edges[first - start:]
+        if first > cursor: self.overruns[consumer] = self.overruns.get(consumer, 0) + min(first, end) - cursor
+        return end, edges
+
+
+# A slow consumer still gets every press of a fast writer
+if __name__ == "__main__":
+    import threading
+
+    queue = EdgeQueue()
+    edges = 200_000
+    done = threading.Event()
+    def writer():
+        for i in range(edges):
+            queue.put("Accept", i % 2 == 0)
+            if i % 100 == 0: time.sleep(0) # Let the consumer run
+        done.set()
+    thread = threading.Thread(target=writer)
+    start = time.perf_counter()
+    thread.start()
+    cursor, presses, releases = 0, 0, 0
+    while not done.is_set() or cursor < queue.head:
+        cursor, read = queue.read(cursor, consumer="slow")
+        presses += sum(edge.pressed for edge in read)
+        releases += sum(not edge.pressed for edge in read)
+        time.sleep(0.0001) # A slow consumer
+    thread.join()
+    elapsed = time.perf_counter() - start
+    print(f"{edges} edges in {elapsed:.2f} s, consumer got {presses} presses and {releases} releases, overruns {queue.overruns.get('slow', 0)}")
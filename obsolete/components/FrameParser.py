@@ -0,0 +1,195 @@
+import time
+from typing import List, Optional, Tuple
+
+from desdeo_interface.components.CRC8 import CRC_KEY, crc8, crc_check_batch
+
+
+class FrameParser:
+    """
+    A streaming parser for the newline terminated frames the master writes to serial.
+    Incoming bytes are kept in a single bytearray and every complete frame is returned
+    in the order it arrived, so no frame is lost if several of them arrive in one read.
+
+    Each frame is of form "payload crc" or "{payload}crc" where crc is the CRC8 checksum
+    of the payload as a decimal number. Frames with an invalid checksum are dropped.
+    Lines that only contain a packet id are passed as is.
+    If many frames are buffered their checksums are validated at once with CRC8.crc_check_batch.
+
+    Args:
+        crc_key (int): Key for the crc8 checksums, has to be the same as on the arduino side
+        delimiter (bytes): The byte that ends a frame, defaults to newline
+        max_buffer (int): If more bytes are buffered the complete frames are parsed and the bytes before
+            the next delimiter are discarded
+        batch_size (int): Validate the checksums as a batch if at least this many frames are buffered
+    """
+
+    def __init__(
+        self,
+        crc_key: int = CRC_KEY,
+        delimiter: bytes = b"\n",
+        max_buffer: int = 4096,
+        batch_size: int = 16,
+    ):
+        self._buffer = bytearray()
+        self._crc_key = crc_key
+        self._batch_size = batch_size
+        self._delimiter = delimiter
+        self._max_buffer = max_buffer
+        self._parsed = []  # Frames parsed when the buffer overflowed, returned by the next frames()
+
+        self.decoded = 0  # Total count of valid frames
+        self.dropped = 0  # Total count of dropped frames
+
+        # Counters for the per second rates
+        self._window_start = time.monotonic()
+        self._window_decoded = 0
+        self._window_dropped = 0
+        self._decoded_per_second = 0.0
+        self._dropped_per_second = 0.0
+
+    def feed(self, data: bytes) -> None:
+        """
+        Add bytes read from serial to the buffer
+
+        Args:
+            data (bytes): Raw bytes from serial
+        """
+        if not data:
+            return
+        self._buffer += data
+        if len(self._buffer) <= self._max_buffer:
+            return
+        self._parsed += self._parse()  # Keep the complete frames
+        if len(self._buffer) > self._max_buffer:  # Only noise or an overlong frame, skip to the next delimiter
+            cut = self._buffer.find(self._delimiter, 1)
+            del self._buffer[:cut if cut > 0 else len(self._buffer)]
+            self.mark_dropped()
+
+    def frames(self) -> List[bytes]:
+        """
+        Get every complete and valid frame from the buffer
+
+        Returns:
+            List[bytes]: Payloads of the frames in the order they were received, without checksums
+        """
+        found = self._parsed + self._parse()
+        self._parsed = []
+        return found
+
+    def _parse(self) -> List[bytes]:
+        buf = self._buffer
+        candidates = []
+        start = 0
+        with memoryview(buf) as view:
+            while True:
+                end = buf.find(self._delimiter, start)
+                if end < 0:
+                    break
+                candidate = self._split(view[start:end])
+                start = end + 1
+                if candidate is not None:
+                    candidates.append(candidate)
+        # Remove the consumed bytes once instead of once per frame
+        if start > 0:
+            del buf[:start]
+        found = self._validate(candidates)
+        self._update_rates()
+        return found
+
+    def _split(self, frame: memoryview) -> Optional[Tuple[bytes, Optional[int]]]:
+        """
+        Split a frame to payload and checksum
+
+        Args:
+            frame (memoryview): A frame without the delimiter
+
+        Returns:
+            Optional[(bytes, Optional[int])]: The payload and the checksum or None if the frame is invalid.
+            The checksum is None for lines with only a packet id
+        """
+        end = len(frame)
+        while end > 0 and frame[end - 1] in b"\r ":
+            end -= 1
+        if end == 0:  # Empty line, not counted as a frame
+            return None
+        if end == 1:  # Lines with only a packet id, i.e. 'O', don't have a checksum
+            return bytes(frame[:1]), None
+
+        # The checksum is the trailing decimal number
+        crc_start = end
+        while crc_start > 0 and 48 <= frame[crc_start - 1] <= 57:
+            crc_start -= 1
+        crc = int(bytes(frame[crc_start:end])) if crc_start < end else 256
+        if crc_start == 0 or crc > 255:
+            self.mark_dropped()
+            return None
+
+        payload_end = crc_start - 1 if frame[crc_start - 1] == 32 else crc_start  # " crc" or "}crc"
+        return bytes(frame[:payload_end]), crc
+
+    def _validate(self, candidates: List[Tuple[bytes, Optional[int]]]) -> List[bytes]:
+        """
+        Validate the checksums of split frames
+
+        Args:
+            candidates (List[(bytes, Optional[int])]): Payloads and their checksums
+
+        Returns:
+            List[bytes]: The payloads with a valid checksum
+        """
+        if len(candidates) >= self._batch_size:
+            payloads = [payload for payload, _ in candidates]
+            crcs = [0 if crc is None else crc for _, crc in candidates]
+            valid = crc_check_batch(payloads, crcs, self._crc_key)
+        else:
+            valid = [crc is None or crc8(payload, self._crc_key) == crc for payload, crc in candidates]
+
+        found = []
+        for (payload, crc), ok in zip(candidates, valid):
+            if ok or crc is None:
+                found.append(payload)
+            else:
+                self.mark_dropped()
+        self.decoded += len(found)
+        self._window_decoded += len(found)
+        return found
+
+    def mark_dropped(self) -> None:
+        """
+        Count a frame as dropped
+        """
+        self.dropped += 1
+        self._window_dropped += 1
+
+    def reject(self) -> None:
+        """
+        A frame returned by frames() couldn't be parsed by the caller, count it as dropped instead
+        """
+        self.decoded -= 1
+        self._window_decoded -= 1
+        self.mark_dropped()
+
+    def _update_rates(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < 1:
+            return
+        self._decoded_per_second = self._window_decoded / elapsed
+        self._dropped_per_second = self._window_dropped / elapsed
+        self._window_decoded = 0
+        self._window_dropped = 0
+        self._window_start = now
+
+    def stats(self) -> dict:
+        """
+        Counts of decoded and dropped frames
+
+        Returns:
+            dict: Totals and the rates per second measured over the latest full second
+        """
+        return {
+            "decoded": self.decoded,
+            "dropped": self.dropped,
+            "decoded_per_second": self._decoded_per_second,
+            "dropped_per_second": self._dropped_per_second,
+        }
@@ -0,0 +1,134 @@
+import threading
+import numpy as np
+from typing import Dict, Hashable, List, Tuple
+
+
+class LastValueCache:
+    """
+    Keeps the newest value of each component between the reader and its consumers. Every write
+    gets the next sequence number, so a consumer remembers the sequence number it has seen and
+    asks only for the components written after it:
+
+        seq = 0
+        while True:
+            seq, changes = cache.changes_since(seq)
+
+    A fast consumer gets every change, a slow one gets the latest values. A write over a value
+    no consumer has read yet is counted as coalesced.
+    Args:
+        capacity (int): Initial count of components, the arrays grow if more are written
+    """
+
+    def __init__(self, capacity: int = 32):
+        self._values = np.zeros(capacity)
+        self._seqs = np.zeros(capacity, dtype=np.int64) # Sequence number of the latest write
+        self._timestamps = np.zeros(capacity) # When the latest value arrived
+        self._routes = {} # component key: index
+        self.keys: List[Hashable] = [] # component key of each index
+        self.seq = 0 # Sequence number of the latest write
+        self.updates = 0 # Count of writes
+        self.coalesced = 0 # Count of writes that replaced an unread value
+        self._read_seq = 0 # Latest sequence number given to a consumer
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._routes
+
+    def set(self, key: Hashable, value: float, timestamp: float = 0.0) -> int:
+        """
+        Save the newest value of a component
+        Args:
+            key (Hashable): The component key
+            value (float): The value
+            timestamp (float): time.monotonic() when the value arrived, see timestamp
+        Returns:
+            int: The sequence number of the write
+        """
+        with self._lock:
+            i = self._routes.get(key)
+            if i is None:
+                i = len(self.keys)
+                if i == len(self._values): self._grow()
+                self._routes[key] = i
+                self.keys.append(key)
+            elif self._seqs[i] > self._read_seq:
+                self.coalesced += 1
+            self.seq += 1
+            self.updates += 1
+            self._values[i] = value
+            self._seqs[i] = self.seq
+            self._timestamps[i] = timestamp
+            return self.seq
+
+    def _grow(self):
+        capacity = 2 * len(self._values)
+        for name in ("_values", "_seqs", "_timestamps"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def value(self, key: Hashable) -> float:
+        return float(self._values[self._routes[key]])
+
+    def timestamp(self, key: Hashable) -> float:
+        """
+        When the newest value of a component arrived, the timestamp given to set
+        """
+        return float(self._timestamps[self._routes[key]])
+
+    def items(self) -> List[Tuple[Hashable, float]]:
+        """
+        (key, value) of every component, doesn't count as reading the changes
+        """
+        with self._lock:
+            return list(zip(self.keys, self._values[:len(self.keys)].tolist()))
+
+    def changes_since(self, seq: int) -> Tuple[int, Dict[Hashable, float]]:
+        """
+        The components written after a sequence number
+        Args:
+            seq (int): The sequence number already seen, 0 for everything
+        Returns:
+            (int, Dict[Hashable, float]): The current sequence number, give it to the next call, and
+                the newest values of the changed components
+        """
+        with self._lock:
+            n = len(self.keys)
+            changed = np.flatnonzero(self._seqs[:n] > seq)
+            changes = dict(zip([self.keys[i] for i in changed], self._values[changed].tolist()))
+            self._read_seq = max(self._read_seq, self.seq)
+            return self.seq, changes
+
+    def stats(self) -> dict:
+        """
+        Counts of the writes and the coalesced writes
+        """
+        return {"updates": self.updates, "coalesced": self.coalesced}
+
+
+# A fast and a slow consumer of the same cache
+if __name__ == "__main__":
+    import time
+
+    cache = LastValueCache()
+    rng = np.random.default_rng(0)
+    keys = [(node, "P", 0) for node in range(1, 65)]
+    writes = 100_000
+    fast_seq = slow_seq = 0
+    fast_changes = slow_changes = 0
+    start = time.perf_counter()
+    for i in range(writes):
+        cache.set(keys[rng.integers(len(keys))], i)
+        if i % 10 == 0:
+            fast_seq, changes = cache.changes_since(fast_seq)
+            fast_changes += len(changes)
+        if i % 1000 == 0:
+            slow_seq, changes = cache.changes_since(slow_seq)
+            slow_changes += len(changes)
+    elapsed = time.perf_counter() - start
+    print(f"{writes} writes to {len(keys)} components: {elapsed / writes * 1e6:.2f} µs per write and read, "
+          f"fast consumer got {fast_changes} changes, slow consumer {slow_changes}, {cache.stats()}")
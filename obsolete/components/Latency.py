@@ -0,0 +1,212 @@
+"""
+Latency instrumentation from the serial bytes to the decisions of the DM.
+
+Each stage is measured from the moment the bytes of a frame were read from the port:
+    decode: the frame has been decoded and saved in SerialReader.update
+    apply: Interface.apply_changes has written the value to the components
+    primitive: a primitive like choose_from or get_values returned after the press that finished it
+
+The latencies are kept in HDR style histograms: 128 linear buckets in every power of two of
+microseconds, so any value is kept within 1 % and a histogram is a fixed size array however many
+values are recorded. Everything is disabled by default and the instrumented code only checks
+LATENCY.enabled, enable it with
+
+    LATENCY.enable()
+    LATENCY.dump_every(10) # Print a summary every 10 seconds
+    ...
+    LATENCY.summary()
+"""
+
+import sys
+import threading
+import time
+import numpy as np
+from typing import Dict, Optional, TextIO
+
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+class LatencyHistogram:
+    """
+    A histogram of latencies with a constant relative precision
+    Args:
+        highest_s (float): Longer latencies are recorded as this
+    """
+
+    def __init__(self, highest_s: float = 60.0):
+        self.highest_us = int(highest_s * 1e6)
+        self.counts = np.zeros(self._index(self.highest_us) + 1, dtype=np.int64)
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    @staticmethod
+    def _index(us: int) -> int:
+        if us < SUB_BUCKETS: return us
+        shift = us.bit_length() - SUB_BUCKET_BITS - 1 # us >> shift is in [SUB_BUCKETS, 2 * SUB_BUCKETS)
+        return SUB_BUCKETS * (shift + 1) + (us >> shift) - SUB_BUCKETS
+
+    @staticmethod
+    def _value(index: int) -> float:
+        # Middle of the bucket in microseconds
+        if index < SUB_BUCKETS: return float(index)
+        shift = index // SUB_BUCKETS - 1
+        return ((index % SUB_BUCKETS + SUB_BUCKETS) << shift) + ((1 << shift) - 1) / 2
+
+    def record(self, seconds: float) -> None:
+        """
+        Add a latency
+        Args:
+            seconds (float): The latency, negative values are recorded as 0
+        """
+        us = min(max(int(seconds * 1e6), 0), self.highest_us)
+        self.counts[self._index(us)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us: self.max_us = us
+
+    def percentile(self, p: float) -> float:
+        """
+        Args:
+            p (float): The percentile, from 0 to 100
+        Returns:
+            float: The latency in seconds below which p % of the recorded latencies are, 0 if nothing is recorded
+        """
+        if self.count == 0: return 0.0
+        rank = max(1, int(np.ceil(p / 100 * self.count)))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self._value(index), self.max_us) / 1e6
+
+    def summary(self) -> dict:
+        """
+        Count, mean, p50, p90, p99, p99.9 and max of the latencies in milliseconds
+        """
+        summary = {"count": self.count, "mean_ms": self.total_us / self.count / 1000 if self.count else 0.0}
+        for p in (50, 90, 99, 99.9):
+            summary[f"p{p:g}_ms"] = self.percentile(p) * 1000
+        summary["max_ms"] = self.max_us / 1000
+        return summary
+
+    def reset(self) -> None:
+        self.counts[:] = 0
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+
+class LatencyTracker:
+    """
+    Histograms of the latencies of each stage, see the module docstring
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock() # The stages are recorded from the update thread and the primitives
+        self._dumper = None
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+        self.stop_dump()
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Add a latency of a stage, callers check enabled first so a disabled tracker costs nothing
+        Args:
+            stage (str): Name of the stage, i.e. "decode"
+            seconds (float): The latency
+        """
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def since(self, stage: str, arrival: float) -> None:
+        """
+        Add the time from arrival (time.monotonic()) to now as a latency of a stage
+        """
+        self.record(stage, time.monotonic() - arrival)
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        The summary of each stage, see LatencyHistogram.summary
+        """
+        with self._lock:
+            return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            for histogram in self.histograms.values():
+                histogram.reset()
+
+    def format(self) -> str:
+        """
+        The summary as a table
+        """
+        lines = [f"{'stage':>10} {'count':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9} {'max ms':>8}"]
+        for stage, s in self.summary().items():
+            lines.append(f"{stage:>10} {s['count']:>8} {s['p50_ms']:>8.2f} {s['p90_ms']:>8.2f} {s['p99_ms']:>8.2f} "
+                         f"{s['p99.9_ms']:>9.2f} {s['max_ms']:>8.2f}")
+        return "\n".join(lines)
+
+    def dump_every(self, interval: float, file: Optional[TextIO] = None) -> None:
+        """
+        Print the summary table periodically from a background thread, enables the tracker
+        Args:
+            interval (float): Seconds between the summaries
+            file (Optional[TextIO]): Where to print, defaults to stderr
+        """
+        self.stop_dump()
+        self.enable()
+        stop = threading.Event()
+        def dump():
+            while not stop.wait(interval):
+                print(self.format(), file=file or sys.stderr, flush=True)
+        self._dumper = (stop, threading.Thread(target=dump, daemon=True))
+        self._dumper[1].start()
+
+    def stop_dump(self) -> None:
+        if self._dumper is None: return
+        self._dumper[0].set()
+        self._dumper = None
+
+
+LATENCY = LatencyTracker() # The tracker the instrumented code records to
+
+
+# Reads a simulated master with the instrumentation on and off
+if __name__ == "__main__":
+    from desdeo_interface.components.SerialReader import SerialReader
+    from desdeo_interface.components.SimulatedMaster import SimulatedMaster
+    from desdeo_interface.components.Latency import LATENCY # The instance SerialReader records to, not this scripts copy
+
+    histogram = LatencyHistogram()
+    values = np.random.default_rng(0).lognormal(np.log(0.002), 1, 100_000)
+    for value in values:
+        histogram.record(value)
+    for p in (50, 99, 99.9):
+        exact, estimate = np.percentile(values, p), histogram.percentile(p)
+        print(f"p{p}: exact {exact * 1000:.3f} ms, histogram {estimate * 1000:.3f} ms ({100 * (estimate / exact - 1):+.2f} %)")
+
+    master = SimulatedMaster(16, 5000)
+    master.start()
+    reader = SerialReader(port=master.port)
+    reader.wait_configured()
+    for enabled in (False, True):
+        LATENCY.enabled = enabled
+        cpu = time.thread_time() # The simulator runs in another thread
+        decoded = reader.stats()["decoded"]
+        end = time.monotonic() + 3
+        while time.monotonic() < end:
+            reader.update(0.1)
+        cpu = time.thread_time() - cpu
+        frames = reader.stats()["decoded"] - decoded
+        print(f"instrumentation {'on' if enabled else 'off'}: {cpu / frames * 1e6:.2f} µs cpu per frame")
+    print(LATENCY.format())
+    reader.end_communication()
+    master.stop()
@@ -3,32 +3,79 @@ p = os.path.abspath('.')
 sys.path.insert(1, p)
 
 from desdeo_interface.components.Component import Component
-from typing import List
+from typing import Callable, List, Union
 from pyfirmata import Board
 import numpy as np
 
+ADC_CODES = np.arange(1024) # Every value the 10-bit ADC can give
+
+# Scaling curves, map the normalized ADC value (0-1) to the normalized output (0-1)
+CURVES = {
+    "linear": lambda x: x,
+    "log": lambda x: (np.power(10, 2 * x) - 1) / 99, # Logarithmic taper, finer control near the minimum
+}
+
 class Potentiometer(Component):
     """
-    A potentiometer class to handle input from a connected potentiometer
+    A potentiometer class to handle input from a connected potentiometer.
+    The scaled value of every ADC code is precomputed to a lookup table which is
+    rebuilt only when the bounds, step size or the curve change.
     Args:
         board (pyfirmata.Board): The board (Arduino) the potentiometer is connected
         pin (int): The analog pin the potentiometer is connected to
+        curve (Union[str, Callable]): "linear", "log" or a monotone function from [0, 1] to [0, 1]
     Raises:
         Exception: analog pin doesn't exist on the arduino uno
     """
-    prev_value: float # Used for EMA filtering
-
-    def __init__(self, board: Board = None, pin: int = None):
+    def __init__(self, board: Board = None, pin: int = None, curve: Union[str, Callable] = "linear"):
         #super().__init__(board, [pin], False)
         super().__init__()
-        self.prev_value = 0
+        self._table = None
+        self._table_key = None
+        self.set_curve(curve)
+
+    def set_curve(self, curve: Union[str, Callable]) -> None:
+        """
+        Change the scaling curve
+        Args:
+            curve (Union[str, Callable]): "linear", "log" or a monotone function from [0, 1] to [0, 1]
+        Raises:
+            Exception: Unknown curve, or the function is not monotone or goes outside [0, 1]
+        """
+        if not callable(curve):
+            if curve not in CURVES:
+                raise Exception(f"Unknown curve {curve}, use one of {list(CURVES)} or a function")
+            curve = CURVES[curve]
+        normalized = np.asarray(curve(ADC_CODES / 1023), dtype=float)
+        if normalized.shape != ADC_CODES.shape or np.any((normalized < 0) | (normalized > 1)):
+            raise Exception("The curve must map [0, 1] to [0, 1]")
+        steps = np.diff(normalized)
+        if not (np.all(steps >= 0) or np.all(steps <= 0)):
+            raise Exception("The curve must be monotone")
+        self._normalized = normalized
+        self._linear = np.allclose(normalized, ADC_CODES / 1023)
+        self._table_key = None
+
+    def lookup_table(self, min: float = 0, max: float = 1, step_size = None, int_values = False) -> np.ndarray:
+        """
+        The scaled value of each ADC code, see scale
+        Returns:
+            np.ndarray: 1024 values, cached until the arguments or the curve change
+        """
+        key = (min, max, step_size, int_values)
+        if key != self._table_key:
+            self._table = self.scale(ADC_CODES, min, max, step_size, int_values, self._normalized)
+            self._table_key = key
+        return self._table
 
-    def get_value(self, min: float = 0, max: float = 1, _step_size = None, int_values = False) -> float:
+    def get_value(self, min: float = 0, max: float = 1, step_size = None, int_values = False) -> float:
         """
         Reads the value of the analog pin the potentiometer is connected and scales it
         Args:
             min (float): Minimum value for the scaling, defaults to 0
             max (float): Maximum value for the scaling, defaults to 1
+            step_size (float): Quantize the value to multiples of this from min, None to not quantize
+            int_values (bool): Round the value to an integer
         Returns:
             Value from the analog pin scaled to desired range
         Raises:
@@ -36,34 +83,93 @@ class Potentiometer(Component):
         """
         if max - min <= 0: 
             raise Exception("Min value must be lower than max value!")
-        #value_pin = self._base_value / 1023
-        # value_pin = self.filter(value_pin)
-        #self.prev_value = value_pin
-        current_value = np.interp(self._base_value, (0, 1023), (min, max))
-        if int_values: int(np.round(current_value))
-        #current_value = (value_pin * (max - min)) + min
-        return round(current_value, 3) # Temporary rounding so that printing looks somewhat decent
-
-    def get_value_int(self, min: int = 0, max: int = 1) -> int: #inclusive
-        return round(self.get_value(min, max))
+        code = int(round(self._base_value))
+        code = 0 if code < 0 else 1023 if code > 1023 else code
+        current_value = self.lookup_table(min, max, step_size, int_values)[code]
+        if int_values: return int(current_value)
+        return round(float(current_value), 3) # Temporary rounding so that printing looks somewhat decent
 
-    def filter(self, value: float) -> float:
+    def code_step(self, min: float = 0, max: float = 1, step_size = None, int_values = False) -> float:
         """
-        Filter out changes in voltage from noise with
-        exponential moving average algorithm (EMA)
+        ADC codes per quantization step of the scaled value, the value can only change when the
+        raw value crosses a multiple of this (see AnalogFilterBank.configure)
+        Returns:
+            float: The step in ADC codes, 1 if the value isn't quantized or the curve isn't linear
+        """
+        step = step_size if step_size else 1 if int_values else 0
+        if not step or not self._linear: return 1.0
+        codes = 1023 * step / (max - min)
+        return codes if codes > 1 else 1.0
 
+    @staticmethod
+    def scale(raw, min, max, step_size = None, int_values = False, normalized: np.ndarray = None) -> np.ndarray:
+        """
+        Scale raw potentiometer values (0-1023) to a range, works on whole arrays at once.
+        All the arguments can be scalars or arrays of the same length.
         Args:
-            value (float): Value to be filtered
-        
-        Returns: 
-            float: Filtered value
+            raw: The raw values
+            min: Minimum values of the scaling
+            max: Maximum values of the scaling
+            step_size: Quantize the values to multiples of this from min, None to not quantize
+            int_values: Round the values to integers
+            normalized (np.ndarray): The curve as the normalized output of each ADC code, None for linear
+        Returns:
+            np.ndarray: The scaled values as floats
         """
-        a = 0.1 # Should be between 0 and 1
-        return (a * value) + ((1-a)*self.prev_value)
+        raw = np.clip(raw, 0, 1023)
+        x = raw / 1023 if normalized is None else normalized[raw]
+        value = min + x * np.subtract(max, min)
+        if step_size is not None:
+            value = np.minimum(min + np.round((value - min) / step_size) * step_size, max)
+        return np.where(int_values, np.round(value), value)
+
+    @staticmethod
+    def lookup_batch(tables: np.ndarray, raw: np.ndarray) -> np.ndarray:
+        """
+        Look up the values of many potentiometers at once
+        Args:
+            tables (np.ndarray): Lookup tables of the potentiometers stacked to shape (n, 1024)
+            raw (np.ndarray): The raw value of each potentiometer
+        Returns:
+            np.ndarray: The scaled values
+        """
+        return tables[np.arange(len(tables)), np.rint(np.clip(raw, 0, 1023)).astype(np.intp)]
+
+    def get_value_int(self, min: int = 0, max: int = 1) -> int: #inclusive
+        return round(self.get_value(min, max))
 
 
 # Simple testing for a potentiometer
-if __name__ == "__main__":
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    # Lookup tables against the previous np.interp path
+    import time
+
+    def bench(name, f, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            f()
+        print(f"{name:>36}: {(time.perf_counter() - start) / repeat * 1e6:10.2f} us")
+
+    def get_value_interp(raw, min, max):
+        return round(np.interp(raw, (0, 1023), (min, max)), 3)
+
+    pot = Potentiometer()
+    pot.update(700)
+    assert abs(pot.get_value(-2, 5) - get_value_interp(700, -2, 5)) < 1e-9
+    bench("one read, np.interp", lambda: get_value_interp(pot._base_value, -2, 5), 20000)
+    bench("one read, lookup table", lambda: pot.get_value(-2, 5), 20000)
+    bench("table rebuild", lambda: pot.lookup_table(-2, np.random.random() + 5), 2000)
+
+    n = 64
+    rng = np.random.default_rng(0)
+    pots = [Potentiometer(curve="log" if i % 2 else "linear") for i in range(n)]
+    raw = rng.integers(0, 1024, n)
+    lower, upper = rng.uniform(-5, 0, n), rng.uniform(1, 10, n)
+    tables = np.stack([p.lookup_table(lower[i], upper[i], 0.05) for i, p in enumerate(pots)])
+    bench(f"{n} pots, np.interp each", lambda: [get_value_interp(raw[i], lower[i], upper[i]) for i in range(n)], 500)
+    bench(f"{n} pots, lookup_batch", lambda: Potentiometer.lookup_batch(tables, raw), 20000)
+
+elif __name__ == "__main__":
     from pyfirmata import Arduino, util
     import time
 
@@ -0,0 +1,234 @@
+import os, sys
+p = os.path.abspath('.')
+sys.path.insert(1, p)
+
+import selectors
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Hashable, List, Optional, Sequence, Set
+
+from desdeo_interface.components.CRC8 import CRC_KEY
+from desdeo_interface.components.SerialReader import SerialReader
+from desdeo_interface.components.LastValueCache import LastValueCache
+from desdeo_interface.components.EdgeQueue import EdgeQueue
+
+
+class ReaderPool:
+    """
+    Reads several master boards at once. Has the same interface as SerialReader so an Interface
+    can use either. The ports are opened in parallel and read on the thread calling update,
+    which waits on all of them with one selector.
+
+    The keys of the components are (port, node_id, component_type, component_id). The master
+    components of the first port keep the ('master', role) keys so they work as the masters
+    buttons and wheel, the master components of the other ports are (port, 'master', role).
+    Args:
+        ports (Sequence[str]): The serial ports, the first one is the primary board
+        crc_key (int): Key for the crc8 checksums
+        wire_format (str): "text" or "binary", see SerialReader
+    """
+
+    def __init__(self, ports: Sequence[str], crc_key: int = CRC_KEY, wire_format: str = "text"):
+        if len(ports) == 0:
+            raise Exception("Give at least one port")
+        self.ports = list(ports)
+        self.primary = self.ports[0]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(len(self.ports)) as executor: # The handshakes block, do them at the same time
+            futures = {port: executor.submit(SerialReader, crc_key, wire_format, port) for port in self.ports}
+        failed = [port for port, future in futures.items() if future.exception() is not None]
+        if failed: # Close the ports that did open before giving up
+            for port, future in futures.items():
+                if future.exception() is None: future.result().end_communication()
+            raise futures[failed[0]].exception()
+        self.readers: Dict[str, SerialReader] = {port: future.result() for port, future in futures.items()}
+        self.timings: Dict[str, float] = {"open": time.perf_counter() - start} # Seconds of each phase of the start
+        self.cache = LastValueCache() # Newest values of all the boards by pool key, see changes_since
+        self._seqs = {port: 0 for port in self.ports} # Sequence number taken from the cache of each reader
+        self.edges = EdgeQueue() # Button edges of all the boards by pool key, see SerialReader.edges
+        self._edge_cursors = {port: 0 for port in self.ports}
+        self._selector = selectors.DefaultSelector()
+        self._fds: Dict[str, Optional[int]] = {} # Registered file descriptor of each port, ports without one are polled
+        for port in self.ports:
+            self._register(port)
+        self._health = {port: {"changes": 0, "errors": 0, "last_data": None, "connected": True} for port in self.ports}
+
+    def key(self, port: str, key: tuple) -> tuple:
+        """
+        The pool key of a SerialReader key from a port
+        """
+        if key[0] == "master" and port == self.primary:
+            return key
+        return (port,) + key
+
+    def update(self, timeout: float = 0) -> Set[Hashable]:
+        """
+        Read and handle the data of every port that has data
+        Args:
+            timeout (float): Wait at most this many seconds for data on any port, 0 doesn't wait
+        Returns:
+            Set[Hashable]: Pool keys of the changed components
+        """
+        unselectable = [port for port, fd in self._fds.items() if fd is None] # Includes the lost ports being reopened
+        if unselectable: timeout = min(timeout, 0.01) # Come back soon to poll them
+        ready = [key.data for key, _ in self._selector.select(timeout)] if self._selector.get_map() else []
+        changed = set()
+        for port in ready + unselectable:
+            health = self._health[port]
+            reader = self.readers[port]
+            try:
+                reader.update()
+            except Exception as e: # The board was unplugged or the port broke
+                health["errors"] += 1
+                if health["connected"]: print(f"Reading {port} failed: {e}")
+                health["connected"] = False
+                self._unregister(port)
+                self._fds[port] = None # Polled until the reader reopens the port itself
+                continue
+            health["connected"] = True
+            self._register(port) # The descriptor changes when a lost port is reopened
+            self._edge_cursors[port], edges = reader.edges.read(self._edge_cursors[port], consumer="pool")
+            for edge in edges:
+                self.edges.put(self.key(port, edge.button), edge.pressed, edge.timestamp)
+            self._seqs[port], changes = reader.changes_since(self._seqs[port])
+            if changes:
+                health["changes"] += len(changes)
+                health["last_data"] = time.monotonic()
+                for key, value in changes.items():
+                    pool_key = self.key(port, key)
+                    self.cache.set(pool_key, value, reader.arrival(key))
+                    changed.add(pool_key)
+        return changed
+
+    def _register(self, port: str):
+        fd = self.readers[port].fileno()
+        if port in self._fds and fd == self._fds[port]: return
+        self._unregister(port)
+        self._fds[port] = fd
+        if fd is not None:
+            self._selector.register(fd, selectors.EVENT_READ, port)
+
+    def _unregister(self, port: str):
+        fd = self._fds.get(port)
+        if fd is None: return
+        try:
+            self._selector.unregister(fd)
+        except (KeyError, ValueError):
+            pass
+
+    @property
+    def connections(self) -> int:
+        """
+        Count of connections of all the boards, grows when any of them reconnects
+        """
+        return sum(reader.connections for reader in self.readers.values())
+
+    @property
+    def configured(self) -> bool:
+        return all(reader.configured for reader in self.readers.values())
+
+    def wait_configured(self, timeout: float = 5.0) -> bool:
+        """
+        Read the ports until every master has sent its configuration or until timeout, see SerialReader.wait_configured
+        Returns:
+            bool: Were all the configurations received
+        """
+        start = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        while not self.configured:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: break
+            self.update(remaining)
+        self.update()
+        self.timings["configuration"] = time.perf_counter() - start
+        return self.configured
+
+    def value(self, key: Hashable):
+        """
+        Get a value of a single component, see SerialReader.value
+        """
+        return self.cache.value(key)
+
+    def arrival(self, key: Hashable) -> float:
+        """
+        When the newest value of a component was read, see SerialReader.arrival
+        """
+        return self.cache.timestamp(key)
+
+    def changes_since(self, seq: int):
+        """
+        Newest values of the components of all the boards changed after a sequence number, see SerialReader.changes_since
+        """
+        return self.cache.changes_since(seq)
+
+    def components(self) -> List[tuple]:
+        """
+        Pool keys of all the components of all the boards, except the master components
+        """
+        return [self.key(port, key) for port, reader in self.readers.items() for key in reader.components()]
+
+    def data(self) -> dict:
+        """
+        The data of each port and the primary masters data under 'master'
+        """
+        data = {port: reader.data() for port, reader in self.readers.items()}
+        data["master"] = data[self.primary].get("master", {})
+        return data
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Health and throughput of each port: decoded and dropped frames (per second), published changes,
+        read errors, seconds since the last change and whether the port still works
+        """
+        now = time.monotonic()
+        stats = {}
+        for port, reader in self.readers.items():
+            health = self._health[port]
+            last = health["last_data"]
+            stats[port] = dict(
+                reader.stats(),
+                changes=health["changes"],
+                errors=health["errors"],
+                idle_seconds=None if last is None else now - last,
+                connected=health["connected"] and reader.connected,
+            )
+        return stats
+
+    def send_bounds(self, node_id: tuple, component_type: str, component_id: int, min_value: float, max_value: float, step_size: float):
+        """
+        Send bounds of a component to its master, see SerialReader.send_bounds
+        Args:
+            node_id (tuple): (port, node_id), the start of the pool key
+        """
+        port, node_id = node_id
+        self.readers[port].send_bounds(node_id, component_type, component_id, min_value, max_value, step_size)
+
+    def fileno(self) -> Optional[int]:
+        return None # Several ports, AsyncSerialReader polls update instead
+
+    def end_communication(self):
+        self._selector.close()
+        for port, reader in self.readers.items():
+            try:
+                reader.end_communication()
+            except Exception as e:
+                print(f"Closing {port} failed: {e}")
+
+
+# Reads several simulated boards on one thread
+if __name__ == "__main__":
+    from desdeo_interface.components.SimulatedMaster import SimulatedMaster
+
+    boards = [SimulatedMaster(8, 1000, seed=i) for i in range(4)]
+    for board in boards:
+        board.start()
+    pool = ReaderPool([board.port for board in boards])
+    start = time.monotonic()
+    while time.monotonic() - start < 3:
+        pool.update(timeout=0.1)
+    print(f"{len(pool.components())} components on {len(boards)} boards, i.e. {pool.components()[0]}")
+    for port, stats in pool.stats().items():
+        print(port, {k: round(v, 1) if isinstance(v, float) else v for k, v in stats.items()})
+    pool.end_communication()
+    for board in boards:
+        board.stop()
@@ -7,35 +7,130 @@ from desdeo_interface.components.Component import Component
 from pyfirmata import Board
 import numpy as np
 import time # For dynamic step sizes
+from collections import deque
+
+from typing import Callable, Deque, List, Optional, Tuple
+
+COUNTER_RANGE = 65536 # The master reports the position as a wrapping 16-bit counter
+
+
+def default_acceleration(rate: float) -> float:
+    """
+    Detents per second to a step multiplier. Normal turning is around 8 detents per second
+    and keeps the base step, faster turns grow the step quadratically.
+    """
+    return max(1.0, rate / 8) ** 2
 
-from typing import List
 
 class RotaryEncoder(Component):
+    """
+    A rotary encoder. The value follows the position of the encoder, which continues over reconnects
+    (see rebase). With acceleration each detent moves the position acceleration(rate) steps, rate
+    being detents per second over the last window_s.
+    Args:
+        acceleration (Optional[Callable[[float], float]]): Detents per second to a step multiplier,
+            i.e. default_acceleration. None to not accelerate
+        window_s (float): Length of the window the rate is measured over
+    """
     _current_value: float # Value of the encoder
     #state: int # The position of the encoder, 1 or 0
     state_prev: int # the previous position of the encoder, 1 or 0
 
     # Needed for dynamic values: 
-    # Record times of each rotations, check which have happened in the last second, calculate rotations per second, adjust step size accordingly
-    rotations: List[float] = [] # list of rotation start times
+    # Record times of each rotations, check which have happened in the last window, calculate rotations per second, adjust step size accordingly
+    rotations: Deque[Tuple[float, int]] # (time, detents) of the recent rotations, oldest first
 
 
-    def __init__(self, board: Board = None, pins: List[int] = None):
+    def __init__(
+        self,
+        board: Board = None,
+        pins: List[int] = None,
+        acceleration: Optional[Callable[[float], float]] = None,
+        window_s: float = 1.0,
+    ):
         # if len(pins) != 2:
         #     raise Exception("Rotary encoder needs 2 digital pins")
         # super().__init__(board, pins, True)
         super().__init__()
         self.state_prev = 0 #self.pin_values[0] # Initial state
         self.current_value = 0
+        self.acceleration = acceleration
+        self.window_s = window_s
+        self.rotations = deque()
+        self._detents_in_window = 0
+        self.position = 0.0 # Position in detents, accelerated if acceleration is set
+        self._raw = None # Latest raw counter value
+        self._rebased = False # The next value continues from the current position
+
+    def update(self, value: int, timestamp: float = None):
+        """
+        Give a new counter value from the master
+        Args:
+            value (int): The 16-bit counter
+            timestamp (float): time.monotonic() of the value, defaults to now
+        """
+        super().update(value)
+        value = int(value)
+        if self._raw is None: # The first value is the starting position
+            self._raw = value
+            if not self._rebased: self.position = float(value)
+            self._rebased = False
+            return
+        delta = (value - self._raw + COUNTER_RANGE // 2) % COUNTER_RANGE - COUNTER_RANGE // 2 # Shortest way around the wrap
+        self._raw = value
+        if delta == 0: return
+        now = time.monotonic() if timestamp is None else timestamp
+        self.record_rotation(abs(delta), now)
+        gain = 1.0 if self.acceleration is None else self.acceleration(self.rate(now))
+        self.position += delta * gain
+
+    def rebase(self):
+        """
+        The counter of the master started over (i.e. after a reconnect), continue from the current
+        position instead of jumping by the difference of the counters
+        """
+        self._raw = None
+        self._rebased = True
+
+    def record_rotation(self, detents: int = 1, timestamp: float = None):
+        """
+        Add detents to the rate window
+        """
+        self.rotations.append((time.monotonic() if timestamp is None else timestamp, detents))
+        self._detents_in_window += detents
+
+    def rate(self, timestamp: float = None) -> float:
+        """
+        Detents per second over the last window_s, amortized O(1)
+        Args:
+            timestamp (float): The current time.monotonic(), defaults to now
+        """
+        self.update_rotations_list(timestamp)
+        return self._detents_in_window / self.window_s
     
     def get_value(self, min, max, step_size = 0.05, integer_values = False):
-        if integer_values: step_size = 1
-        actual_step_size = (max - min) / 65535
-        ratio = step_size / actual_step_size
-        scaled_value = (ratio * self._base_value) % 65535
-        value = (np.interp(scaled_value, (0, 65535), (min, max)))
-        if integer_values: value = int(np.round(value))
-        return value
+        value = self.scale(self.position, min, max, step_size, integer_values)
+        if integer_values: return int(value)
+        return float(value)
+
+    @staticmethod
+    def scale(raw, min, max, step_size = 0.05, integer_values = False) -> np.ndarray:
+        """
+        Turn raw encoder positions into values, each detent moves the value by step_size and the
+        value wraps around from max to min. Works on whole arrays at once, all the arguments
+        can be scalars or arrays of the same length.
+        Args:
+            raw: The encoder positions
+            min: Minimum values
+            max: Maximum values
+            step_size: Change of the value per detent
+            integer_values: Use a step of one and round the values to integers
+        Returns:
+            np.ndarray: The values as floats
+        """
+        step_size = np.where(integer_values, 1, step_size)
+        value = min + np.mod(step_size * np.asarray(raw, dtype=float), np.subtract(max, min))
+        return np.where(integer_values, np.round(value), value)
     
     def get_value_discrete(self, min, max): # [inclusive, exclusive]
         value = self._base_value # between 0 and 2^16
@@ -67,7 +162,7 @@ class RotaryEncoder(Component):
         
         # if current state is different than prev state then rotary encoder has moved
         if (pin0 != self.state_prev): # Add pin0 == 0 if crowtail 2.0 encoder else remove
-            self.rotations.append(time.time()) # Add the rotation (time) to rotations list, needed for dynamic steps
+            self.record_rotation() # Add the rotation (time) to rotations list, needed for dynamic steps
             self.current_value += self._determine_direction(pin0, pin1) * step 
             # Make sure the values don't exceed bounds: Rather make them loop
             if self.current_value > max: self.current_value = min
@@ -79,7 +174,9 @@ class RotaryEncoder(Component):
     
     def get_dynamic_value(self, min: float = -np.inf, max: float = np.inf, step = 0.01):
         """
-        get the value of the potentiometer with dynamic step sizes, slow turns => smaller steps => more accuracy
+        get the value of the rotary encoder from its position. The steps are dynamic only when acceleration
+        is set (slow turns => smaller steps => more accuracy), by default each detent is one step.
+        The acceleration is applied as the detents arrive so it can't be enabled for a single call
         Args:
             min (float): Minimun reachable value, defaults to negative infinity
             max (float): Maximun reachabe value, defaults to (positive) infinity
@@ -87,20 +184,8 @@ class RotaryEncoder(Component):
         Returns:
             float: the current value from the rotary encoder
         """
-
-        rps = len(self.rotations) # Rotations per second
-
-        # According to my large-scale testing:
-        # rps values close to 8 are the values you get when turning the encoder at normal speeds
-        # 1-4 are slow and anything above 15 is quite fast at best reaching 35-40 rps
-        # This all might change when there is a shell over the encoder
-
-        # Calculate the step size as a function of rps
-        # TODO this function could be a argument and the default needs to be something nicer but i'll think of it later
-        step = ((rps + 1)/8.) * step
-        step = step * 2
-
-        return self.get_value(min, max, step)
+        if np.isinf(max - min): return step * self.position # Unbounded
+        return float(self.scale(self.position, min, max, step))
     
     def _determine_direction(self, pin0, pin1):
         """
@@ -112,10 +197,11 @@ class RotaryEncoder(Component):
         """
         return -1 if pin0 != pin1 else 1
     
-    def update_rotations_list(self):
-        # Filter out the rotations which happened more than a second ago
-        current = time.time() - 1
-        self.rotations = list(filter(lambda t: t > current, self.rotations)) 
+    def update_rotations_list(self, timestamp: float = None):
+        # Drop the rotations which happened before the window, oldest are first
+        oldest = (time.monotonic() if timestamp is None else timestamp) - self.window_s
+        while self.rotations and self.rotations[0][0] <= oldest:
+            self._detents_in_window -= self.rotations.popleft()[1]
     
     @property
     def current_value(self):
@@ -136,7 +222,7 @@ if __name__ == "__main__":
     board = Arduino(port)
     it = util.Iterator(board)
     it.start()
-    rot_enc = RotaryEncoder(board, pins)
+    rot_enc = RotaryEncoder(board, pins, acceleration=default_acceleration) # Dynamic steps
     print("Enter a value greater than 100 to stop")
     while True:
         value = rot_enc.get_dynamic_value(step = 1)
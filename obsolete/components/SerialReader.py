@@ -1,52 +1,204 @@
-from os import startfile
+import json
+import os
+import select
+import threading
 import serial
 from serial.serialutil import SerialException
 import serial.tools.list_ports
-import ast
+from desdeo_interface.components.CRC8 import CRC_KEY
+from desdeo_interface.components.FrameParser import FrameParser
+from desdeo_interface.components.WireFormat import BinaryFrameParser, decode_binary, decode_text, encode_bounds
+from desdeo_interface.components.SessionLog import SessionLog, SessionRecorder, SessionReplay
+from desdeo_interface.components.LastValueCache import LastValueCache
+from desdeo_interface.components.EdgeQueue import EdgeQueue
+from desdeo_interface.components.Latency import LATENCY
+import time
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Hashable, List, Optional, Set
+
+MASTER_ID = 254 # The id the master uses for its own components
+# The roles of the masters own components
+MASTER_COMPONENTS = {("B", 0): "Accept", ("B", 1): "Decline", ("R", 0): "Rotary"}
+MASTER_BUTTONS = ("Accept", "Decline")
+# Component counts (potentiometers, rotary encoders, buttons) of each NodeType in Datatypes.h
+NODE_TYPES = {
+    0: (0, 0, 0), # empty
+    1: (0, 0, 1), # button
+    2: (1, 0, 0), # potentiometer
+    3: (0, 1, 0), # rotaryEncoder
+    4: (1, 0, 1), # potentiometerButton
+    5: (0, 1, 1), # rotaryencoderButton
+}
+# The last board that answered, tried first on the next start so the ports don't have to be listed
+PORT_CACHE = os.path.join(os.path.expanduser("~"), ".desdeo_interface_port.json")
+RECONNECT_BACKOFF = (0.05, 1.0) # First and longest wait between the attempts to reopen a lost port, in seconds
+RECONNECT_HANDSHAKE = 3.0 # How long a reopened port is asked to start before it is closed and reopened, in seconds
+MAX_BAD_UPDATES = 20 # The port is reopened after this many updates in a row with only unparseable data
 
 class SerialReader:
-    def __init__(self, crc_key: np.uint8 = 7) -> None:
-        self._data = {}
-        self._buffer = ''
-        ports = self.find("Arduino Uno")
+    """
+    Reads and decodes the data the master writes to serial
+    Args:
+        crc_key (int): Key for the crc8 checksums, has to be the same as on the arduino side
+        wire_format (str): "text" for the text frames or "binary" for the binary frames, see WireFormat
+        port: The serial port, i.e. "COM3" or "/dev/pts/3" of a SimulatedMaster, or an open port like
+            SessionReplay. By default the first "Arduino Uno" is used
+        record (Optional[str]): Record everything read from the port to this session log, see record
+        port_cache (Optional[str]): File for remembering the board found by default, None to always search
+
+    If the port is lost (the cable is unplugged) or only garbage is read, update keeps reopening the
+    same device with a growing backoff. When the master answers again the sent bounds are sent again
+    and the keys of the components stay the same, see reconnect.
+    Raises:
+        Exception: No board was found or the master didn't answer the handshake
+    """
+    def __init__(
+        self,
+        crc_key: int = CRC_KEY,
+        wire_format: str = "text",
+        port = None,
+        record: Optional[str] = None,
+        port_cache: Optional[str] = PORT_CACHE,
+    ) -> None:
+        if wire_format not in ("text", "binary"):
+            raise Exception(f"Unknown wire format {wire_format}")
+        self.cache = LastValueCache() # Newest value of each component, see changes_since
+        self.edges = EdgeQueue() # Every press and release of the buttons, the cache only keeps the newest state
+        self._arrival = 0.0 # time.monotonic() when the bytes being handled were read
+        self._nodes = {} # node id: (node type, position) from the configuration
+        self._disconnected = [] # (node id, direction) of each reported disconnection
+        self._configured = False
+        self._new_connection = False
+        self._wire_format = wire_format
+        self._changed = set() # Keys of the components changed during an update
+        self._recorder = None if record is None else SessionRecorder(record, wire_format)
+        self._found = {} # device: port info of the ports listed by find
+        self.timings: Dict[str, float] = {} # Seconds spent in each phase of the start, see connect
+        self.connected = True
+        self.connections = 1 # Count of successful connections, grows on every reconnect
+        self.reconnect_latencies: List[float] = [] # Seconds from losing the port to the configuration
+        self._bounds = {} # Latest bounds sent of each component, sent again after a reconnect
+        self._lost_at = 0.0
+        self._next_attempt = 0.0
+        self._backoff = RECONNECT_BACKOFF[0]
+        self._bad_updates = 0
+        self._reopened = None # The lost port reopened and waiting for the master to answer, see reconnect
+        self._handshake_until = 0.0
+        self._next_ask = 0.0
+        self._replay = False
+        if wire_format == "binary":
+            self._parser = BinaryFrameParser(crc_key)
+            self._decode = decode_binary
+        else:
+            self._parser = FrameParser(crc_key)
+            self._decode = decode_text
+        if port is None or isinstance(port, str):
+            self._port = self.connect(port, port_cache)
+            self._device = self._port.port # Reopened after a loss
+        else:
+            self._port = port
+            self._device = None # Can't be reopened
+            if not self._handshake():
+                raise Exception("The master didn't answer")
+
+    def connect(self, port: Optional[str] = None, port_cache: Optional[str] = PORT_CACHE):
+        """
+        Open the port and start the communication. Without a port the cached board is tried first,
+        the ports are listed only if it doesn't answer. The time of each phase is saved to self.timings
+        Args:
+            port (Optional[str]): The serial port, by default the first "Arduino Uno"
+            port_cache (Optional[str]): See SerialReader
+        Returns:
+            The open port
+        """
+        if port is not None:
+            return self._connect([port])
+        cached = read_port_cache(port_cache)
+        if cached is not None:
+            try:
+                return self._connect([cached["device"]])
+            except Exception:
+                print(f"The board on {cached['device']} didn't answer, searching for it")
+        start = time.perf_counter()
+        ports = self.find("Arduino Uno", cached)
+        self.timings["find"] = time.perf_counter() - start
         if len(ports) == 0:
             raise Exception("Couldn't find a usable board")
-        self._port = self.open(ports)
-        self.start_communication()
-        self.crc_lookup_table = self.create_lookup_table(crc_key)
+        uno = self._connect(ports)
+        info = self._found.get(uno.port)
+        if port_cache is not None and info is not None:
+            write_port_cache(port_cache, {
+                "device": info.device, "vid": info.vid, "pid": info.pid, "serial_number": info.serial_number,
+            })
+        return uno
+
+    def _connect(self, ports: List[str]):
+        # Open the first port whose master answers the handshake. Many ports are asked at the same time
+        # so every silent port doesn't add the couple of seconds start_communication waits for an answer
+        if len(ports) == 1:
+            probes = [self._probe(ports[0])]
+        else:
+            answered = threading.Event() # Stops asking the other ports
+            with ThreadPoolExecutor(len(ports)) as executor:
+                futures = [executor.submit(self._probe, port, answered) for port in ports]
+                for future in as_completed(futures):
+                    if future.result() is not None: answered.set()
+            probes = [future.result() for future in futures]
+        probes = [probe for probe in probes if probe is not None]
+        if not probes:
+            raise Exception("The master didn't answer")
+        for port, *_ in probes[1:]: port.close()
+        self._port, answer, self.timings["open"], self.timings["handshake"] = probes[0]
+        if self._recorder is not None: self._recorder.append(answer)
+        return self._port
+
+    def _probe(self, port: str, answered: Optional[threading.Event] = None):
+        # Open a port and ask the master to start, None if the port is busy or nothing answers
+        start = time.perf_counter()
+        try:
+            uno = self.open([port])
+        except Exception:
+            return None
+        opened = time.perf_counter()
+        if self._wire_format == "binary":
+            uno.write(b"W1") # Ask the master to switch to binary frames before the configuration is sent
+        answer = self._ask(uno, stop=answered)
+        if not answer:
+            uno.close()
+            if answered is None or not answered.is_set(): print(f"No answer from {port}")
+            return None
+        return uno, answer, opened - start, time.perf_counter() - opened
+
+    def _handshake(self) -> bool:
+        start = time.perf_counter()
+        if self._wire_format == "binary":
+            self._port.write(b"W1") # Ask the master to switch to binary frames before the configuration is sent
+        answered = self.start_communication()
+        self.timings["handshake"] = time.perf_counter() - start
+        return answered
     
-    def create_lookup_table(self, key: np.uint8):
-        table = []
-        for i in range(256):
-            cur: np.uint8 = i
-            for _ in range(8):
-                if (np.bitwise_and(cur, 0x80)) != 0:
-                    cur = np.left_shift(cur, 1) % 256
-                    cur = np.bitwise_xor(cur, key)
-                else:
-                    cur = np.left_shift(cur, 1) % 256
-            table.append(cur)
-        return table
-
-    def crc_check(self, data: str, crc: np.uint8) -> bool:
-        remainder = 0
-        data_arr = [ord(s) for s in data] + [crc]
-        for d in data_arr:
-            remainder = self.crc_lookup_table[d ^ remainder]
-        return remainder == 0
-
-    def find(self, s):
+    def find(self, s: str, cached: Optional[dict] = None) -> List[str]:
+        """
+        List the ports whose description contains s
+        Args:
+            s (str): i.e. "Arduino Uno"
+            cached (Optional[dict]): The cached board, a port with the same usb ids comes first even if
+                its description doesn't match
+        Returns:
+            List[str]: The devices of the ports
+        """
         ports = serial.tools.list_ports.comports()
-        ss = [] 
-        print("Found devices:")
-        for port in ports:
-            desc = port.description
-            print(desc)
-            if s in desc:
-                ss.append(port.name)
-        print()
-        return ss
+        same = lambda port: cached is not None and cached.get("vid") is not None and (
+            port.vid, port.pid, port.serial_number) == (cached.get("vid"), cached.get("pid"), cached.get("serial_number"))
+        found = [port for port in ports if same(port)] + [port for port in ports if s in port.description and not same(port)]
+        self._found = {port.device: port for port in found}
+        if len(found) == 0:
+            print("Found devices:")
+            for port in ports:
+                print(port.description)
+            print()
+        return [port.device for port in found]
 
     def open(self, ports):
         for port in ports:
@@ -59,44 +211,469 @@ class SerialReader:
                 print(f"Skipping port {port}")
         raise Exception("No available boards")
     
-    def update(self):
+    def fileno(self) -> Optional[int]:
+        """
+        The file descriptor of the port
+        Returns:
+            Optional[int]: The file descriptor or None if the port doesn't have one (windows) or is lost
+        """
+        if not self.connected: return None
+        try:
+            return self._port.fileno()
+        except AttributeError:
+            return None
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """
+        Block until there are bytes to read or until timeout
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds
+        Returns:
+            bool: Are there bytes to read
+        """
+        if self._port.inWaiting() > 0:
+            return True
+        fd = self.fileno()
+        if fd is not None:
+            readable, _, _ = select.select([fd], [], [], timeout)
+            return len(readable) > 0
+        # Block on reading a byte instead
+        self._port.timeout = timeout
+        first = self._port.read(1)
+        self._feed(first)
+        return len(first) > 0
+
+    def _feed(self, data: bytes):
+        if self._recorder is not None: self._recorder.append(data)
+        self._parser.feed(data)
+
+    def record(self, path: str):
+        """
+        Start appending everything read from the port to a session log, see SessionLog
+        Args:
+            path (str): The log file
+        """
+        self.stop_recording()
+        self._recorder = SessionRecorder(path, self._wire_format)
+
+    def stop_recording(self):
+        if self._recorder is None: return
+        self._recorder.close()
+        self._recorder = None
+
+    def update(self, timeout: float = 0) -> Set[Hashable]:
+        """
+        Read and handle the data from serial
+        Args:
+            timeout (float): Wait at most this many seconds for data, 0 doesn't wait
+        Returns:
+            Set[Hashable]: Keys of the changed components, see component_key.
+        """
+        self._changed = set()
+        if not self.connected:
+            return self.reconnect(timeout)
         try:
-            self._buffer += self._port.read(self._port.inWaiting()).decode("ascii")
-        except UnicodeDecodeError:
-            print("Failed to decode a byte")
-            return
-        if '\n' in self._buffer:
-            d, self._buffer = self._buffer.split('\n')[-2:]
+            if timeout > 0 and not self.wait(timeout):
+                return self._changed
+            self._feed(self._port.read(self._port.inWaiting()))
+            self._arrival = time.monotonic()
+        except (SerialException, OSError, ValueError) as e: # ValueError from select on a closed descriptor
+            if self._device is None: raise
+            self._lose(f"Lost the port {self._device}: {e}")
+            return self._changed
+        decoded, dropped = self._parser.decoded, self._parser.dropped
+        timed = LATENCY.enabled
+        # Handle every frame that arrived since the last update, not just the latest one
+        for frame in self._parser.frames():
             try:
-                dict_str, crc = d.rsplit('}', 1)
-                dict_str = dict_str + '}'
-                if not self.crc_check(dict_str, int(crc)):
-                    raise Exception("CRC8 checksum doesn't match")
-                data = ast.literal_eval(dict_str)
-                if data is not None:
-                    self._data.update(data)
+                message = self._decode(frame)
+                if message is not None:
+                    self.handle_message(*message)
+                if timed: LATENCY.since("decode", self._arrival)
             except Exception as e:
-                print("Couldn't parse data")
-                print(f"got exception {e}")
+                self._parser.reject()
+                if self._bad_updates == 0:
+                    print("Couldn't parse data")
+                    print(f"got exception {e}")
+        if self._parser.decoded > decoded:
+            self._bad_updates = 0
+        elif self._parser.dropped > dropped:
+            self._bad_updates += 1
+            if self._bad_updates >= MAX_BAD_UPDATES and self._device is not None:
+                self._lose(f"Only garbage from {self._device}, reopening it")
+        if self._replay and self._configured: self._restore()
+        return self._changed
+
+    def _lose(self, reason: str):
+        print(reason)
+        if self._recorder is not None: self._recorder.flush() # The session up to the unplug is the one to replay
+        try:
+            self._port.close()
+        except Exception:
+            pass
+        self.connected = False
+        self._lost_at = time.monotonic()
+        self._next_attempt = self._lost_at
+        self._backoff = RECONNECT_BACKOFF[0]
+        self._bad_updates = 0
+
+    def reconnect(self, timeout: float = 0) -> Set[Hashable]:
+        """
+        Get the lost port back, update calls this while disconnected. Blocks at most about timeout so
+        the thread calling update stays responsive: the device is reopened once the backoff has passed
+        and then asked to start on every call until it answers or RECONNECT_HANDSHAKE seconds pass.
+        The bounds are sent again when the master has sent its configuration, see update
+        Args:
+            timeout (float): Wait at most this long
+        Returns:
+            Set[Hashable]: Keys of every known component after a reconnect, they might have changed meanwhile
+        """
+        start = time.monotonic()
+        if self._reopened is None:
+            wait = self._next_attempt - start
+            if wait > timeout:
+                if timeout > 0: time.sleep(timeout)
+                return set()
+            if wait > 0: time.sleep(wait)
+            try:
+                self._reopened = self.open([self._device])
+                if self._wire_format == "binary": self._reopened.write(b"W1")
+            except Exception:
+                self._retry_later()
+                return set()
+            self._handshake_until = time.monotonic() + RECONNECT_HANDSHAKE
+            self._next_ask = 0.0
+        try:
+            now = time.monotonic()
+            if now >= self._next_ask: # Ask again, the master doesn't hear while it is in the bootloader
+                self._reopened.write(b"R")
+                self._next_ask = now + 0.25
+            self._reopened.timeout = max(0.0, min(start + timeout, self._next_ask) - now)
+            answer = self._reopened.read()
+        except (SerialException, OSError):
+            answer = b""
+            self._handshake_until = 0.0 # Broke again, start over
+        if not answer:
+            if time.monotonic() > self._handshake_until:
+                self._reopened.close()
+                self._reopened = None
+                self._retry_later()
+            return set()
+        if self._recorder is not None: self._recorder.append(answer)
+        self._reopened.timeout = .1
+        self._port, self._reopened = self._reopened, None
+        self._configured = False
+        self._replay = True # Send the bounds again after the configuration, see update
+        self.connected = True
+        self.connections += 1
+        return self.update() | set(self.cache.keys)
+
+    def _retry_later(self):
+        self._next_attempt = time.monotonic() + self._backoff
+        self._backoff = min(2 * self._backoff, RECONNECT_BACKOFF[1])
+
+    def _restore(self):
+        # The master has sent its configuration after a reconnect, bound its components again
+        self._replay = False
+        for node_id, component_type, component_id in list(self._bounds):
+            self.send_bounds(node_id, component_type, component_id, *self._bounds[(node_id, component_type, component_id)])
+        latency = time.monotonic() - self._lost_at
+        self.reconnect_latencies.append(latency)
+        print(f"Reconnected to {self._device} in {latency * 1000:.0f} ms")
+
+    def handle_message(self, command: str, fields):
+        """
+        Handle a decoded message
+        Args:
+            command (str): The packet id, see doc/Communication. '{' for the old dict frames
+            fields: The decoded fields of the message
+        """
+        if command == "V":
+            self.set_value(*fields)
+        elif command == "{":
+            self._update_dict(fields)
+        elif command == "N":
+            node_id, node_type, pos = fields
+            self._nodes[node_id] = (node_type, pos)
+        elif command == "O":
+            self._configured = True
+        elif command == "D":
+            self._disconnected.append(fields)
+        elif command == "C":
+            self._new_connection = True
+
+    def set_value(self, node_id: int, component_type: str, component_id: int, value: float):
+        """
+        Save a component value to the cache, the masters components are saved as ('master', role)
+        """
+        if node_id == MASTER_ID and (component_type, component_id) in MASTER_COMPONENTS:
+            key = master_key(MASTER_COMPONENTS[(component_type, component_id)])
+        else:
+            key = component_key(node_id, component_type, component_id)
+        self._set(key, value)
+
+    def _set(self, key: tuple, value: float):
+        if key[-2] == "B" or key[0] == "master" and key[1] in MASTER_BUTTONS:
+            pressed = value == 1
+            if pressed != (key in self.cache and self.cache.value(key) == 1): # Buttons start released
+                self.edges.put(key, pressed, self._arrival)
+        self.cache.set(key, value, self._arrival)
+        self._changed.add(key)
+
+    def _update_dict(self, data: dict):
+        """
+        Save the values from an old dict frame, only changed values are marked as changed
+        """
+        for node_id, node in data.items():
+            if node_id == "master":
+                values = ((master_key(role), value) for role, value in node.items())
+            else:
+                values = (
+                    (component_key(node_id, component_type, component_id), value)
+                    for component_type, components in node.items()
+                    for component_id, value in components.items()
+                )
+            for key, value in values:
+                if key in self.cache and self.cache.value(key) == value: continue
+                self._set(key, value)
+
+    def value(self, key: Hashable):
+        """
+        Get a value of a single component without copying the data
+        Args:
+            key (Hashable): (node_id, component_type, component_id) or ('master', role)
+        Returns:
+            The value of the component
+        """
+        return self.cache.value(key)
+
+    def arrival(self, key: Hashable) -> float:
+        """
+        time.monotonic() when the newest value of a component was read from the port
+        """
+        return self.cache.timestamp(key)
+
+    def changes_since(self, seq: int):
+        """
+        The newest values of the components changed after a sequence number, see LastValueCache.changes_since
+        Returns:
+            (int, dict): The current sequence number and {key: value} of the changed components
+        """
+        return self.cache.changes_since(seq)
+
+    def components(self) -> List[tuple]:
+        """
+        Keys of all the components of the nodes, see component_key. The master components are left out.
+        The components reported in the configuration are included before their first value arrives
+        """
+        keys = [
+            component_key(node_id, component_type, component_id)
+            for node_id, (node_type, _) in self._nodes.items()
+            for component_type, count in zip("PRB", NODE_TYPES.get(node_type, (0, 0, 0)))
+            for component_id in range(count)
+        ]
+        configured = set(keys)
+        return keys + [key for key in self.cache.keys if key[0] != "master" and key not in configured]
+
+    @property
+    def configured(self) -> bool:
+        """
+        Has the master sent 'O', the end of the configuration
+        """
+        return self._configured
+
+    def wait_configured(self, timeout: float = 5.0) -> bool:
+        """
+        Read the port until the master has sent the configuration or until timeout.
+        The values that arrived with the configuration are handled too
+        Args:
+            timeout (float): Maximum time to wait in seconds
+        Returns:
+            bool: Was the configuration received
+        """
+        start = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        while not self._configured:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: break
+            self.update(remaining)
+        self.update() # The initial values follow 'O'
+        self.timings["configuration"] = time.perf_counter() - start
+        return self._configured
+
+    def stats(self) -> dict:
+        """
+        Decoded and dropped frame counts, see FrameParser.stats, and the state of the connection:
+        connected, reconnects and the latest and the worst reconnect latency in ms
+        """
+        latencies = self.reconnect_latencies
+        return dict(
+            self._parser.stats(),
+            **self.cache.stats(),
+            connected=self.connected,
+            reconnects=len(latencies),
+            reconnect_last_ms=1000 * latencies[-1] if latencies else None,
+            reconnect_max_ms=1000 * max(latencies) if latencies else None,
+        )
     
-    def start_communication(self):
-        self._port.write('R'.encode("ascii"))
-        if self._port.read().decode('ascii') == '': self.start_communication()
+    def start_communication(self, attempts: int = 12, timeout: float = 0.25) -> bool:
+        """
+        Ask the master to start, it answers and then sends the configuration. The defaults cover
+        the couple of seconds an Uno spends in its bootloader after the port is opened
+        Args:
+            attempts (int): How many times to ask
+            timeout (float): How long to wait for each answer in seconds
+        Returns:
+            bool: Did the master answer
+        """
+        answer = self._ask(self._port, attempts, timeout)
+        if self._recorder is not None: self._recorder.append(answer)
+        return len(answer) > 0
+
+    @staticmethod
+    def _ask(port, attempts: int = 12, timeout: float = 0.25, stop: Optional[threading.Event] = None) -> bytes:
+        # Send 'R' until the master answers, the first byte of the answer or b"" if it didn't
+        port_timeout = port.timeout
+        port.timeout = timeout
+        try:
+            for _ in range(attempts):
+                if stop is not None and stop.is_set(): break
+                port.write('R'.encode("ascii"))
+                answer = port.read()
+                if answer: return answer
+            return b""
+        finally:
+            port.timeout = port_timeout
     
+    def send_bounds(self, node_id: int, component_type: str, component_id: int, min_value: float, max_value: float, step_size: float):
+        """
+        Send bounds of a component to the master, see doc/Communication
+        """
+        self._bounds[(node_id, component_type, component_id)] = (min_value, max_value, step_size)
+        if not self.connected: return # Sent when the port is back
+        self._port.write(encode_bounds(node_id, component_type, component_id, min_value, max_value, step_size))
+
     def end_communication(self):
-        self._port.write(b'Q')
+        self.stop_recording()
+        if self._reopened is not None: self._reopened.close()
+        if self.connected: self._port.write(b'Q')
         self._port.close()
         print("Port closed")
 
-    def data(self):
-        temp = self._data.copy()
-        return temp
+    def data(self) -> dict:
+        """
+        A copy of the values in the nested form of the old dict frames, data[node_id][component_type][component_id]
+        and data['master'][role]. Use value or changes_since to not copy everything
+        """
+        data = {}
+        for key, value in self.cache.items():
+            if key[0] == "master":
+                data.setdefault("master", {})[key[1]] = value
+            else:
+                node_id, component_type, component_id = key
+                data.setdefault(node_id, {}).setdefault(component_type, {})[component_id] = value
+        return data
+
+
+def replay_session(path: str, speed: Optional[float] = 1.0, crc_key: int = CRC_KEY) -> dict:
+    """
+    Feed a recorded session through SerialReader like it was read from the port
+    Args:
+        path (str): The session log, see SerialReader.record
+        speed (Optional[float]): 1 for real time, 10 for ten times faster, None for as fast as possible
+    Returns:
+        dict: frames, seconds, frames_per_second, and the latency from the recorded arrival to the end of
+            the update as latency_p50_ms, latency_p99_ms and latency_max_ms (not measured at max speed)
+    """
+    log = SessionLog(path)
+    port = SessionReplay(log, speed)
+    reader = SerialReader(crc_key, log.wire_format, port)
+    latencies = []
+    start = time.monotonic()
+    while not port.done:
+        if reader.update(timeout=0.05) and speed is not None:
+            latencies.append(time.monotonic() - port.due)
+    elapsed = time.monotonic() - start
+    frames = reader.stats()["decoded"]
+    result = {"frames": frames, "seconds": elapsed, "frames_per_second": frames / elapsed if elapsed > 0 else 0.0}
+    if latencies:
+        latencies = np.array(latencies) * 1000
+        result.update(
+            latency_p50_ms=float(np.percentile(latencies, 50)),
+            latency_p99_ms=float(np.percentile(latencies, 99)),
+            latency_max_ms=float(latencies.max()),
+        )
+    log.close()
+    return result
+
+
+def read_port_cache(path: Optional[str]) -> Optional[dict]:
+    """
+    The board saved by write_port_cache or None if there is none
+    """
+    if path is None: return None
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached if isinstance(cached, dict) and "device" in cached else None
+
+
+def write_port_cache(path: Optional[str], board: dict) -> None:
+    """
+    Save the device and the usb ids (vid, pid, serial_number) of a board, failures are ignored
+    """
+    if path is None: return
+    try:
+        with open(path, "w") as f:
+            json.dump(board, f)
+    except OSError:
+        pass
+
+
+def component_key(node_id, component_type: str, component_id: int) -> tuple:
+    """
+    The key SerialReader.update uses for a changed component
+    """
+    return (node_id, component_type, component_id)
+
+
+def master_key(role: str) -> tuple:
+    """
+    The key SerialReader.update uses for a changed master component, role is one of MASTER_COMPONENTS values
+    """
+    return ("master", role)
 
 
 if __name__ == "__main__":
-    s = SerialReader()
+    import sys, threading, time
+    if "--replay" in sys.argv:
+        # python SerialReader.py --replay session.log [speed], speed 0 for as fast as possible
+        path = sys.argv[sys.argv.index("--replay") + 1]
+        speed = float(sys.argv[sys.argv.index("--replay") + 2]) if len(sys.argv) > sys.argv.index("--replay") + 2 else 1.0
+        print(replay_session(path, speed or None))
+        sys.exit()
+    s = SerialReader(record=sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv else None)
+    if "--idle-cpu" in sys.argv:
+        # Cpu usage of an update thread while no values change, polling like the old updater vs blocking
+        def measure(timeout, duration = 5.0):
+            running = True
+            def loop():
+                while running: s.update(timeout)
+            thread = threading.Thread(target=loop, daemon=True)
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            thread.start()
+            time.sleep(duration)
+            running = False
+            thread.join()
+            return 100 * (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+        print(f"polling update: {measure(0):5.1f} % cpu")
+        print(f"blocking update: {measure(0.5):5.1f} % cpu")
+        s.end_communication()
+        sys.exit()
     try:
         while True:
-            s.update()
-            print(s.data())
+            if s.update(timeout=1):
+                print(s.data())
     except KeyboardInterrupt: print('quittin')
\ No newline at end of file
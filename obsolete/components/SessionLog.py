@@ -0,0 +1,196 @@
+"""
+Recording and replaying serial sessions.
+
+A session log is an append-only binary file of everything SerialReader read from the port:
+
+| magic  | version | wire format |   then records:   | timestamp | length | data         |
+| "DISL" | uint8   | char t or b |                   | float64   | uint32 | length bytes |
+
+timestamp is time.monotonic() when the data was read, multi byte values are little endian.
+Logs are read through mmap so even long sessions are not loaded to memory.
+SessionReplay plays a log back as a serial port, see SerialReader.replay_session.
+"""
+
+import mmap
+import struct
+import time
+import numpy as np
+from typing import Iterator, Optional, Tuple
+
+MAGIC = b"DISL"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sBc")
+RECORD_HEADER = struct.Struct("<dI")
+
+
+class SessionRecorder:
+    """
+    Appends raw serial data to a session log. The data is flushed to the file every flush_bytes
+    bytes or flush_s seconds, so a crash or an unplug loses at most that much of the session
+    Args:
+        path (str): The log file, created if it doesn't exist
+        wire_format (str): "text" or "binary", the format of the recorded data
+        flush_bytes (int): Flush after this many bytes were appended
+        flush_s (float): Flush when data was appended this many seconds after the previous flush
+    """
+
+    def __init__(self, path: str, wire_format: str = "text", flush_bytes: int = 65536, flush_s: float = 1.0):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.flush_s = flush_s
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(FILE_HEADER.pack(MAGIC, VERSION, wire_format[0].encode("ascii")))
+        self.flush()
+
+    def append(self, data: bytes, timestamp: Optional[float] = None) -> None:
+        """
+        Add data read from the port
+        Args:
+            data (bytes): The raw bytes
+            timestamp (Optional[float]): time.monotonic() of the read, defaults to now
+        """
+        if not data: return
+        self._file.write(RECORD_HEADER.pack(time.monotonic() if timestamp is None else timestamp, len(data)))
+        self._file.write(data)
+        self._unflushed += RECORD_HEADER.size + len(data)
+        if self._unflushed >= self.flush_bytes or time.monotonic() - self._flushed_at >= self.flush_s:
+            self.flush()
+
+    def flush(self) -> None:
+        self._file.flush()
+        self._unflushed = 0 # Bytes appended after the latest flush
+        self._flushed_at = time.monotonic()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class SessionLog:
+    """
+    Reads a session log through mmap
+    Args:
+        path (str): The log file
+    Raises:
+        Exception: The file is not a session log
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, wire_format = FILE_HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise Exception(f"{path} is not a session log")
+        self.wire_format = "binary" if wire_format == b"b" else "text"
+        self.timestamps, self._offsets, self._lengths = self._index()
+
+    def _index(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # One pass over the records, a record cut short by a crash is left out
+        timestamps, offsets, lengths = [], [], []
+        position = FILE_HEADER.size
+        end = len(self._map)
+        while position + RECORD_HEADER.size <= end:
+            timestamp, length = RECORD_HEADER.unpack_from(self._map, position)
+            position += RECORD_HEADER.size
+            if position + length > end: break
+            timestamps.append(timestamp)
+            offsets.append(position)
+            lengths.append(length)
+            position += length
+        return np.array(timestamps), np.array(offsets, dtype=np.int64), np.array(lengths, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, i: int) -> Tuple[float, memoryview]:
+        """
+        Returns:
+            (float, memoryview): The timestamp and the data of a record, the data is not copied
+        """
+        start = int(self._offsets[i])
+        return float(self.timestamps[i]), memoryview(self._map)[start:start + int(self._lengths[i])]
+
+    def __iter__(self) -> Iterator[Tuple[float, memoryview]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def duration(self) -> float:
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self) > 0 else 0.0
+
+    @property
+    def size(self) -> int:
+        """
+        Count of the recorded data bytes
+        """
+        return int(self._lengths.sum())
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class SessionReplay:
+    """
+    Plays a session log back as if it was a serial port, give it to SerialReader as the port.
+    The data is released with the recorded timing divided by speed.
+    Args:
+        log (SessionLog): The log
+        speed (Optional[float]): 1 for real time, 10 for ten times faster, None for as fast as possible
+    """
+
+    def __init__(self, log: SessionLog, speed: Optional[float] = 1.0):
+        self.log = log
+        self.speed = speed
+        self.timeout = None
+        self.due = 0.0 # When the latest data given by read should have arrived
+        self._pending = bytearray()
+        self._pending_due = 0.0
+        self._next = 0
+        self._start = None
+
+    def _due(self, i: int) -> float:
+        if self.speed is None: return self._start
+        return self._start + (self.log.timestamps[i] - self.log.timestamps[0]) / self.speed
+
+    def _release(self):
+        if self._start is None: self._start = time.monotonic()
+        now = time.monotonic()
+        while self._next < len(self.log) and self._due(self._next) <= now:
+            self._pending += self.log[self._next][1]
+            self._pending_due = self._due(self._next)
+            self._next += 1
+
+    @property
+    def done(self) -> bool:
+        """
+        Has all the data been read
+        """
+        return self._next >= len(self.log) and not self._pending
+
+    def inWaiting(self) -> int:
+        self._release()
+        return len(self._pending)
+
+    def read(self, size: int = 1) -> bytes:
+        self._release()
+        if not self._pending and self.timeout != 0 and self._next < len(self.log):
+            wait = self._due(self._next) - time.monotonic()
+            if self.timeout is not None: wait = min(wait, self.timeout)
+            if wait > 0: time.sleep(wait)
+            self._release()
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        if data: self.due = self._pending_due
+        return data
+
+    def write(self, data: bytes) -> int:
+        return len(data) # Commands to the master are ignored
+
+    def isOpen(self) -> bool:
+        return True
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,345 @@
+"""
+A simulated master node for testing the pc side without the hardware.
+
+SimulatedMaster opens a pseudo-terminal (linux, macos) and talks the same serial protocol as
+UniversalNode.ino in master mode, see doc/Communication. Give its port to SerialReader:
+
+    master = SimulatedMaster(nodes=8, rate=1000)
+    master.start()
+    reader = SerialReader(port=master.port)
+
+Handled commands from the pc:
+    R, S: start, the master answers 'R', sends the node info (N) of every node, 'O' and the initial values
+    W: 1 for binary frames, 0 for text lines
+    B: bounds for a component, nId:compType:compId:minValue:maxValue:stepSize read up to the newline
+       like handleBoundsSerial, a dataString longer than BOUNDS_SIZE or with missing fields is ignored
+    Q: quit, values are not sent until the next start
+The simulated nodes turn their components randomly and the master writes the values (V) at
+the given rate. disconnect and connect imitate the D and C messages, unplug and plug a lost usb cable.
+"""
+
+import os, sys
+p = os.path.abspath('.')
+sys.path.insert(1, p)
+
+import select
+import threading
+import time
+import tty
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from desdeo_interface.components.CRC8 import CRC_KEY
+from desdeo_interface.components.SerialReader import MASTER_ID, NODE_TYPES
+from desdeo_interface.components.WireFormat import BOUNDS_SIZE, encode_frame, encode_text, encode_value
+
+MASTER_COMPONENTS = [("B", 0), ("B", 1), ("R", 0)]
+COUNTER_RANGE = 65536 # Rotary encoders report a wrapping 16-bit counter
+
+
+class SimulatedMaster:
+    """
+    Imitates the master and its nodes on a pseudo-terminal
+    Args:
+        nodes (int): Count of the nodes besides the master
+        rate (float): Component values written per second after the configuration
+        node_types (Optional[Sequence[int]]): NodeType of each node, by default potentiometers and rotary encoders alternate
+        crc_key (int): Key for the crc8 checksums
+        seed (int): Seed for the random turns
+    """
+
+    def __init__(
+        self,
+        nodes: int = 4,
+        rate: float = 100.0,
+        node_types: Optional[Sequence[int]] = None,
+        crc_key: int = CRC_KEY,
+        seed: int = 0,
+    ):
+        if node_types is None:
+            node_types = [2 if i % 2 == 0 else 3 for i in range(nodes)]
+        if len(node_types) != nodes:
+            raise Exception("Give a node type for each node")
+        self.rate = rate
+        self.node_types = {node_id: node_types[node_id - 1] for node_id in range(1, nodes + 1)}
+        self.crc_key = crc_key
+        self.binary = False
+        self.running = False # Is the configuration done and values being sent
+        self.bounds: Dict[Tuple[int, str, int], Tuple[float, float, float]] = {}
+        self.ignored = 0 # Count of the bounds commands the firmware would ignore
+        self.sent = 0 # Count of the component values written
+        self._rng = np.random.default_rng(seed)
+        self._components = self._create_components()
+        self._values = np.zeros(len(self._components))
+        self._input = bytearray()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = False
+        self._fd, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+    def _create_components(self) -> List[Tuple[int, str, int]]:
+        components = [(MASTER_ID, t, c) for t, c in MASTER_COMPONENTS]
+        for node_id, node_type in self.node_types.items():
+            pots, rots, buttons = NODE_TYPES.get(node_type, (0, 0, 0))
+            components += [(node_id, "P", i) for i in range(pots)]
+            components += [(node_id, "R", i) for i in range(rots)]
+            components += [(node_id, "B", i) for i in range(buttons)]
+        return components
+
+    def start(self):
+        """
+        Start answering in a background thread
+        """
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the thread and close the pseudo-terminal
+        """
+        self._stop = True
+        if self._thread is not None:
+            self._thread.join()
+        self._close()
+
+    def _close(self):
+        if self._fd is None: return
+        os.close(self._fd)
+        os.close(self._slave)
+        self._fd = self._slave = None
+
+    def unplug(self):
+        """
+        Imitate pulling the usb cable: the port disappears and the master forgets the bounds and the wire format
+        """
+        with self._lock:
+            self.running = False
+            self.binary = False
+            self.bounds = {}
+            self._input = bytearray()
+            self._close()
+
+    def plug(self):
+        """
+        Plug the cable back, the master waits for a start like after a reset. The port is a new
+        pseudo-terminal so self.port changes
+        """
+        with self._lock:
+            self._fd, self._slave = os.openpty()
+            tty.setraw(self._slave)
+            self.port = os.ttyname(self._slave)
+
+    def disconnect(self, node_id: int, direction: int = 0):
+        """
+        Imitate a node disconnecting, its values are not sent anymore
+        """
+        with self._lock:
+            self.node_types.pop(node_id, None)
+            self._components = [c for c in self._components if c[0] != node_id]
+            self._values = np.zeros(len(self._components))
+            self._write(self._message("D", f"{node_id}:{direction}"))
+
+    def connect(self, node_id: int, node_type: int):
+        """
+        Imitate a node connecting, the pc is expected to restart the configuration
+        """
+        with self._lock:
+            self.node_types[node_id] = node_type
+            self._write(self._message("C"))
+
+    def _run(self):
+        next_send = time.monotonic()
+        while not self._stop:
+            timeout = max(0.0, next_send - time.monotonic()) if self.running else 0.1
+            try:
+                readable, _, _ = select.select([self._fd], [], [], timeout)
+            except (OSError, TypeError, ValueError): # Unplugged
+                time.sleep(timeout)
+                continue
+            if readable:
+                try:
+                    self._input += os.read(self._fd, 1024)
+                except (OSError, TypeError): # The pc side closed the port or unplugged
+                    continue
+                self._handle_input()
+            if not self.running:
+                continue
+            now = time.monotonic()
+            due = int((now - next_send) * self.rate) + 1 if now >= next_send else 0
+            if due > 0:
+                with self._lock:
+                    self._write(b"".join(self._turn() for _ in range(min(due, 1000))))
+                next_send += due / self.rate
+                if now - next_send > 1: next_send = now # Don't try to catch up after a stall
+
+    def _handle_input(self):
+        buf = self._input
+        while buf:
+            command = chr(buf[0])
+            if command in "RS":
+                del buf[0]
+                self._configure()
+            elif command == "Q":
+                del buf[0]
+                self.running = False
+                self.binary = False
+            elif command == "W":
+                if len(buf) < 2: return # Wait for the rest of the message
+                self.binary = buf[1:2] == b"1"
+                del buf[:2]
+            elif command == "B":
+                # readBytesUntil('\n', input, SERIAL_SIZE), then the rest of a longer command is skipped
+                end = buf.find(b"\n", 1, BOUNDS_SIZE + 2)
+                if end < 0:
+                    end = buf.find(b"\n")
+                    if end < 0: return # Wait for the rest of the message
+                    del buf[:end + 1]
+                    self.ignored += 1
+                    continue
+                body = bytes(buf[1:end]).decode("ascii", "replace")
+                del buf[:end + 1]
+                self._set_bounds(body)
+            else:
+                del buf[0] # Unknown commands and line endings are ignored like in the firmware
+
+    def _configure(self):
+        with self._lock:
+            self.running = False
+            self._components = self._create_components()
+            self._write(b"R\n") # Answer to the handshake
+            for node_id, node_type in self.node_types.items():
+                self._write(self._message("N", f"{node_id}:{node_type}:{node_id}"))
+            self._write(self._message("O"))
+            self._values = np.zeros(len(self._components))
+            self._write(b"".join(self._value(i) for i in range(len(self._components))))
+            self.running = True
+
+    def _set_bounds(self, body: str):
+        fields = body.split(":") # strtok, the fields after the sixth are not read
+        try:
+            node_id, component_type, component_id, min_value, max_value, step_size = fields[:6]
+            key = (int(node_id), component_type[0], int(component_id))
+            self.bounds[key] = (float(min_value), float(max_value), float(step_size))
+        except (ValueError, IndexError): # Missing fields, atoi and atof would give garbage
+            self.ignored += 1
+
+    def _turn(self) -> bytes:
+        # Move a random component and return its value message
+        i = int(self._rng.integers(len(self._components)))
+        _, component_type, _ = self._components[i]
+        if component_type == "P":
+            self._values[i] = np.clip(self._values[i] + self._rng.integers(-8, 9), 0, 1023)
+        elif component_type == "R":
+            self._values[i] = (self._values[i] + self._rng.choice((-1, 1))) % COUNTER_RANGE
+        else:
+            self._values[i] = 1 - self._values[i]
+        return self._value(i)
+
+    def _value(self, i: int) -> bytes:
+        node_id, component_type, component_id = self._components[i]
+        value = float(self._values[i])
+        bounds = self.bounds.get(self._components[i])
+        if bounds is not None:
+            value = min(max(value, bounds[0]), bounds[1])
+        self.sent += 1
+        if self.binary:
+            return encode_value(node_id, component_type, component_id, value, self.crc_key)
+        return encode_text(f"V {node_id}:{component_type}:{component_id}:{value:.5f}", self.crc_key)
+
+    def _message(self, command: str, body: str = "") -> bytes:
+        if self.binary:
+            return encode_frame(command, body.encode("ascii"), self.crc_key)
+        if not body:
+            return f"{command}\n".encode("ascii") # Bare ids are sent without a checksum
+        return encode_text(f"{command} {body}", self.crc_key)
+
+    def _write(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self._fd, view)
+            except BlockingIOError:
+                select.select([], [self._fd], [])
+                continue
+            view = view[written:]
+
+
+# Load test of the pc side: SerialReader reading a simulated master as fast as it can
+if __name__ == "__main__":
+    from desdeo_interface.components.SerialReader import SerialReader
+
+    nodes, rate, duration = 16, 5000, 5.0
+    wire_format = "binary" if "--binary" in sys.argv else "text"
+    if "--reconnect" in sys.argv:
+        # Unplug the master for outage seconds and measure how long the reader takes to get it back.
+        # The reader opens a symlink which disappears and comes back pointing to the new pseudo-terminal like with udev
+        import tempfile
+        outage = 0.3
+        master = SimulatedMaster(4, 100)
+        master.start()
+        link = os.path.join(tempfile.mkdtemp(), "ttySIM")
+        os.symlink(master.port, link)
+        reader = SerialReader(wire_format=wire_format, port=link)
+        reader.wait_configured()
+        # Several bounds with long floats, replayed back to back after each reconnect
+        bounds = {(1, "P", 0): (100, 900, 1), (2, "R", 0): (-1 / 3, 2 ** 0.5 * 1000, 0.1 + 0.2),
+                  (3, "P", 0): (0.123456789123, 1023.987654321, 0.000123456789), (MASTER_ID, "R", 0): (-1e-30, 1e30, 1 / 7)}
+        for key, (min_value, max_value, step_size) in bounds.items():
+            reader.send_bounds(*key, min_value, max_value, step_size)
+        expected = {key: tuple(float(f"{value:.7g}") for value in values) for key, values in bounds.items()}
+        for attempt in range(3):
+            end = time.monotonic() + 0.5
+            while time.monotonic() < end: reader.update(0.1)
+            master.unplug()
+            os.remove(link)
+            unplugged = time.monotonic()
+            while reader.connected: reader.update(0.1)
+            time.sleep(max(0.0, outage - (time.monotonic() - unplugged)))
+            master.plug()
+            os.symlink(master.port, link)
+            plugged = time.monotonic()
+            while len(reader.reconnect_latencies) <= attempt: reader.update(0.1) # Until the bounds are sent again
+            end = time.monotonic() + 0.5
+            while master.bounds != expected and time.monotonic() < end: reader.update(0.01) # Let the master read the bounds
+            print(f"back {(time.monotonic() - plugged) * 1000:.0f} ms after plugging in, "
+                  f"{reader.reconnect_latencies[-1] * 1000:.0f} ms after unplugging, "
+                  f"bounds sent again: {master.bounds == expected}, ignored by the master: {master.ignored}")
+        print({key: value for key, value in reader.stats().items() if "reconnect" in key})
+        reader.end_communication()
+        master.stop()
+        sys.exit()
+    if "--startup" in sys.argv:
+        # Start up time when the board is found from the port cache, phases in ms
+        import tempfile
+        from desdeo_interface.components.SerialReader import write_port_cache
+        master = SimulatedMaster(nodes, rate)
+        master.start()
+        cache = os.path.join(tempfile.mkdtemp(), "port.json")
+        write_port_cache(cache, {"device": master.port})
+        for _ in range(5):
+            start = time.perf_counter()
+            reader = SerialReader(wire_format=wire_format, port_cache=cache)
+            reader.wait_configured()
+            total = time.perf_counter() - start
+            print(f"{len(reader.components())} components in {total * 1000:.1f} ms:",
+                  {phase: round(seconds * 1000, 1) for phase, seconds in reader.timings.items()})
+            reader.end_communication()
+        master.stop()
+        sys.exit()
+    master = SimulatedMaster(nodes, rate)
+    master.start()
+    reader = SerialReader(port=master.port, wire_format=wire_format)
+    changes = 0
+    start = time.monotonic()
+    sent_at_start = master.sent
+    while time.monotonic() - start < duration:
+        changes += len(reader.update(timeout=0.1))
+    elapsed = time.monotonic() - start
+    stats = reader.stats()
+    print(f"{wire_format}: master sent {(master.sent - sent_at_start) / elapsed:.0f} values/s, "
+          f"reader decoded {stats['decoded'] / elapsed:.0f} frames/s, dropped {stats['dropped']}, {changes / elapsed:.0f} changes/s")
+    reader.end_communication()
+    master.stop()
@@ -0,0 +1,131 @@
+import os
+import shutil
+import sys
+import threading
+import time
+from typing import Optional, TextIO
+
+
+class TerminalRenderer:
+    """
+    Draws the latest text of an interaction primitive over the previous one from a background
+    thread at most fps times per second. show only saves the text, so the input loop never waits
+    on the terminal however slow it is, and the text is redrawn only when it changes.
+    Text with many lines is drawn over the same lines on a terminal, other streams get each
+    drawn text on new lines.
+    Args:
+        fps (float): Maximum redraws per second
+        stream (Optional[TextIO]): Where to draw, defaults to sys.stdout
+    """
+
+    def __init__(self, fps: float = 20.0, stream: Optional[TextIO] = None):
+        self.interval = 1 / fps
+        self.stream = stream
+        self.shows = 0 # Count of calls to show
+        self.frames = 0 # Count of redraws
+        self._text = None # The latest text
+        self._drawn = None # The text on the screen
+        self._lines = 0 # Rows of the terminal the text on the screen takes, long lines wrap to many
+        self._last_draw = 0.0
+        self._draw_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._closed = False
+
+    def show(self, text: str) -> None:
+        """
+        Set the text to draw, returns immediately
+        """
+        self._text = text
+        self.shows += 1
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            wait = self._last_draw + self.interval - time.monotonic()
+            if wait > 0: time.sleep(wait) # Texts shown meanwhile are skipped
+            self._draw()
+
+    def _draw(self):
+        with self._draw_lock:
+            text = self._text
+            if text is None or text == self._drawn: return
+            stream = self.stream or sys.stdout
+            if getattr(stream, "isatty", lambda: False)():
+                up = f"\x1b[{self._lines - 1}A" if self._lines > 1 else ""
+                stream.write(f"{up}\r\x1b[J{text}") # Back to the first line of the old text, clear it and draw
+            else:
+                stream.write(f"{text}\n")
+            stream.flush()
+            self._drawn = text
+            self._lines = rows(text, terminal_columns(stream))
+            self._last_draw = time.monotonic()
+            self.frames += 1
+
+    def finish(self) -> None:
+        """
+        Draw the latest text right away and move below it, the next text starts on a new line
+        """
+        self._draw()
+        with self._draw_lock:
+            stream = self.stream or sys.stdout
+            if self._drawn is not None and getattr(stream, "isatty", lambda: False)():
+                stream.write("\n")
+                stream.flush()
+            self._text = self._drawn = None
+            self._lines = 0
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+
+
+def rows(text: str, columns: int) -> int:
+    """
+    How many rows of a terminal columns wide the text takes when its long lines wrap
+    """
+    columns = max(columns, 1)
+    return sum(max(1, -(-len(line) // columns)) for line in text.split("\n"))
+
+
+def terminal_columns(stream: TextIO) -> int:
+    """
+    Width of the terminal the stream draws to, the size of the terminal of stdout (or the
+    default 80) when the stream has no terminal
+    """
+    try:
+        return os.get_terminal_size(stream.fileno()).columns
+    except (AttributeError, ValueError, OSError):
+        return shutil.get_terminal_size().columns
+
+
+# A primitive style loop drawing to a slow terminal, directly and through the renderer
+if __name__ == "__main__":
+    import io
+
+    class SlowStream(io.StringIO):
+        # A console that takes 2 ms per write
+        def write(self, s):
+            time.sleep(0.002)
+            return super().write(s)
+
+    def loop(draw, duration=1.0):
+        iterations = 0
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            draw(f"Currently chosen {iterations // 100}\nvalues [{iterations // 1000} 0.5 0.25]")
+            iterations += 1
+        return iterations
+
+    stream = SlowStream()
+    direct = loop(lambda text: (stream.write(text + "\r"), stream.flush()))
+    renderer = TerminalRenderer(stream=SlowStream())
+    rendered = loop(renderer.show)
+    renderer.finish()
+    print(f"print_over directly: {direct} loop iterations/s, through the renderer: {rendered} iterations/s "
+          f"with {renderer.frames} redraws")
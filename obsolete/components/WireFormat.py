@@ -0,0 +1,234 @@
+"""
+Binary frames for the serial communication between the master and the pc.
+
+A frame looks like this, multi byte values are little endian:
+
+| sync | length | version | command | payload            | crc8 |
+| 0xA5 | uint8  | uint8   | char    | length - 2 bytes   | uint8 |
+
+length is the count of bytes from version to the end of the payload and the crc8 checksum
+is calculated over the bytes from length to the end of the payload.
+A component value ('V') has a fixed width payload:
+
+| node id | component type | component id | value   |
+| uint8   | char           | uint8        | float32 |
+
+Other commands (N, D, C, O) carry the same dataString as in the text format,
+see doc/Communication, as their payload.
+
+The text format, "ID dataString CRC" lines and the old "{dict}CRC" lines, is still supported.
+"""
+
+import os, sys
+p = os.path.abspath('.')
+sys.path.insert(1, p)
+
+import ast
+import struct
+from typing import List, Optional, Tuple
+
+from desdeo_interface.components.CRC8 import CRC_KEY, crc8, get_lookup_table
+from desdeo_interface.components.FrameParser import FrameParser
+
+SYNC = 0xA5
+VERSION = 1
+
+HEADER = struct.Struct("<BBBc")  # sync, length, version, command
+VALUE = struct.Struct("<BcBf")  # node id, component type, component id, value
+VALUE_FRAME_SIZE = HEADER.size + VALUE.size + 1
+BOUNDS_SIZE = 64  # Longest dataString of a bounds command the master reads, SERIAL_SIZE in UniversalNode.ino
+
+
+def encode_frame(command: str, payload: bytes = b"", key: int = CRC_KEY) -> bytes:
+    """
+    Build a binary frame
+
+    Args:
+        command (str): The packet id, i.e. 'V'
+        payload (bytes): The payload of the frame
+        key (int): The crc key
+
+    Returns:
+        bytes: The frame
+    """
+    body = HEADER.pack(SYNC, len(payload) + 2, VERSION, command.encode("ascii")) + payload
+    return body + bytes((crc8(body[1:], key),))
+
+
+def encode_value(node_id: int, component_type: str, component_id: int, value: float, key: int = CRC_KEY) -> bytes:
+    """
+    Build a binary component value frame
+
+    Returns:
+        bytes: The frame
+    """
+    payload = VALUE.pack(node_id, component_type.encode("ascii"), component_id, value)
+    return encode_frame("V", payload, key)
+
+
+def encode_bounds(node_id: int, component_type: str, component_id: int, min_value: float, max_value: float, step_size: float) -> bytes:
+    """
+    Build a bounds command for the master. The master reads it up to the newline and keeps the values as
+    floats, so they are written with 7 significant digits to fit BOUNDS_SIZE
+
+    Raises:
+        Exception: The command doesn't fit BOUNDS_SIZE
+
+    Returns:
+        bytes: The command
+    """
+    data = f"{node_id}:{component_type}:{component_id}:{min_value:.7g}:{max_value:.7g}:{step_size:.7g}"
+    if len(data) > BOUNDS_SIZE:
+        raise Exception(f"Bounds command {data} is longer than {BOUNDS_SIZE} characters")
+    return f"B{data}\n".encode("ascii")
+
+
+def encode_text(payload: str, key: int = CRC_KEY) -> bytes:
+    """
+    Build a text frame like the master writes it in the text format
+
+    Args:
+        payload (str): i.e. "V 254:R:0:12.00000" or "{'master': {...}}"
+
+    Returns:
+        bytes: The frame with the crc checksum and line ending
+    """
+    data = payload.encode("ascii")
+    separator = b"" if payload.endswith("}") else b" "
+    return data + separator + str(crc8(data, key)).encode("ascii") + b"\r\n"
+
+
+class BinaryFrameParser(FrameParser):
+    """
+    A streaming parser for binary frames. Has the same interface as FrameParser:
+    frames() returns the command followed by the payload of every valid frame.
+    Bytes before a sync byte are skipped and frames with an invalid checksum are dropped.
+
+    Args:
+        crc_key (int): Key for the crc8 checksums, has to be the same as on the arduino side
+    """
+
+    def __init__(self, crc_key: int = CRC_KEY, max_buffer: int = 4096):
+        super().__init__(crc_key, bytes((SYNC,)), max_buffer)
+        self._table = get_lookup_table(crc_key).tobytes()
+
+    def _parse(self) -> List[bytes]:
+        table = self._table
+        buf = self._buffer
+        found = []
+        start = 0
+        n = len(buf)
+        with memoryview(buf) as view:
+            while True:
+                start = buf.find(SYNC, start)
+                if start < 0:  # Only noise in the buffer
+                    start = n
+                    break
+                if start + 2 > n:
+                    break
+                length = buf[start + 1]
+                end = start + 2 + length  # Index of the crc byte
+                if end >= n:  # Frame not complete yet
+                    break
+                crc = 0
+                for byte in view[start + 1:end]:
+                    crc = table[crc ^ byte]
+                if length < 2 or buf[start + 2] != VERSION or crc != buf[end]:
+                    # Not a frame or a corrupted one, look for the next sync byte
+                    self.mark_dropped()
+                    start += 1
+                    continue
+                found.append(bytes(view[start + 3:end]))
+                self.decoded += 1
+                self._window_decoded += 1
+                start = end + 1
+        if start > 0:
+            del buf[:start]
+        self._update_rates()
+        return found
+
+
+def _parse_fields(command: str, body: str) -> Tuple[str, tuple]:
+    """
+    Parse the dataString of a message, see doc/Communication
+
+    Returns:
+        (str, tuple): The command and the fields of the message
+    """
+    if command == "V":
+        node_id, component_type, component_id, value = body.split(":")
+        return command, (int(node_id), component_type, int(component_id), float(value))
+    if command == "N":
+        node_id, node_type, pos = body.split(":")
+        return command, (int(node_id), int(node_type), pos)
+    if command == "D":
+        node_id, direction = body.split(":")
+        return command, (int(node_id), int(direction))
+    return command, ()
+
+
+def decode_text(payload: bytes) -> Optional[Tuple[str, object]]:
+    """
+    Decode a text frame returned by FrameParser
+
+    Args:
+        payload (bytes): The frame without the checksum
+
+    Returns:
+        Optional[(str, object)]: The command and its fields. Old dict frames are returned as ('{', dict)
+    """
+    text = payload.decode("ascii").strip()
+    if not text:
+        return None
+    if text[0] == "{":
+        return "{", ast.literal_eval(text)
+    return _parse_fields(text[0], text[1:].strip())
+
+
+def decode_binary(payload: bytes) -> Tuple[str, object]:
+    """
+    Decode a binary frame returned by BinaryFrameParser
+
+    Args:
+        payload (bytes): The command followed by the payload of the frame
+
+    Returns:
+        (str, object): The command and its fields
+    """
+    command = chr(payload[0])
+    if command == "V":
+        node_id, component_type, component_id, value = VALUE.unpack_from(payload, 1)
+        return command, (node_id, component_type.decode("ascii"), component_id, value)
+    return _parse_fields(command, payload[1:].decode("ascii").strip())
+
+
+# Benchmark the text and binary formats
+if __name__ == "__main__":
+    import time
+
+    updates = 20000
+    values = [(i % 8, "PRB"[i % 3], i % 2, (i * 7) % 1024) for i in range(updates)]
+
+    # The old text format sends the whole state as a dict
+    state = {"master": {"Accept": 0, "Decline": 0, "Rotary": 0}}
+    dict_stream = bytearray()
+    for node_id, component_type, component_id, value in values:
+        state.setdefault(node_id, {}).setdefault(component_type, {})[component_id] = value
+        dict_stream += encode_text(str(state))
+    line_stream = b"".join(encode_text(f"V {n}:{t}:{c}:{v:.5f}") for n, t, c, v in values)
+    binary_stream = b"".join(encode_value(*v) for v in values)
+
+    def run(name, stream, parser, decode):
+        start = time.perf_counter()
+        # Feed in chunks of 64 bytes like the usb serial would
+        for i in range(0, len(stream), 64):
+            parser.feed(stream[i:i + 64])
+            for frame in parser.frames():
+                decode(frame)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12}: {parser.decoded / elapsed:10.0f} frames/s, {len(stream) / updates:6.1f} bytes/update, "
+              f"{9600 / 10 / (len(stream) / updates):6.1f} updates/s at 9600 baud")
+
+    run("text dict", dict_stream, FrameParser(), decode_text)
+    run("text V", line_stream, FrameParser(), decode_text)
+    run("binary", binary_stream, BinaryFrameParser(), decode_binary)
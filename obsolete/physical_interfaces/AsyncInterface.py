@@ -0,0 +1,302 @@
+import os, sys
+p = os.path.abspath('.')
+sys.path.insert(1, p)
+from desdeo_interface.components.Master import Master
+from desdeo_interface.components.AsyncSerialReader import AsyncSerialReader
+from desdeo_interface.components.ChangeNotifier import AsyncChangeNotifier
+from desdeo_interface.physical_interfaces.Interface import Interface
+
+from desdeo_problem.Problem import MOProblem
+import asyncio
+import functools
+import time
+import numpy as np
+from typing import Optional, List, Sequence, Tuple
+
+
+class AsyncInterface(Interface):
+    """
+    An interface with awaitable versions of the interaction primitives. No threads are used,
+    the serial port is read by the event loop so one loop can handle the physical interface,
+    solvers and other ui at the same time.
+    Each primitive takes an optional timeout in seconds, asyncio.TimeoutError is raised if
+    the DM doesn't finish in time. The primitives can also be cancelled like any task.
+    Args:
+        problem (MOProblem): The problem
+        handle_objectives (bool): Assign the components to objectives, if False to variables
+        loop (Optional[asyncio.AbstractEventLoop]): The event loop, defaults to the running loop
+        ports (Optional[Sequence[str]]): The serial ports of the boards, see Interface
+        start (bool): Start reading the port, False when created outside the loop (see create)
+    Note:
+        The constructor blocks until the boards are configured, use create in a running loop
+    """
+
+    def __init__(
+        self,
+        problem: MOProblem,
+        handle_objectives: bool = True,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        ports: Optional[Sequence[str]] = None,
+        start: bool = True,
+    ):
+        self._setup(problem, ports, AsyncChangeNotifier(), Master()) # Waiting is done here, not in the master
+        self._gesture_timer = None
+        self._loop = loop if loop is not None else asyncio.get_running_loop()
+        self.construct(handle_objectives)
+        self.async_reader = AsyncSerialReader(self.serial_reader, self._on_change, self._loop)
+        if start: self.start()
+
+    @classmethod
+    async def create(
+        cls,
+        problem: MOProblem,
+        handle_objectives: bool = True,
+        ports: Optional[Sequence[str]] = None,
+    ) -> "AsyncInterface":
+        """
+        Create the interface from a running event loop. Opening the boards and waiting for their
+        configuration blocks, so it is done in the default executor while the loop keeps running
+        Args:
+            see AsyncInterface
+        Returns:
+            AsyncInterface: A started interface
+        """
+        loop = asyncio.get_running_loop()
+        interface = await loop.run_in_executor(
+            None, functools.partial(cls, problem, handle_objectives, loop, ports, start=False)
+        )
+        interface.start()
+        return interface
+
+    def start(self):
+        """
+        Start reading the port in the event loop
+        """
+        self.async_reader.start()
+
+    def _on_change(self, changed):
+        self.feed_gestures()
+        self._seq, changes = self.serial_reader.changes_since(self._seq)
+        changed = self.apply_changes(changes)
+        if changed: self.notifier.publish(changed)
+        self._schedule_gestures()
+
+    def _schedule_gestures(self):
+        # Poll the gesture timers when the next click or hold is due
+        if self._gesture_timer is not None: self._gesture_timer.cancel()
+        self._gesture_timer = None
+        deadline = self.gestures.next_deadline()
+        if deadline is None: return
+        self._gesture_timer = self._loop.call_later(max(0.0, deadline - time.monotonic()), self._poll_gestures)
+
+    def _poll_gestures(self):
+        self._gesture_timer = None
+        self.gestures.poll()
+        self._schedule_gestures()
+
+    async def confirmation(self, to_print: str = None, timeout: Optional[float] = None) -> bool:
+        """
+        wait for the DM to confirm or decline with a button press
+        Args:
+            to_print (str): Guide text to print
+            timeout (Optional[float]): Maximum time to wait in seconds
+        Returns:
+            bool: true in confirmed, false if declined
+        """
+        if to_print is not None: print(to_print)
+        return await asyncio.wait_for(self._confirm(), timeout)
+
+    async def _confirm(self) -> bool:
+        with self.primitive():
+            version = self.notifier.version
+            while True:
+                answer = self.master.answer()
+                if answer is not None: return answer
+                version = await self.notifier.wait(version, self.master.button_keys)
+
+    async def choose_from(self, options: np.ndarray, index_start: int = 0, timeout: Optional[float] = None) -> Tuple[int, object]:
+        """
+        Let the dm choose an option from a given list by scrolling through different options with buttons
+        Args:
+            options (str): The list of chooseable options
+            index_start (int): The starting index of the search
+            timeout (Optional[float]): Maximum time to wait in seconds
+        Raises:
+            Exception: index_start is not a valid starting index. It is not between 0 and len(options) - 1
+        Returns:
+            (int, object): A tuple of the index of the option and the option from the array
+        """
+        if len(options) <= 0:
+            raise Exception("No options to choose from")
+
+        index_max = len(options)
+        if (index_start < 0 or index_start > index_max):
+            raise Exception("Starting index out of bounds")
+
+        self.master.wheel.current_value = index_start
+        return await asyncio.wait_for(self._choose_from(options, index_max), timeout)
+
+    async def _choose_from(self, options, index_max):
+        keys = self.master.wheel_keys + self.master.button_keys
+        with self.primitive():
+            version = self.notifier.version
+            while True:
+                current = self.master.select(0, index_max)
+                self.print_over(f"Currently chosen {current}/{index_max - 1}: {options[current]}")
+                if self.master.confirmed(): break
+                version = await self.notifier.wait(version, keys)
+            self.renderer.finish()
+        return current, options[current]
+
+    async def choose_multiple(
+        self, options: np.ndarray, min_options: int = 1, max_options: int = None, timeout: Optional[float] = None
+    ) -> List[List]:
+        """
+        Let the dm choose multiple options, see Interface.choose_multiple
+        Args:
+            timeout (Optional[float]): Maximum time for the whole selection in seconds
+        """
+        if max_options is None:
+            max_options = len(options) # choose all options from the list if wished so
+        if max_options > len(options):
+            raise Exception("Can't choose more options than available")
+        return await asyncio.wait_for(self._choose_multiple(options, min_options, max_options), timeout)
+
+    async def _choose_multiple(self, options, min_options, max_options):
+        selected_options = []
+        options_temp = options
+        with self.primitive(): # The nested primitives don't record the latency
+            while (True):
+                too_much = len(selected_options) >= max_options
+                enough = len(selected_options) >= min_options
+
+                if too_much:
+                    print("Maximun options chosen")
+                    break
+
+                if enough: # Don't ask for confirmation until min value reached
+                    if not await self.confirmation("If you wish to add a new solution click the confirm button, if not decline"):
+                        break
+
+                option_temp = await self.choose_from(options_temp)
+                options_temp = np.delete(options_temp, option_temp[0], 0) # Delete the option from the array so it won't be picked again
+                option = (np.where(options == option_temp[1])[0][0], option_temp[1]) # Fix the index, TEMP
+                selected_options.append(option)
+                print(f"Current selection: {selected_options}")
+
+        return selected_options
+
+    async def choose_value(
+        self, index_min: float = 0, index_max: float = 100, step: float = 1, timeout: Optional[float] = None
+    ) -> float:
+        """
+        Let the dm choose an number from a given range, see Interface.choose_value
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds
+        """
+        if (index_min >= index_max):
+            raise Exception("index_min is not lower than index_max")
+
+        if (step <= 0):
+            raise Exception("Step size must a positive number greater than zero")
+
+        if ((index_max - index_min) % step != 0):
+            raise Exception("Step size is invalid, won't reach min or max values")
+
+        return await asyncio.wait_for(self._choose_value(index_min, index_max), timeout)
+
+    async def _choose_value(self, index_min, index_max):
+        keys = self.master.wheel_keys + self.master.button_keys
+        with self.primitive():
+            version = self.notifier.version
+            while True:
+                current = self.master.select(index_min, index_max)
+                self.print_over(f"Currently chosen {current}")
+                if self.master.confirmed(): break
+                version = await self.notifier.wait(version, keys)
+            self.renderer.finish()
+        return current
+
+    async def get_values(self, bounds: np.ndarray, step_size = 0.05, int_values = False, timeout: Optional[float] = None):
+        """
+        Let the dm set a value for each target until the confirm button is pressed
+        Args:
+            bounds (np.ndarray): Lower bounds on the first row, upper bounds on the second
+            timeout (Optional[float]): Maximum time to wait in seconds
+        """
+        return await asyncio.wait_for(self._get_values(bounds, step_size, int_values), timeout)
+
+    async def _get_values(self, bounds, step_size, int_values):
+        with self.primitive():
+            version = self.notifier.version
+            while True:
+                values = self.scale_values(bounds, step_size, int_values)
+                self.print_over(values)
+                if self.master.confirmed(): break
+                version = await self.notifier.wait(version, self.target_keys())
+            self.renderer.finish()
+            print("OK!")
+        return values
+
+    async def get_variable_values(self, timeout: Optional[float] = None):
+        """
+        Let the dm set a value for each variable until the confirm button is pressed
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds
+        """
+        return await asyncio.wait_for(self._get_variable_values(), timeout)
+
+    async def _get_variable_values(self):
+        with self.primitive():
+            version = self.notifier.version
+            while True:
+                values = list(map(lambda var: self.get_variable_value(var), self.problem.variables))
+                self.print_over(values)
+                if self.master.confirmed(): break
+                version = await self.notifier.wait(version, self.target_keys())
+            self.renderer.finish()
+        return values
+
+    def update(self):
+        raise Exception("AsyncInterface is updated by the event loop")
+
+    def close(self):
+        """
+        Stop reading the port and end the communication with the master
+        """
+        self._running = False
+        if self._gesture_timer is not None: self._gesture_timer.cancel()
+        self.async_reader.stop()
+        self.serial_reader.end_communication()
+        self.renderer.close()
+
+
+if __name__ == "__main__":
+    # Handle the physical interface while something else runs in the same loop
+    from desdeo_problem.Objective import _ScalarObjective
+    from desdeo_problem import variable_builder
+
+    objectives = [_ScalarObjective(f"f{i}", lambda x: x[:, 0]) for i in range(2)]
+    for o in objectives:
+        o.lower_bound, o.upper_bound = 0, 1
+    variables = variable_builder(["x"], [0.5], [0], [1])
+    problem = MOProblem(objectives=objectives, variables=variables)
+
+    async def ticker():
+        while True:
+            await asyncio.sleep(1)
+            print("\nStill responsive")
+
+    async def main():
+        interface = await AsyncInterface.create(problem)
+        tick = asyncio.create_task(ticker())
+        try:
+            print("Give values, you have 30 seconds")
+            values = await interface.get_values(np.array([[0, 0], [1, 1]]), timeout=30)
+            print(f"Got {values}")
+        except asyncio.TimeoutError:
+            print("Too slow")
+        tick.cancel()
+        interface.close()
+
+    asyncio.run(main())
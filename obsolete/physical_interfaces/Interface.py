@@ -4,17 +4,26 @@ sys.path.insert(1, p)
 from desdeo_interface.components.Master import Master
 from desdeo_interface.components.Button import Button
 from desdeo_interface.components.Potentiometer import Potentiometer
-from desdeo_interface.components.RotaryEncoder import RotaryEncoder
+from desdeo_interface.components.RotaryEncoder import RotaryEncoder, default_acceleration
 from desdeo_interface.components.Component import Component
-from desdeo_interface.components.SerialReader import SerialReader
+from desdeo_interface.components.SerialReader import SerialReader, master_key
+from desdeo_interface.components.ReaderPool import ReaderPool
+from desdeo_interface.components.ChangeNotifier import ChangeNotifier
+from desdeo_interface.components.ComponentStore import ComponentStore
+from desdeo_interface.components.AnalogFilter import AnalogFilterBank
+from desdeo_interface.components.ButtonGestures import GestureRecognizer
+from desdeo_interface.components.TerminalRenderer import TerminalRenderer
+from desdeo_interface.components.Latency import LATENCY
 
 from desdeo_problem.Variable import Variable
 from desdeo_problem.Problem import MOProblem
 import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from time import sleep
 import time
 import numpy as np
-from typing import Union, Optional, List, Tuple, Any
+from typing import Union, Optional, List, Sequence, Tuple, Any
 
 class InterfaceException(Exception):
     """
@@ -23,6 +32,21 @@ class InterfaceException(Exception):
 
     pass
 
+# The interfaces with a primitive running in the current thread or asyncio task, see Interface.primitive
+_RUNNING_PRIMITIVES: ContextVar[Tuple["Interface", ...]] = ContextVar("running_primitives", default=())
+
+def open_reader(ports: Optional[Sequence[str]] = None) -> Union[SerialReader, ReaderPool]:
+    """
+    Open the boards, a ReaderPool when there are many ports
+    Args:
+        ports (Optional[Sequence[str]]): The serial ports, None for the first "Arduino Uno"
+    """
+    if ports is not None and len(ports) > 1:
+        return ReaderPool(ports)
+    return SerialReader(port=ports[0] if ports else None)
+
+POT_FILTER = {"window": 3, "deadband": 2, "low": 0, "high": 1023} # Default noise filter of the potentiometers, see set_filter
+
 class Interface:
     """
     A interface class to handle the Decision Maker's inputs given with a physical interface (Arduino)
@@ -31,6 +55,8 @@ class Interface:
         potentiometer_pins (Union[np.ndarray, List[int]]): analog pins that are connected to potentiometers, count should be the same as variables
         rotary_encoder_pins (Union[np.ndarray, List[List[int]]]): pairs of digital pins that are connected to rotary encoders
         variable_bounds (Optional[np.ndarray]): Bounds for reference points, defaults to [0,1] for each variable
+        ports (Optional[Sequence[str]]): Serial ports of the master boards, the objectives or variables
+            are assigned across all of them. Defaults to the first "Arduino Uno"
     Raises:
         InterfaceException: more variables than potentiometers + rotary_encoders, cant adjust each variable
         InterfaceException: Has less than two buttons.
@@ -45,12 +71,11 @@ class Interface:
     def __init__(
         self,
         problem: MOProblem,
-        handle_objectives: bool = True
+        handle_objectives: bool = True,
+        ports: Optional[Sequence[str]] = None,
     ):
-        self.master = Master()
-        self.serial_reader = SerialReader()
-        self.problem = problem
-        self.targets = {}
+        notifier = ChangeNotifier() # The update thread publishes changed components here
+        self._setup(problem, ports, notifier, Master(notifier=notifier))
         # Updates the 'raw' data which is read from the serial
         # self.raw_updater = threading.Thread(target=self.serial_reader.update, daemon=True)
         # self.raw_updater.start()
@@ -70,9 +95,46 @@ class Interface:
 
         # print(self.value_handlers)
     
-    # If to_print doesn't fit on one line then its just gonna print to a lot of lines
+    def _setup(self, problem: MOProblem, ports: Optional[Sequence[str]], notifier: ChangeNotifier, master: Master) -> None:
+        """
+        Set up the state shared by the interfaces and open the boards, the components are assigned by construct
+        Args:
+            problem (MOProblem): The problem
+            ports (Optional[Sequence[str]]): The serial ports of the boards
+            notifier (ChangeNotifier): Where the changed components are published
+            master (Master): The master, its button presses are taken from the reader opened here
+        """
+        self.notifier = notifier
+        self.master = master
+        self.serial_reader = open_reader(ports)
+        self.master.edges = self.serial_reader.edges # The primitives take the button presses from here
+        self.problem = problem
+        self.targets = {}
+        self.store = ComponentStore() # Values of the master components and the assigned components
+        self._slot_components = [] # Component object of each slot in the store
+        self._slot_targets = [] # Target of each slot in the store, None for master components
+        self._target_keys = [] # Component keys of the targets
+        self._target_slots = np.zeros(0, dtype=np.intp) # Slot of each target in the order of self.targets
+        self._target_is_pot = np.zeros(0, dtype=bool) # Is the target handled by a potentiometer
+        self._pot_tables = None # Stacked lookup tables of the potentiometers, see pot_tables
+        self._pot_tables_key = None
+        self.filters = AnalogFilterBank() # Noise filters of the potentiometers, indexed by slot
+        self.gestures = GestureRecognizer() # Clicks, double clicks and holds of the master buttons
+        self.renderer = TerminalRenderer() # Draws the primitives' current values, see print_over
+        self._connections = self.serial_reader.connections # Changes when the reader reconnects, see apply_changes
+        self._seq = 0 # Latest sequence number taken from the readers cache, see SerialReader.changes_since
+        self._edge_cursor = 0 # Button edges before this are given to the gestures, see feed_gestures
+        self._primitives = 0 # Count of the threads and tasks running a primitive, see primitive
+        self._primitives_lock = threading.Lock()
+        self._running = True
+
     def print_over(self, to_print: str) -> None:
-        print(to_print, end="\r")
+        """
+        Show the text over the previous one, redrawn at most fps times per second (see TerminalRenderer)
+        and only when it changes so the loop calling this never waits on the terminal.
+        Text with many lines is drawn over the same lines
+        """
+        self.renderer.show(str(to_print))
     
     def confirmation(self, to_print: str = None) -> bool:
         """
@@ -83,7 +145,8 @@ class Interface:
             bool: true in confirmed, false if declined
         """
         if to_print is not None: print(to_print)
-        return self.master.confirm()
+        with self.primitive():
+            return self.master.confirm()
 
     def choose_from(self, options: np.ndarray, index_start: int = 0) -> Tuple[int, object]:
         """
@@ -105,11 +168,15 @@ class Interface:
 
         self.master.wheel.current_value = index_start
 
-        while not self.master.confirm_button.click():
-            current = self.master.select(0, index_max)
-            self.print_over(f"Currently chosen {current}/{index_max - 1}: {options[current]}")
-
-        print()
+        keys = self.master.wheel_keys + self.master.button_keys
+        with self.primitive():
+            version = self.notifier.version
+            while True:
+                current = self.master.select(0, index_max)
+                self.print_over(f"Currently chosen {current}/{index_max - 1}: {options[current]}")
+                if self.master.confirmed(): break
+                version = self.notifier.wait(version, keys, timeout=0.5) # Sleep until the wheel or a button changes
+            self.renderer.finish()
         return current, options[current]
     
     # in desdeo_emo/docs/notebooks/Example.ipynb one can choose multiple preferred values. Also in nimbus (saving solutions)
@@ -121,24 +188,25 @@ class Interface:
         
         selected_options = []
         options_temp = options
-        while (True):
-            too_much = len(selected_options) >= max_options
-            enough = len(selected_options) >= min_options
-
-            if too_much:
-                print("Maximun options chosen")
-                break
+        with self.primitive(): # The nested primitives don't record the latency
+            while (True):
+                too_much = len(selected_options) >= max_options
+                enough = len(selected_options) >= min_options
 
-            if enough: # Don't ask for confirmation until min value reached
-                if not self.confirmation("If you wish to add a new solution click the confirm button, if not decline"):
+                if too_much:
+                    print("Maximun options chosen")
                     break
-            
-            # TODO Clean up
-            option_temp = self.choose_from(options_temp) # This will mess up the indices
-            options_temp = np.delete(options_temp, option_temp[0], 0) # Delete the option from the array so it won't be picked again
-            option = (np.where(options == option_temp[1])[0][0], option_temp[1]) # Fix the index, TEMP
-            selected_options.append(option)
-            print(f"Current selection: {selected_options}")
+
+                if enough: # Don't ask for confirmation until min value reached
+                    if not self.confirmation("If you wish to add a new solution click the confirm button, if not decline"):
+                        break
+                
+                # TODO Clean up
+                option_temp = self.choose_from(options_temp) # This will mess up the indices
+                options_temp = np.delete(options_temp, option_temp[0], 0) # Delete the option from the array so it won't be picked again
+                option = (np.where(options == option_temp[1])[0][0], option_temp[1]) # Fix the index, TEMP
+                selected_options.append(option)
+                print(f"Current selection: {selected_options}")
 
         return selected_options
         
@@ -165,11 +233,15 @@ class Interface:
         if ((index_max - index_min) % step != 0):
             raise Exception("Step size is invalid, won't reach min or max values")
         
-        while not self.master.confirm_button.click():
-            current = self.master.select(index_min, index_max)
-            self.print_over(f"Currently chosen {current}")
-        print()
-
+        keys = self.master.wheel_keys + self.master.button_keys
+        with self.primitive():
+            version = self.notifier.version
+            while True:
+                current = self.master.select(index_min, index_max)
+                self.print_over(f"Currently chosen {current}")
+                if self.master.confirmed(): break
+                version = self.notifier.wait(version, keys, timeout=0.5)
+            self.renderer.finish()
         return current
 
     # def get_potentiometer_value(self, value_name: str = "value", value_min: float = 0, value_max: float = 1, pot_index = 0) -> float:
@@ -189,58 +261,180 @@ class Interface:
         return self.value_handlers[index].get_value(bound_min, bound_max)
     
     def get_variable_values(self):
-        while True:
-            if self.master.confirm_button.click(): break
-            values = list(map(lambda var: self.get_variable_value(var), self.problem.variables))
-            self.print_over(values)
+        with self.primitive():
+            version = self.notifier.version
+            while True:
+                values = list(map(lambda var: self.get_variable_value(var), self.problem.variables))
+                self.print_over(values)
+                if self.master.confirmed(): break
+                version = self.notifier.wait(version, self.target_keys(), timeout=0.5)
+            self.renderer.finish()
         return values
 
     # def get_value_old(self, index: int, bounds: np.ndarray):
     #     bound_min, bound_max = bounds
     #     return self.value_handlers[index].get_value(bound_min, bound_max)
     
-    def get_values(self, bounds: np.ndarray, step_size = 0.05, int_values = False):
-        while True:
-            if self.master.confirm_button.click(): 
-                print("OK!")
-                break
-            values = []
-            for target in self.targets:
-                i = list(self.targets).index(target)
-                value = self.get_value(target, bounds[:,i], step_size, int_values)
-                values.append(value)
-            self.print_over(values)
+    def get_values(self, bounds: np.ndarray, step_size = 0.05, int_values = False) -> np.ndarray:
+        with self.primitive():
+            version = self.notifier.version
+            while True:
+                values = self.scale_values(bounds, step_size, int_values)
+                self.print_over(values)
+                if self.master.confirmed(): break
+                version = self.notifier.wait(version, self.target_keys(), timeout=0.5) # Sleep until a target or a button changes
+            self.renderer.finish()
+            print("OK!")
         return values
+
+    def scale_values(self, bounds: np.ndarray, step_size = 0.05, int_values = False) -> np.ndarray:
+        """
+        Scale the values of all the targets to their bounds at once
+        Args:
+            bounds (np.ndarray): Lower bounds on the first row, upper bounds on the second, a column per target
+            step_size: Step size, a number or one per target. Rotary encoders move one step per detent,
+                potentiometer values are quantized to it, None or 0 to not quantize them
+            int_values: Round to integers, a bool or one per target
+        Returns:
+            np.ndarray: The values in the order of self.targets, integers if int_values is True
+        """
+        lower, upper = np.asarray(bounds, dtype=float)
+        if np.any(upper - lower <= 0):
+            raise Exception("Min value must be lower than max value!")
+        raw = self.store.snapshot()[0][self._target_slots]
+        step_size = np.broadcast_to(0.0 if step_size is None else step_size, raw.shape).astype(float)
+        int_values = np.broadcast_to(int_values, raw.shape)
+        pots = self._target_is_pot
+        values = RotaryEncoder.scale(raw, lower, upper, step_size, int_values)
+        if pots.any():
+            tables = self.pot_tables(lower[pots], upper[pots], step_size[pots], int_values[pots])
+            values[pots] = Potentiometer.lookup_batch(tables, raw[pots])
+        if int_values.all(): return values.astype(int)
+        return values
+
+    def pot_tables(self, lower: np.ndarray, upper: np.ndarray, step_size: np.ndarray, int_values: np.ndarray) -> np.ndarray:
+        """
+        Lookup tables of the potentiometer targets stacked for Potentiometer.lookup_batch,
+        the tables are only rebuilt when the arguments change or set_curve is called.
+        The noise filters are set to report a change once per quantization step of the values
+        Returns:
+            np.ndarray: Array of shape (potentiometer count, 1024)
+        """
+        key = (lower.tobytes(), upper.tobytes(), step_size.tobytes(), int_values.tobytes())
+        if key != self._pot_tables_key:
+            targets = [target for target in self.targets.values() if isinstance(target['component'], Potentiometer)]
+            self._pot_tables = np.stack([
+                target['component'].lookup_table(lower[i], upper[i], step_size[i] or None, int_values[i])
+                for i, target in enumerate(targets)
+            ])
+            for i, target in enumerate(targets):
+                if target['filter_step'] is None:
+                    step = target['component'].code_step(lower[i], upper[i], step_size[i], int_values[i])
+                    self.filters.set_step([target['slot']], [step])
+            self._pot_tables_key = key
+        return self._pot_tables
+
+    def set_curve(self, target_name: str, curve) -> None:
+        """
+        Change the scaling curve of a target handled by a potentiometer, see Potentiometer.set_curve
+        Args:
+            target_name (str): Name of the target
+            curve (Union[str, Callable]): "linear", "log" or a monotone function from [0, 1] to [0, 1]
+        """
+        component = self.targets[target_name]['component']
+        if not isinstance(component, Potentiometer):
+            raise Exception(f"{target_name} is not handled by a potentiometer")
+        component.set_curve(curve)
+        self._pot_tables_key = None
+
+    def set_acceleration(self, target_name: str, acceleration=default_acceleration) -> None:
+        """
+        Accelerate a target handled by a rotary encoder, fast turns move it more per detent
+        Args:
+            target_name (str): Name of the target
+            acceleration (Optional[Callable[[float], float]]): Detents per second to a step multiplier, None to turn off
+        """
+        component = self.targets[target_name]['component']
+        if not isinstance(component, RotaryEncoder):
+            raise Exception(f"{target_name} is not handled by a rotary encoder")
+        component.acceleration = acceleration
+
+    def send_bounds(self, target_name: str, min_value: float, max_value: float, step_size: float = 0) -> None:
+        """
+        Bound the values the component of a target reports on its node, see doc/Communication.
+        The reader keeps the bounds and sends them again when the master reconnects
+        Args:
+            target_name (str): Name of the target
+            min_value (float): Lowest value of the component
+            max_value (float): Highest value of the component
+            step_size (float): Step of the value, ignored for potentiometers
+        """
+        target = self.targets[target_name]
+        component_type, component_id = target['component_info']
+        self.serial_reader.send_bounds(target['node'], component_type, component_id, min_value, max_value, step_size)
+
+    def target_keys(self) -> tuple:
+        """
+        Keys of the components assigned to targets and the master buttons, see ChangeNotifier
+        """
+        return tuple(self._target_keys) + self.master.button_keys
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Current values, change timestamps and change counts of the components without copying,
+        see ComponentStore.snapshot. Use self.store.slot or target['slot'] to find a component.
+        """
+        return self.store.snapshot()
     
-    def construct(self, handle_objectives):
+    def construct(self, handle_objectives, timeout: float = 5.0):
+        """
+        Assign the components to the objectives or variables once the master has sent its configuration
+        Args:
+            handle_objectives (bool): Assign to objectives, if False to variables
+            timeout (float): How long to wait for the configuration in seconds, after that the components
+                found so far are used
+        """
         print("Constructing the interface...")
-        time.sleep(3) # Let the thread get values
-        self.serial_reader.update()
+        if not self.serial_reader.wait_configured(timeout):
+            print(f"No configuration from the master in {timeout} s, using the components found so far")
+        start = time.perf_counter()
         raw_data = self.serial_reader.data()
-        print(f"found {len(raw_data.keys()) - 1} modules")
-        
-    
-        master_data = raw_data.pop('master')
+        print(f"found {len(set(key[:-2] for key in self.serial_reader.components()))} modules")
+
+        master_data = raw_data.pop('master', {})
         self.update_master(master_data)
+        self.route(master_key("Accept"), self.master.confirm_button, None)
+        self.route(master_key("Decline"), self.master.decline_button, None)
+        self.route(master_key("Rotary"), self.master.wheel, None)
+        self.gestures.add(master_key("Accept"))
+        self.gestures.add(master_key("Decline"))
 
         values_to_handle = self.problem.objectives.copy() if handle_objectives else self.problem.variables.copy()
 
-        p_count = sum([len(node['P']) for node in raw_data.values() if 'P' in node])
-        r_count = sum([len(node['R']) for node in raw_data.values() if 'R' in node])
+        components = self.serial_reader.components() # From every board when there are many
+        p_count = sum(1 for key in components if key[-2] == 'P')
+        r_count = sum(1 for key in components if key[-2] == 'R')
 
         print(f"found {p_count + r_count} components in total")
 
         if len(values_to_handle) > p_count + r_count:
             raise Exception("Not enough handlers")
 
-        for node_id in raw_data.keys():
-            for component_type in raw_data[node_id].keys():
-                for component_id in raw_data[node_id][component_type].keys():
-                    if len(values_to_handle) == 0: break # All variables or objectives are assigned
-                    self.assign_component(node_id, component_type, component_id, values_to_handle)
-        print("successfully constructed the interface")
+        for key in components:
+            if len(values_to_handle) == 0: break # All variables or objectives are assigned
+            self.assign_component(key, values_to_handle)
+        self.timings = dict(self.serial_reader.timings, construct=time.perf_counter() - start)
+        print(f"successfully constructed the interface in {1000 * sum(self.timings.values()):.0f} ms")
     
-    def assign_component(self, node_id, component_type, component_id, values_to_handle):
+    def assign_component(self, key: tuple, values_to_handle):
+        """
+        Assign a component to the next objective or variable
+        Args:
+            key (tuple): The key of the component, (node_id, type, id) or (port, node_id, type, id) with many boards
+            values_to_handle: The objectives or variables without a component, the last one is assigned
+        """
+        component_type, component_id = key[-2:]
+        node_id = key[0] if len(key) == 3 else key[:-2]
         if component_type == "B":
             print("Skipping button")
             return
@@ -264,7 +458,29 @@ class Interface:
             'value': 0,
             'lower_bound': lower,
             'upper_bound': upper,
+            'filter_step': None, # Follows the quantization of the values when None, see pot_tables
         }
+        self.targets[next.name]['slot'] = self.route(key, comp, self.targets[next.name])
+        self._target_keys.append(key)
+        self._target_slots = np.append(self._target_slots, self.targets[next.name]['slot'])
+        self._target_is_pot = np.append(self._target_is_pot, component_type == "P")
+        if component_type == "P": self.filters.configure(self.targets[next.name]['slot'], **POT_FILTER)
+
+    def route(self, key, component: Component, target: Optional[dict]) -> int:
+        """
+        Add a component to the routing table, after this its changes are written straight to its slot
+        Args:
+            key: The component key from SerialReader
+            component (Component): The component object
+            target (Optional[dict]): The target the component handles
+        Returns:
+            int: The slot of the component in the store
+        """
+        slot = self.store.add(key)
+        if slot == len(self._slot_components):
+            self._slot_components.append(component)
+            self._slot_targets.append(target)
+        return slot
     
     def get_value(self, target_name, bounds, step_size = 1, int_values = False):
         bound_min, bound_max = bounds
@@ -272,27 +488,140 @@ class Interface:
         return value
         
     def update(self):
-        while True:
-            self.serial_reader.update()
-            if self.targets is None: return 
-            raw_data = self.serial_reader.data()
-            if raw_data is None: return
-            master_data = raw_data.pop("master")
-            self.update_master(master_data)
-            for target in self.targets.values():
-                node_id = target['node']
-                component_type, component_id = target['component_info']
-                value = raw_data[node_id][component_type][component_id]
-                component = target["component"]
-                # if isinstance(value, int): value = [value]
+        """
+        Update loop of the updater thread. Blocks until data arrives from serial,
+        updates only the components changed since the last round and then wakes up the waiting consumers.
+        """
+        while self._running:
+            self.serial_reader.update(timeout=self.gestures.timeout(0.5)) # Wake up for the gesture timers too
+            self.feed_gestures()
+            self.gestures.poll()
+            self._seq, changes = self.serial_reader.changes_since(self._seq)
+            if not changes: continue
+            changed = self.apply_changes(changes)
+            if changed: self.notifier.publish(changed)
+
+    def apply_changes(self, changes: dict) -> set:
+        """
+        Update the components that have changed. The values of filtered components
+        go through self.filters first, see set_filter
+        Args:
+            changes (dict): Newest values of the changed components by key, see SerialReader.changes_since
+        Returns:
+            set: Keys of the components whose change should be published, noise is left out
+        """
+        now = time.monotonic()
+        if self.serial_reader.connections != self._connections: # The master was reconnected, the mapping stays
+            self._connections = self.serial_reader.connections
+            for component in self._slot_components:
+                if isinstance(component, RotaryEncoder): component.rebase()
+        keys = [key for key in changes if self.store.slot(key) is not None] # Skip the ones not assigned to anything
+        if not keys: return set()
+        slots = np.fromiter((self.store.slot(key) for key in keys), dtype=np.intp, count=len(keys))
+        values = np.fromiter((changes[key] for key in keys), dtype=float, count=len(keys))
+        publish = np.ones(len(keys), dtype=bool)
+        filtered = self.filters.is_filtered(slots)
+        if filtered.any():
+            values[filtered], publish[filtered] = self.filters.apply(slots[filtered], values[filtered])
+        for key, slot, value in zip(keys, slots.tolist(), values.tolist()):
+            component = self._slot_components[slot]
+            target = self._slot_targets[slot]
+            if target is not None and isinstance(component, RotaryEncoder):
+                component.update(value, now)
+                value = component.position # Same as RotaryEncoder.get_value
+            else:
                 component.update(value)
-                target["value"] = value
+            self.store.write(slot, value, now)
+            if target is not None: target["value"] = value
+        if LATENCY.enabled:
+            for key in keys: LATENCY.since("apply", self.serial_reader.arrival(key))
+        return {key for key, p in zip(keys, publish) if p}
+
+    @contextmanager
+    def primitive(self):
+        """
+        Run an interaction primitive: the presses made before it are forgotten so they can't answer it
+        (see Master.flush) and when the outermost primitive returns the latency from the press that
+        finished it is recorded, see returned. The nesting is tracked per thread and asyncio task so
+        primitives of independent tasks (see AsyncInterface) are each outermost, and the presses are
+        only forgotten when no other task is waiting for one
+        """
+        running = _RUNNING_PRIMITIVES.get()
+        outermost = self not in running
+        if outermost:
+            with self._primitives_lock:
+                if self._primitives == 0: self.master.flush()
+                self._primitives += 1
+        token = _RUNNING_PRIMITIVES.set(running + (self,))
+        try:
+            yield
+        finally:
+            _RUNNING_PRIMITIVES.reset(token)
+            if outermost:
+                with self._primitives_lock: self._primitives -= 1
+        if outermost: self.returned()
+
+    def returned(self) -> None:
+        """
+        A primitive is returning, record the latency from the press that finished it once, see Latency
+        """
+        if LATENCY.enabled and self.master.last_press is not None:
+            LATENCY.since("primitive", self.master.last_press.timestamp)
+        self.master.last_press = None
+
+    def feed_gestures(self) -> None:
+        """
+        Give the new button edges to the gesture recognizer, each press and release is seen
+        even if the newest value of the button is the same as before
+        """
+        self._edge_cursor, edges = self.serial_reader.edges.read(self._edge_cursor, consumer="gestures")
+        for edge in edges:
+            if edge.button in self.gestures: self.gestures.feed(edge.button, edge.pressed, edge.timestamp)
+
+    def next_gesture(self, timeout: Optional[float] = None):
+        """
+        Take the next click, double click, hold or release of the master buttons, see GestureRecognizer
+        Args:
+            timeout (Optional[float]): How long to wait, 0 to not wait, None to wait forever
+        Returns:
+            Optional[ButtonEvent]: The event or None if nothing happened in time
+        """
+        return self.gestures.get(timeout)
+
+    def set_filter(
+        self, target_name: str, alpha: float = 1.0, window: int = 1, deadband: float = 0.0, step: Optional[float] = None
+    ) -> None:
+        """
+        Change the noise filtering of a target, see AnalogFilterBank.configure. Values are in raw units,
+        0-1023 for potentiometers. Use set_filter(target_name, step=1e-9) for no filtering.
+        Args:
+            target_name (str): Name of the target
+            alpha (float): EMA factor in (0, 1], 1 disables the EMA
+            window (int): Median of this many latest values, 1 disables the median
+            deadband (float): Width of the hysteresis band, 0 disables it
+            step (Optional[float]): A change is published only when the filtered value crosses a multiple of this,
+                None to follow the step size of the values
+        """
+        target = self.targets[target_name]
+        target['filter_step'] = step
+        rails = (POT_FILTER["low"], POT_FILTER["high"]) if isinstance(target['component'], Potentiometer) else ()
+        self.filters.configure(target['slot'], alpha, window, deadband, 1.0 if step is None else step, *rails)
+        if step is None: self._pot_tables_key = None # Set the step again on the next scale_values
 
     # MAYBE remove master
     def update_master(self, data):
-        self.master.confirm_button.update(data['Accept'])
-        self.master.decline_button.update(data['Decline'])
-        self.master.wheel.update(data['Rotary'])
+        self.master.confirm_button.update(data.get('Accept', 0)) # Missing until the first value arrives
+        self.master.decline_button.update(data.get('Decline', 0))
+        self.master.wheel.update(data.get('Rotary', 0))
+
+    def close(self):
+        """
+        Stop the updater thread and end the communication with the master
+        """
+        self._running = False
+        self.updater.join()
+        self.serial_reader.end_communication()
+        self.renderer.close()
 
     # TODO 
     # Check if the interface has all required components